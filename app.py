@@ -1,20 +1,177 @@
 import os
 import logging
-import requests
 import json
+import tempfile
 import uuid
+from functools import lru_cache
 from datetime import datetime
-from flask import Flask, render_template, jsonify, request, redirect, url_for
+from flask import Flask, Response, render_template, jsonify, request, redirect, url_for
+from sqlalchemy import inspect
+from werkzeug.middleware.proxy_fix import ProxyFix
 import time
 
-# Set up logging for easier debugging
-logging.basicConfig(level=logging.DEBUG)
+from area_weather import AreaWeather
+from asset_bundler import AssetBundles
+from flight_planner import plan as plan_flight_windows
+from forecast import build_forecast
+from image_variants import ResponsiveImages
+from metrics import Instrumentation, server_timing, upstream_timer
+from models import db, Contacto, Testimonio
+from notifications import NotificationDispatcher, NotificationError, validate_contact
+from order_queue import OrderWriter, OrderError, OrderQueueFull, validate_order
+from page_cache import CachedPage, PageCache, VersionedPage, json_body
+from rate_limiter import RateLimiter, client_ip, create_backend, parse_limit
+from service_areas import SERVICE_AREAS, coverage, coverage_geojson, get_area, map_areas
+from service_catalog import get_service, price_label
+from serving import cooperative
+from static_assets import StaticAssets
+from template_cache import TemplateCache
+from testimonial_store import TestimonialStore, TestimonialError
+from video_library import VideoLibrary
+from weather_cache import WeatherCache
+from weather_client import OpenWeatherClient, CircuitBreaker, OpenWeatherError
+from weather_fragment import WeatherFragmentCache, snapshot_version
+from weather_history import WeatherHistory
+from weather_scheduler import WeatherScheduler
+from weather_stream import StreamFull, WeatherBroadcaster
+
+# Modo sin servidor (Vercel): cada instancia nueva arranca en frío con la primera petición,
+# así que no se crean tablas al importar y el log por defecto es de producción
+serverless = os.environ.get("SERVERLESS", "0") == "1"
+
+# Set up logging for easier debugging (LOG_LEVEL=WARNING en producción)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING" if serverless else "DEBUG").upper())
 
 # Create Flask app with explicit static configuration
 app = Flask(__name__, static_url_path='/static', static_folder='static')
 app.secret_key = os.environ.get("SESSION_SECRET", "freire-fpv-secret-key")
 
-# Sin base de datos - aplicación estática
+# Detrás de un proxy (Vercel, nginx) la IP real del cliente llega en X-Forwarded-For
+trusted_proxies = int(os.environ.get("TRUSTED_PROXIES", 0))
+if trusted_proxies:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies)
+
+# Histogramas de latencia (/metrics) y cabecera Server-Timing. Se registra antes que el
+# resto de hooks para que el tiempo medido los incluya
+instrumentation = Instrumentation(
+    app,
+    enabled=os.environ.get("METRICS", "1") == "1",
+    directory=os.environ.get("METRICS_DIR", os.path.join(tempfile.gettempdir(), "freirefpv-metrics")),
+    dump_interval=float(os.environ.get("METRICS_DUMP_INTERVAL", 10)),
+    timing_header=os.environ.get("SERVER_TIMING", "1") == "1")
+metrics_token = os.environ.get("METRICS_TOKEN")
+
+# Ficheros estáticos con hash de contenido y caché inmutable (asset_url en las plantillas).
+# Con STATIC_MANIFEST (relativo a la app) no se leen todos los estáticos en cada arranque
+static_manifest = os.environ.get("STATIC_MANIFEST")
+static_assets = StaticAssets(app, manifest_path=static_manifest and os.path.join(app.root_path, static_manifest))
+asset_bundles = AssetBundles(app, static_assets)
+video_library = VideoLibrary(app, static_assets)
+responsive_images = ResponsiveImages(app, static_assets)
+# Plantillas precompiladas (python template_cache.py): la primera petición no compila Jinja
+template_cache = TemplateCache(app, enabled=os.environ.get("TEMPLATE_CACHE", "1") == "1")
+
+# Base de datos (testimonios). Por defecto SQLite en instance/; DATABASE_URL para PostgreSQL
+database_url = os.environ.get("DATABASE_URL")
+if database_url and database_url.startswith("postgres://"):
+    database_url = database_url.replace("postgres://", "postgresql://", 1)
+if not database_url:
+    os.makedirs(app.instance_path, exist_ok=True)
+    database_url = "sqlite:///" + os.path.join(app.instance_path, "freirefpv.db")
+app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_pre_ping": True}
+db.init_app(app)
+
+# Crea las tablas que falten; devuelve True si la de testimonios no existía. Es la única
+# ocasión en que se añaden los testimonios iniciales: si luego se borran todos, no vuelven
+def create_tables():
+    new_testimonios = not inspect(db.engine).has_table(Testimonio.__tablename__)
+    db.create_all()
+    return new_testimonios
+
+@app.cli.command("init-db")
+def init_db():
+    """Crea las tablas que falten y, con la de testimonios nueva, los iniciales (en modo sin servidor, ejecutar al desplegar)."""
+    new_testimonios = create_tables()
+    print("Tablas creadas")
+    if new_testimonios:
+        print(f"Testimonios iniciales añadidos: {testimonial_store.seed()}")
+
+testimonios_table_created = False
+if not serverless:
+    with app.app_context():
+        try:
+            testimonios_table_created = create_tables()
+        except Exception as e:
+            # Con varios workers arrancando a la vez otro puede haber creado ya las tablas
+            app.logger.warning(f"No se pudieron crear las tablas: {e}")
+
+# Límite de escrituras por IP y por token (RATE_LIMIT_SHARED=1 para compartirlo entre workers)
+rate_limiter = RateLimiter(
+    create_backend(shared=os.environ.get("RATE_LIMIT_SHARED", "0") == "1",
+                   path=os.environ.get("RATE_LIMIT_PATH",
+                                       os.path.join(tempfile.gettempdir(), "freirefpv-ratelimit.sqlite3")),
+                   max_keys=int(os.environ.get("RATE_LIMIT_MAX_KEYS", 10000))),
+    enabled=os.environ.get("RATE_LIMIT", "1") == "1")
+testimonio_post_limit = parse_limit(os.environ.get("RATE_LIMIT_TESTIMONIOS_POST", "3/hour"))
+testimonio_delete_limit = parse_limit(os.environ.get("RATE_LIMIT_TESTIMONIOS_DELETE", "10/hour"))
+testimonio_token_limit = parse_limit(os.environ.get("RATE_LIMIT_TESTIMONIOS_TOKEN", "5/hour"))
+
+# Avisos por correo de pedidos y contactos: cola en base de datos y envío SMTP en segundo plano
+notifications = NotificationDispatcher(
+    app,
+    host=os.environ.get("SMTP_HOST"),
+    port=int(os.environ.get("SMTP_PORT", 587)),
+    username=os.environ.get("SMTP_USERNAME"),
+    password=os.environ.get("SMTP_PASSWORD"),
+    use_tls=os.environ.get("SMTP_STARTTLS", "1") == "1",
+    use_ssl=os.environ.get("SMTP_SSL", "0") == "1",
+    sender=os.environ.get("NOTIFY_SENDER", "Freire FPV <no-reply@freirefpv.com>"),
+    admin_email=os.environ.get("NOTIFY_ADMIN_EMAIL", "carlosfreire777@gmail.com"),
+    workers=int(os.environ.get("NOTIFY_WORKERS", 2)),
+    batch_size=int(os.environ.get("NOTIFY_BATCH_SIZE", 20)),
+    max_attempts=int(os.environ.get("NOTIFY_MAX_ATTEMPTS", 6)),
+    backoff_base=int(os.environ.get("NOTIFY_BACKOFF", 30)))
+app.jinja_env.globals["server_notifications"] = notifications.enabled
+contacto_limit = parse_limit(os.environ.get("RATE_LIMIT_CONTACTO", "10/hour"))
+
+# Pedidos: la ruta solo valida y encola; un hilo los guarda por lotes. En Vercel no hay hilos
+# persistentes, así que en modo sin servidor cada pedido se guarda en la propia petición
+order_writer = OrderWriter(
+    app,
+    spill_path=os.environ.get("ORDER_SPILL_PATH", os.path.join(app.instance_path, "pedidos-pendientes.jsonl")),
+    batch_size=int(os.environ.get("ORDER_BATCH_SIZE", 50)),
+    max_delay=float(os.environ.get("ORDER_BATCH_DELAY", 1.0)),
+    max_queue=int(os.environ.get("ORDER_QUEUE_SIZE", 1000)),
+    enabled=os.environ.get("ORDER_WRITE_BEHIND", "0" if serverless else "1") == "1",
+    notifier=notifications)
+pedido_limit = parse_limit(os.environ.get("RATE_LIMIT_PEDIDOS", "10/hour"))
+
+# Páginas de testimonios cacheadas en memoria; el fichero de versión avisa al resto de workers
+testimonial_store = TestimonialStore(
+    version_path=os.environ.get("TESTIMONIOS_VERSION_PATH",
+                                os.path.join(tempfile.gettempdir(), "freirefpv-testimonios.version")))
+if testimonios_table_created:
+    with app.app_context():
+        try:
+            testimonial_store.seed()
+        except Exception as e:
+            app.logger.warning(f"No se pudieron crear los testimonios iniciales: {e}")
+# Tiempo que navegadores y CDN pueden reutilizar una página sin preguntar (luego revalidan con ETag)
+testimonios_max_age = int(os.environ.get("TESTIMONIOS_MAX_AGE", 60))
+
+# Páginas estáticas renderizadas una sola vez (PAGE_CACHE=0 o modo debug para desarrollo)
+page_cache = PageCache(enabled=os.environ.get("PAGE_CACHE", "1") == "1",
+                       max_age=int(os.environ.get("PAGE_CACHE_MAX_AGE", 300)))
+
+# Precios de servicios.html desde el catálogo (la misma fuente que los presupuestos de /api/cobertura)
+app.jinja_env.globals["service_price"] = price_label
+cobertura_max_points = int(os.environ.get("COBERTURA_MAX_POINTS", 100))
+# Tarifa de desplazamiento de los presupuestos (km incluidos y euros por km de más).
+# Sin COBERTURA_EUR_POR_KM no hay tarifa aprobada: /api/cobertura no da recargo ni total
+cobertura_eur_por_km = os.environ.get("COBERTURA_EUR_POR_KM")
+cobertura_travel_rate = (None if not cobertura_eur_por_km else
+                         (float(os.environ.get("COBERTURA_KM_INCLUIDOS", 0)), float(cobertura_eur_por_km)))
 
 # Filtro personalizado para formatear la hora
 @app.template_filter('strftime')
@@ -23,255 +180,418 @@ def _jinja2_filter_datetime(format):
 
 # Configuración de EmailJS y OpenWeather
 emailjs_public_key = os.environ.get("EMAILJS_PUBLIC_KEY")
-openweather_api_key = "5ae0c9a3137234e18e032e3d6024629e"  # API key proporcionada por el usuario
+openweather_api_key = os.environ.get("OPENWEATHER_API_KEY", "5ae0c9a3137234e18e032e3d6024629e")  # API key proporcionada por el usuario
+
+# Cliente compartido: pool keep-alive, timeouts, reintentos y circuit breaker
+openweather = OpenWeatherClient(
+    openweather_api_key,
+    base_url=os.environ.get("OPENWEATHER_BASE_URL", "https://api.openweathermap.org"),
+    connect_timeout=float(os.environ.get("OPENWEATHER_CONNECT_TIMEOUT", 3.05)),
+    read_timeout=float(os.environ.get("OPENWEATHER_READ_TIMEOUT", 5)),
+    retries=int(os.environ.get("OPENWEATHER_RETRIES", 2)),
+    breaker=CircuitBreaker(failure_threshold=int(os.environ.get("OPENWEATHER_BREAKER_FAILURES", 5)),
+                           reset_timeout=int(os.environ.get("OPENWEATHER_BREAKER_RESET", 60))),
+)
+
+# Caché compartida entre workers para no consultar OpenWeather en cada petición
+weather_cache_path = os.environ.get(
+    "WEATHER_CACHE_PATH", os.path.join(tempfile.gettempdir(), "freirefpv-weather.json"))
+weather_cache_ttl = int(os.environ.get("WEATHER_CACHE_TTL", 600))
+weather_cache_stale_ttl = int(os.environ.get("WEATHER_CACHE_STALE_TTL", 3600))
+
+# Refresco programado en segundo plano (desactivado por defecto: en Vercel no hay hilos persistentes)
+weather_prefetch_enabled = os.environ.get("WEATHER_PREFETCH", "0") == "1"
+weather_prefetch_interval = int(os.environ.get("WEATHER_PREFETCH_INTERVAL", weather_cache_ttl))
 
-# Función para obtener los datos del tiempo de Málaga
+# Función para obtener los datos del tiempo de Málaga (servidos desde la caché)
 def get_weather_data():
+    snapshot = get_weather_snapshot()
+    return snapshot['data'] if snapshot else None
+
+# Instantánea completa (con fetched_at, que es su versión) o None si no hay datos que mostrar
+def get_weather_snapshot():
+    if weather_scheduler.enabled:
+        # Con el programador activo las rutas nunca esperan a la red
+        snapshot = weather_cache.read_snapshot()
+    elif weather_cache.get() is not None:
+        # get() aplica el TTL; la instantánea publicada es la suya o una más reciente
+        snapshot = weather_cache.read_snapshot()
+    else:
+        snapshot = None
+    return snapshot if snapshot and snapshot.get('data') is not None else None
+
+# Función para consultar OpenWeather y procesar la previsión de Málaga
+def fetch_weather_data():
+    # Coordenadas de Málaga
+    return fetch_forecast(36.72, -4.42)
+
+# Consulta OneCall para unas coordenadas y devuelve la previsión procesada (o None)
+def fetch_forecast(lat, lon):
     try:
-        # Coordenadas de Málaga
-        lat = 36.72
-        lon = -4.42
-        
         # Obtener pronóstico usando la API OneCall 3.0
-        url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&exclude=minutely,hourly&appid={openweather_api_key}&units=metric&lang=es"
-        
-        response = requests.get(url)
-        data = response.json()
-        
-        if response.status_code != 200:
-            app.logger.error(f"Error al obtener datos del clima: {data.get('message', 'Error desconocido')}")
+        try:
+            # Una sola llamada trae también las series por hora y minuto del planificador
+            with upstream_timer("openweather"):
+                data = openweather.onecall(lat, lon, exclude="alerts")
+        except OpenWeatherError as e:
+            app.logger.error(f"Error al obtener datos del clima: {e}")
             return None
-        
-        result = {}
-        
-        # Procesar datos del tiempo actual
-        current = data['current']
-        current_weather = current['weather'][0]
-        current_temp = current['temp']
-        current_description = current_weather['description']
-        current_icon = current_weather['icon']
-        current_wind = current['wind_speed']
-        current_humidity = current['humidity']
-        current_uvi = current.get('uvi', 0)
-        current_pressure = current.get('pressure', 0)
-        current_rain = 0
-        
-        if 'rain' in current and '1h' in current['rain']:
-            current_rain = current['rain']['1h']
-        
-        # Procesar los datos diarios primero para obtener la información del día actual
-        daily_forecast = []
-        
-        # Recorrer los datos diarios (hasta 5 días)
-        for i, day_data in enumerate(data['daily']):
-            if i >= 5:  # Limitamos a 5 días
-                break
-                
-            dt = datetime.fromtimestamp(day_data['dt'])
-            weather = day_data['weather'][0]
-            temp = day_data['temp']['day']  # Temperatura durante el día
-            description = weather['description']
-            icon = weather['icon']
-            wind = day_data['wind_speed']
-            humidity = day_data['humidity']
-            
-            # Comprobar si hay previsión de lluvia
-            rain_amount = day_data.get('rain', 0)
-            
-            # Determinar el estado del vuelo usando las reglas
-            # - Verde (óptimo): Lluvia entre 0mm y 0.5mm Y viento menor a 15km/h
-            # - Amarillo (posible): Lluvia entre 0mm y 0.5mm Y viento entre 15-30km/h
-            # - Naranja (por determinar): Lluvia entre 0.6mm y 1.5mm
-            # - Rojo (no operable): Lluvia mayor a 1.5mm O viento mayor a 30km/h
-            
-            day_flight_status = ""
-            day_status_text = ""
-            
-            # Condiciones no operables (rojo)
-            if rain_amount > 1.5 or wind > 30:
-                day_flight_status = "not-recommended"  # Rojo
-                if rain_amount > 1.5:
-                    day_status_text = "No operable: Lluvia excesiva"
-                else:
-                    day_status_text = "No operable: Viento demasiado fuerte"
-            
-            # Condiciones por determinar (naranja)
-            elif rain_amount > 0.5 and rain_amount <= 1.5:
-                day_flight_status = "caution"  # Naranja
-                day_status_text = "Por determinar situación meteorológica"
-            
-            # Condiciones óptimas (verde) o con precaución (amarillo)
-            else:
-                if wind < 15:
-                    day_flight_status = "optimal"  # Verde - Óptimo
-                    day_status_text = "Óptimo para volar"
-                else:
-                    day_flight_status = "possible"  # Amarillo - Posible con precaución
-                    day_status_text = "Posible con precaución"
-            
-            daily_forecast.append({
-                'date': dt.strftime('%d/%m'),
-                'day_name': get_day_name(dt.weekday()),
-                'temp': round(temp),
-                'description': description.capitalize(),
-                'icon': icon,
-                'wind': round(wind),
-                'humidity': humidity,
-                'rain_amount': rain_amount,
-                'is_rainy': rain_amount > 0.1 or 'lluvia' in description.lower() or 'rain' in weather.get('main', '').lower(),
-                'flight_status': day_flight_status,
-                'status_text': day_status_text
-            })
-        
-        # Usar el estado de vuelo del día actual para el panel de clima actual
-        if daily_forecast:
-            # Tomar el estado de vuelo del primer elemento (día de hoy)
-            flight_status = daily_forecast[0]['flight_status']
-            status_text = daily_forecast[0]['status_text']
-        else:
-            # Respaldo por si no hay datos de pronóstico diario
-            flight_status = "caution"
-            status_text = "No se pudo determinar el estado"
-        
-        # Datos del tiempo actual
-        result['current'] = {
-            'temp': round(current_temp),
-            'description': current_description.capitalize(),
-            'icon': current_icon,
-            'wind': round(current_wind),
-            'humidity': current_humidity,
-            'rain_amount': current_rain,
-            'uvi': current_uvi,
-            'pressure': current_pressure,
-            'flight_status': flight_status,
-            'status_text': status_text,
-            'timestamp': current['dt'],
-            'formatted_time': datetime.fromtimestamp(current['dt'] + 7200).strftime('%H:%M') # Ajustado a GMT+2 (horario de verano)
-        }
-        
-        result['daily'] = daily_forecast
-        return result
-    
+
+        return build_forecast(data)
+
     except Exception as e:
         app.logger.error(f"Error al procesar datos del clima: {str(e)}")
         return None
 
-# Función auxiliar para obtener el nombre del día en español
-def get_day_name(weekday):
-    days = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
-    return days[weekday]
+# Histórico de condiciones (una fila por zona y hora) para /api/weather/history.
+# Tamaño fijo según la retención; en Vercel el disco no persiste, así que va desactivado
+weather_history = WeatherHistory(
+    os.environ.get("WEATHER_HISTORY_PATH", os.path.join(app.instance_path, "weather-history.bin")),
+    retention_days=int(os.environ.get("WEATHER_HISTORY_RETENTION_DAYS", 730)),
+    forecast_lead=int(os.environ.get("WEATHER_HISTORY_LEAD", 24)),
+    enabled=os.environ.get("WEATHER_HISTORY", "0" if serverless else "1") == "1")
+
+weather_cache = WeatherCache(weather_cache_path, fetch_weather_data,
+                             ttl=weather_cache_ttl, stale_ttl=weather_cache_stale_ttl,
+                             on_fetch=weather_history.recorder("malaga"))
+weather_scheduler = WeatherScheduler(weather_cache,
+                                     interval=weather_prefetch_interval,
+                                     stale_after=weather_cache_ttl + weather_cache_stale_ttl,
+                                     enabled=weather_prefetch_enabled)
+
+# Actualizaciones del tiempo por SSE: un hilo por worker reparte cada cambio a todas las páginas.
+# Por defecto solo con workers gevent (SERVING_MODE=async): en los síncronos cada stream ocupa un hilo
+weather_stream_setting = os.environ.get("WEATHER_STREAM", "auto")
+weather_stream = WeatherBroadcaster(
+    weather_cache,
+    refresh=not weather_scheduler.enabled,
+    poll_interval=float(os.environ.get("WEATHER_STREAM_POLL", 5)),
+    heartbeat=float(os.environ.get("WEATHER_STREAM_HEARTBEAT", 15)),
+    max_duration=float(os.environ.get("WEATHER_STREAM_MAX_DURATION", 600)),
+    max_clients=int(os.environ.get("WEATHER_STREAM_MAX_CLIENTS", 500)),
+    enabled=cooperative() if weather_stream_setting == "auto" else weather_stream_setting == "1")
+app.jinja_env.globals["weather_stream"] = weather_stream.enabled
+
+# Widget del tiempo de contacto renderizado una vez por instantánea (PAGE_CACHE=0 lo renderiza siempre)
+weather_fragments = WeatherFragmentCache(enabled=os.environ.get("PAGE_CACHE", "1") == "1")
+# Y el JSON de /api/weather/refresh, serializado (y comprimido) una vez por instantánea
+weather_responses = VersionedPage("weather-json", enabled=os.environ.get("PAGE_CACHE", "1") == "1")
+
+# Previsión de todas las zonas de servicio (una caché por zona, consultas en paralelo)
+area_weather = AreaWeather(SERVICE_AREAS, fetch_forecast,
+                           cache_dir=os.path.dirname(weather_cache_path),
+                           ttl=weather_cache_ttl, stale_ttl=weather_cache_stale_ttl,
+                           max_workers=int(os.environ.get("WEATHER_AREAS_WORKERS", 6)),
+                           history=weather_history)
+
+@app.before_request
+def _start_weather_scheduler():
+    # Cada worker arranca su hilo tras el fork; solo el líder consulta la API
+    weather_scheduler.ensure_started()
+    notifications.ensure_started()
 
 # Routes
 @app.route("/")
 def intro():
-    return render_template("intro.html", emailjs_public_key=emailjs_public_key)
+    return page_cache.render("intro.html", emailjs_public_key=emailjs_public_key)
 
 @app.route("/inicio")
 def index():
-    return render_template("index.html", emailjs_public_key=emailjs_public_key)
+    return page_cache.render("index.html", emailjs_public_key=emailjs_public_key)
 
 @app.route("/servicios")
 def servicios():
-    return render_template("servicios.html", emailjs_public_key=emailjs_public_key)
+    return page_cache.render("servicios.html", emailjs_public_key=emailjs_public_key)
 
 @app.route("/quienes-somos")
 def quienes_somos():
-    # Sin base de datos - los testimonios se cargan via JavaScript
+    # Primera página de testimonios (normalmente servida desde la caché en memoria)
     return render_template("quienes-somos.html", 
                           emailjs_public_key=emailjs_public_key,
-                          testimonios=[])
+                          testimonios=testimonial_store.page().testimonios)
 
 @app.route("/mi-equipo")
 def mi_equipo():
-    return render_template("mi-equipo.html", emailjs_public_key=emailjs_public_key)
+    return page_cache.render("mi-equipo.html", emailjs_public_key=emailjs_public_key)
 
 @app.route("/contacto")
 def contacto():
-    # Obtener datos del tiempo para mostrar en la página de contacto
-    weather_data = get_weather_data()
+    # El widget del tiempo llega ya renderizado para la instantánea actual
     return render_template("contacto.html", 
                           emailjs_public_key=emailjs_public_key,
-                          weather_data=weather_data)
+                          weather_widget=weather_fragments.render(get_weather_snapshot()).html,
+                          service_areas=map_areas())
 
 @app.route("/api/weather/refresh", methods=["GET"])
 def refresh_weather():
     """API endpoint para actualizar los datos del tiempo bajo demanda"""
-    weather_data = get_weather_data()
-    if weather_data:
-        return jsonify({"success": True, "data": weather_data})
-    else:
+    snapshot = get_weather_snapshot()
+    if snapshot is None:
         return jsonify({"success": False, "error": "No se pudieron obtener los datos del tiempo"}), 500
+    page = weather_responses.get(snapshot_version(snapshot),
+                                 lambda: json_body({"success": True, "data": snapshot["data"]}))
+    # Navegadores y CDN pueden reutilizarla mientras la instantánea siga fresca
+    fresh_for = weather_cache_ttl - (time.time() - snapshot["fetched_at"])
+    return page_cache.serve(page, content_type="application/json", max_age=max(0, int(fresh_for)))
+
+@app.route("/api/weather/fragment", methods=["GET"])
+def weather_fragment():
+    """Widget del tiempo de contacto en HTML, para sustituirlo entero al actualizar"""
+    fragment = weather_fragments.render(get_weather_snapshot())
+    # Sin datos se devuelve el bloque de error con 503: la página conserva el que tiene
+    status = 503 if fragment.version == "none" else 200
+    if status == 200 and request.if_none_match.contains(fragment.version):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(fragment.body, status=status, mimetype="text/html")
+    response.set_etag(fragment.version)
+    response.cache_control.no_cache = True
+    return response
+
+@app.route("/api/weather/stream", methods=["GET"])
+def weather_stream_events():
+    """Server-Sent Events con la instantánea del tiempo cada vez que cambia"""
+    if not weather_stream.enabled:
+        return jsonify({"success": False, "error": "Actualizaciones en directo desactivadas"}), 404
+    try:
+        events = weather_stream.open(request.headers.get("Last-Event-ID"))
+    except StreamFull:
+        response = jsonify({"success": False, "error": "Demasiadas conexiones abiertas"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+    response = Response(events, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # nginx no debe acumular los eventos en su búfer
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+@app.route("/api/weather/areas", methods=["GET"])
+def weather_areas():
+    """API con la previsión y el estado de vuelo de todas las zonas de servicio"""
+    # ?areas=marbella,nerja limita la respuesta a esas zonas
+    slugs = request.args.get("areas")
+    slugs = set(slugs.split(",")) if slugs else None
+    areas = area_weather.get_all(slugs)
+    return jsonify({"success": True, "areas": areas})
+
+@app.route("/api/weather/windows", methods=["GET"])
+def weather_windows():
+    """API con las mejores ventanas de vuelo de N horas en las próximas 48h"""
+    # ?hours=2 (obligatorio, admite varias: 1,2,4), ?areas=marbella,nerja y ?limit=3
+    try:
+        durations = [int(h) for h in request.args.get("hours", "").split(",") if h]
+        limit = int(request.args.get("limit", 3))
+    except ValueError:
+        return jsonify({"success": False, "error": "Los parámetros hours y limit deben ser enteros"}), 400
+    if not durations or any(h < 1 or h > 48 for h in durations) or not 1 <= limit <= 10:
+        return jsonify({"success": False, "error": "Indica hours entre 1 y 48 (y limit entre 1 y 10)"}), 400
+
+    slugs = request.args.get("areas")
+    if slugs:
+        forecasts = area_weather.get_forecasts(set(slugs.split(",")))
+    else:
+        forecasts = [({"slug": "malaga", "name": "Málaga"}, get_weather_data())]
+
+    now = time.time()
+    areas = []
+    for area, forecast in forecasts:
+        hourly = forecast.get('hourly') if forecast else None
+        areas.append({
+            "slug": area["slug"],
+            "name": area["name"],
+            "available": bool(hourly),
+            "plans": plan_flight_windows(hourly, durations, limit, now) if hourly else [],
+        })
+    return jsonify({"success": True, "areas": areas})
+
+@app.route("/api/weather/history", methods=["GET"])
+def weather_history_summary():
+    """API con el histórico de una zona: días volables por mes, viento por día de la semana y error de la previsión"""
+    if not weather_history.enabled:
+        return jsonify({"success": False, "error": "Histórico desactivado"}), 404
+    # ?area=marbella (Málaga por defecto), ?days=365 para limitar el periodo y ?min_hours=4
+    # (horas de luz volables para que un día cuente como volable)
+    area = request.args.get("area", "malaga")
+    if area != "malaga" and get_area(area) is None:
+        return jsonify({"success": False, "error": "Zona desconocida"}), 404
+    try:
+        days = int(request.args["days"]) if request.args.get("days") else None
+        min_hours = int(request.args.get("min_hours", 4))
+    except ValueError:
+        return jsonify({"success": False, "error": "Los parámetros days y min_hours deben ser enteros"}), 400
+    if (days is not None and days < 1) or not 1 <= min_hours <= 12:
+        return jsonify({"success": False, "error": "Indica days mayor que 0 y min_hours entre 1 y 12"}), 400
+
+    start = time.perf_counter()
+    summary = weather_history.summary(area, days=days, min_hours=min_hours)
+    server_timing("history", time.perf_counter() - start, "Agregados del histórico")
+    return jsonify({"success": True, **summary})
+
+@app.route("/api/weather/health", methods=["GET"])
+def weather_health():
+    """Estado del refresco del tiempo para monitorización (503 si los datos están caducados)"""
+    health = weather_scheduler.health()
+    return jsonify(health), 503 if health["stale"] else 200
+
+@app.route("/api/cobertura", methods=["GET", "POST"])
+def cobertura():
+    """API con la zona que cubre unas coordenadas, el recargo por desplazamiento y el precio base"""
+    # GET ?lat=36.51&lon=-4.88 para un punto; POST {"puntos": [[lat, lon], ...]} para varios a la vez.
+    # ?servicio=bodas (o "servicio" en el JSON) limita el precio base a ese servicio
+    payload = (request.get_json(silent=True) or {}) if request.method == "POST" else {}
+    if not isinstance(payload, dict):
+        return jsonify({"success": False, "error": "Envía un objeto JSON"}), 400
+    servicio = payload.get("servicio") or request.args.get("servicio")
+    services = None
+    if servicio:
+        service = get_service(servicio)
+        if service is None:
+            return jsonify({"success": False, "error": "Servicio desconocido"}), 400
+        services = [service]
+
+    try:
+        if request.method == "POST":
+            points = [(float(lat), float(lon)) for lat, lon in payload.get("puntos") or []]
+        else:
+            points = [(float(request.args["lat"]), float(request.args["lon"]))]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"success": False, "error": "Indica lat y lon (o puntos como [[lat, lon], ...])"}), 400
+    if not 1 <= len(points) <= cobertura_max_points:
+        return jsonify({"success": False, "error": f"Indica entre 1 y {cobertura_max_points} puntos"}), 400
+    if any(not (-90 <= lat <= 90 and -180 <= lon <= 180) for lat, lon in points):
+        return jsonify({"success": False, "error": "Coordenadas fuera de rango"}), 400
+
+    results = [coverage(lat, lon, services, travel_rate=cobertura_travel_rate) for lat, lon in points]
+    return jsonify({"success": True, "cobertura": results if request.method == "POST" else results[0]})
+
+@lru_cache(maxsize=1)
+def coverage_map():
+    # Se genera (y comprime) en la primera petición: no retrasa el arranque
+    return CachedPage(json.dumps(coverage_geojson(), ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+@app.route("/api/cobertura/mapa", methods=["GET"])
+def cobertura_mapa():
+    """Zonas de servicio y sus círculos de cobertura en GeoJSON, comprimido y con ETag"""
+    return page_cache.serve(coverage_map(), content_type="application/geo+json", max_age=3600)
+
+@app.route("/media/<path:filename>", methods=["GET"])
+def stream_video(filename):
+    """Vídeos del sitio con soporte de peticiones Range (206)"""
+    return video_library.stream(filename)
+
+@app.route("/api/videos", methods=["GET"])
+def videos_index():
+    """Índice de vídeos: tamaño, duración, resolución, póster y versión móvil"""
+    return jsonify({"success": True, "videos": video_library.catalog()})
 
 @app.route("/emailjs-setup")
 def emailjs_setup():
-    return render_template("emailjs-setup.html", emailjs_public_key=emailjs_public_key)
+    return page_cache.render("emailjs-setup.html", emailjs_public_key=emailjs_public_key)
 
 # Rutas para las páginas detalladas de equipamiento
 @app.route("/equipamiento/drones")
 def equipamiento_drones():
-    return render_template("equipamiento/drones.html", emailjs_public_key=emailjs_public_key)
+    return page_cache.render("equipamiento/drones.html", emailjs_public_key=emailjs_public_key)
 
 @app.route("/equipamiento/camaras")
 def equipamiento_camaras():
-    return render_template("equipamiento/camaras.html", emailjs_public_key=emailjs_public_key)
+    return page_cache.render("equipamiento/camaras.html", emailjs_public_key=emailjs_public_key)
 
 @app.route("/equipamiento/baterias")
 def equipamiento_baterias():
-    return render_template("equipamiento/baterias.html", emailjs_public_key=emailjs_public_key)
+    return page_cache.render("equipamiento/baterias.html", emailjs_public_key=emailjs_public_key)
 
 @app.route("/equipamiento/software")
 def equipamiento_software():
-    return render_template("equipamiento/software.html", emailjs_public_key=emailjs_public_key)
+    return page_cache.render("equipamiento/software.html", emailjs_public_key=emailjs_public_key)
 
-# API simplificada para testimonios (sin base de datos)
 @app.route("/api/testimonios", methods=["GET"])
 def get_testimonios():
-    """API para obtener testimonios estáticos"""
-    # Testimonios estáticos predefinidos
-    testimonios_estaticos = [
-        {
-            "id": 1,
-            "nombre": "Carlos Mendoza",
-            "ocupacion": "Director de Eventos",
-            "texto": "Increíble trabajo de Freire FPV. Las tomas aéreas de nuestro evento corporativo fueron espectaculares.",
-            "fecha_creacion": "2024-01-15"
-        },
-        {
-            "id": 2,
-            "nombre": "Ana García",
-            "ocupacion": "Organizadora de Bodas",
-            "texto": "Profesionalismo y calidad excepcional. Recomiendo totalmente sus servicios para cualquier celebración.",
-            "fecha_creacion": "2024-01-10"
-        },
-        {
-            "id": 3,
-            "nombre": "Miguel Torres",
-            "ocupacion": "Arquitecto",
-            "texto": "Las grabaciones de nuestros proyectos inmobiliarios han sido fundamentales para nuestras presentaciones.",
-            "fecha_creacion": "2024-01-05"
-        }
-    ]
-    return jsonify({
-        "success": True,
-        "testimonios": testimonios_estaticos
-    })
+    """Testimonios aprobados, del más reciente al más antiguo, paginados por cursor"""
+    try:
+        limit = request.args.get("limit", type=int)
+        page = testimonial_store.page(cursor=request.args.get("cursor"), limit=limit)
+    except TestimonialError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return page_cache.serve(page.encoded, content_type="application/json", max_age=testimonios_max_age)
 
 @app.route("/api/testimonios", methods=["POST"])
+@rate_limiter.limit("testimonios-post", [("ip", client_ip, testimonio_post_limit)])
 def add_testimonio():
-    """API simulada para añadir testimonios (sin persistencia)"""
+    """Guarda un testimonio y devuelve el token con el que su autor puede borrarlo"""
+    try:
+        testimonio, token = testimonial_store.create(request.get_json(silent=True) or {},
+                                                     ip_address=request.remote_addr)
+    except TestimonialError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     return jsonify({
         "success": True,
-        "mensaje": "Gracias por tu testimonio. Será revisado y publicado pronto."
-    })
+        "testimonio": testimonio.to_dict(),
+        "token": token,
+        "mensaje": "Gracias por tu testimonio."
+    }), 201
 
 @app.route("/api/testimonios/<token>", methods=["DELETE"])
+@rate_limiter.limit("testimonios-delete", [("ip", client_ip, testimonio_delete_limit),
+                                          ("token", lambda token: token, testimonio_token_limit)])
 def delete_testimonio(token):
-    """API simulada para eliminar testimonios"""
+    """Elimina un testimonio a partir del token que se entregó a su autor"""
+    if not testimonial_store.delete(token):
+        return jsonify({"success": False, "error": "Testimonio no encontrado"}), 404
     return jsonify({
         "success": True,
         "mensaje": "Testimonio eliminado correctamente"
     })
 
+@app.route("/api/pedidos", methods=["POST"])
+@rate_limiter.limit("pedidos", [("ip", client_ip, pedido_limit)])
+def crear_pedido():
+    """Registra un pedido de servicio; se guarda en segundo plano junto con otros"""
+    try:
+        order_writer.submit(validate_order(request.get_json(silent=True) or {}))
+    except OrderError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except OrderQueueFull:
+        response = jsonify({"success": False, "error": "Estamos recibiendo muchos pedidos, inténtalo en unos segundos"})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+    except Exception as e:
+        logging.error(f"Error al guardar el pedido: {e}")
+        return jsonify({"success": False, "error": "No se pudo registrar el pedido"}), 503
+    return jsonify({"success": True, "mensaje": "Pedido recibido"}), 202
+
+@app.route("/api/contacto", methods=["POST"])
+@rate_limiter.limit("contacto", [("ip", client_ip, contacto_limit)])
+def crear_contacto():
+    """Guarda un mensaje de contacto y encola los avisos por correo (sin esperar al envío)"""
+    try:
+        contacto = Contacto(**validate_contact(request.get_json(silent=True) or {}))
+    except NotificationError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    db.session.add(contacto)
+    notifications.enqueue_contacto(contacto)
+    db.session.commit()
+    notifications.notify()
+    return jsonify({"success": True, "mensaje": "Mensaje recibido"}), 202
+
+@app.route("/api/notificaciones/health", methods=["GET"])
+def notifications_health():
+    """Trabajos de correo pendientes y descartados, para monitorización"""
+    return jsonify(notifications.health())
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Métricas de todos los workers en formato Prometheus"""
+    if not instrumentation.enabled:
+        return jsonify({"success": False, "error": "Métricas desactivadas"}), 404
+    if metrics_token and request.headers.get("Authorization") != f"Bearer {metrics_token}":
+        return jsonify({"success": False, "error": "No autorizado"}), 401
+    response = Response(instrumentation.render(), mimetype="text/plain")
+    response.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    response.cache_control.no_store = True
+    return response
+
 # Para Vercel, no necesitamos app.run() aquí
 # La aplicación se exporta directamente
 if __name__ == "__main__":
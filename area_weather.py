@@ -0,0 +1,67 @@
+"""Previsión del tiempo para todas las zonas de servicio en una sola petición.
+
+Cada zona tiene su propia ``WeatherCache`` (mismo TTL y single-flight entre
+workers que la de Málaga). Las zonas sin datos frescos se consultan en paralelo
+con un pool de hilos acotado, así que la latencia de ``/api/weather/areas`` es
+la de la zona más lenta y no la suma de todas.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from weather_cache import WeatherCache
+
+
+class AreaWeather:
+    """Caché y consulta concurrente de la previsión por zona."""
+
+    def __init__(self, areas, fetch_forecast, cache_dir, ttl=600, stale_ttl=3600,
+                 max_workers=6, history=None):
+        self.areas = areas
+        self.caches = {
+            area['slug']: WeatherCache(
+                os.path.join(cache_dir, f"freirefpv-weather-{area['slug']}.json"),
+                lambda area=area: fetch_forecast(area['lat'], area['lon']),
+                ttl=ttl, stale_ttl=stale_ttl, name='area-weather',
+                on_fetch=history.recorder(area['slug']) if history else None)
+            for area in areas
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="area-weather")
+
+    def get_forecasts(self, slugs=None):
+        """Pares ``(zona, previsión)`` de las zonas pedidas (todas por defecto), en orden de registro."""
+        areas = [area for area in self.areas if slugs is None or area['slug'] in slugs]
+        forecasts = self._executor.map(lambda area: self.caches[area['slug']].get(), areas)
+        return list(zip(areas, forecasts))
+
+    def get_all(self, slugs=None):
+        """Resumen con el estado de vuelo de las zonas pedidas."""
+        return [summarize_area(area, forecast) for area, forecast in self.get_forecasts(slugs)]
+
+
+def summarize_area(area, forecast):
+    """Une los datos de la zona con su previsión y el estado de vuelo actual y por día."""
+    summary = {
+        'slug': area['slug'],
+        'name': area['name'],
+        'lat': area['lat'],
+        'lon': area['lon'],
+        'description': area['description'],
+        'distance': area['distance'],
+        'available': forecast is not None,
+    }
+    if forecast is None:
+        return summary
+
+    current = forecast['current']
+    summary['current'] = current
+    summary['flight_status'] = current['flight_status']
+    summary['status_text'] = current['status_text']
+    summary['daily'] = [
+        {key: day[key] for key in ('date', 'day_name', 'temp', 'wind', 'rain_amount',
+                                   'icon', 'flight_status', 'status_text')}
+        for day in forecast['daily']
+    ]
+    summary['flyable_days'] = sum(
+        1 for day in forecast['daily'] if day['flight_status'] in ('optimal', 'possible'))
+    return summary
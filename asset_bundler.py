@@ -0,0 +1,403 @@
+"""Empaquetado y minificado de JS/CSS por página.
+
+Concatena los ficheros de cada página en un único bundle, elimina comentarios,
+espacios sobrantes y las llamadas de depuración ``console.log``, y guarda las
+versiones gzip y brotli junto al fichero. Los bundles se escriben en
+``static/dist/`` con un ``bundles.json`` que registra el hash de cada fuente:
+al arrancar, un bundle cuyas fuentes han cambiado se descarta y la página vuelve
+a cargar los ficheros sueltos, así que nunca se sirve código desactualizado.
+
+Uso (antes de desplegar, y tras editar cualquier JS/CSS):
+    python asset_bundler.py
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+
+from static_assets import MANIFEST_PATH, file_hash, write_manifest
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se genera .gz
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = 'dist'
+BUNDLES_FILE = 'bundles.json'
+
+_LAYOUT_JS = [
+    'js/emailjs-check.js',
+    'js/script.js',
+    'js/video-optimizer.js',
+    'js/button-animation.js',
+    'js/propeller-animation.js',
+]
+
+# Un CSS y un JS por página: los de layout.html más los propios de la página
+BUNDLES = {
+    'layout.css': ['css/styles.css'],
+    'layout.js': _LAYOUT_JS,
+    'index.js': _LAYOUT_JS + ['js/carousel-optimizer.js'],
+    'intro.js': ['js/video-optimizer.js'],
+    'quienes-somos.css': ['css/styles.css', 'css/testimonials.css'],
+    'quienes-somos.js': _LAYOUT_JS + ['js/testimonials.js'],
+    'contacto.css': ['css/styles.css', 'css/weather.css', 'css/wind-compass.css'],
+}
+
+# Llamadas de depuración que se eliminan del JS
+DEBUG_CALLS = ('console.log(', 'console.debug(')
+
+_IDENT_CHARS = re.compile(r'[\w$]')
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete', 'throw')
+
+
+# Minificado JS ----------------------------------------------------------------
+
+def minify_js(source):
+    """Minificado conservador: sin comentarios ni ``console.log`` y espacios compactados.
+
+    Se respetan cadenas, plantillas ``${...}`` y expresiones regulares, y se
+    conservan los saltos de línea para no alterar la inserción automática de ``;``.
+    """
+    out = []
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if c in '\'"`':
+            end = _skip_string(source, i)
+            out.append(source[i:end])
+            i = end
+        elif source.startswith('//', i):
+            i = source.find('\n', i)
+            i = n if i == -1 else i
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            _append_space(out, '\n' in source[i:end])
+            i = end
+        elif c == '/' and _regex_allowed(out):
+            end = _skip_regex(source, i)
+            out.append(source[i:end])
+            i = end
+        elif c.isspace():
+            end = i
+            while end < n and source[end].isspace():
+                end += 1
+            _append_space(out, '\n' in source[i:end])
+            i = end
+        elif source.startswith(DEBUG_CALLS, i) and not _ident_before(out):
+            i = _strip_debug_call(source, i, out)
+        else:
+            out.append(c)
+            i += 1
+    return _tidy_lines(''.join(out))
+
+
+def _append_space(out, newline):
+    """Añade un único separador; un salto de línea prevalece sobre un espacio."""
+    if out and out[-1].isspace():
+        if newline:
+            out[-1] = '\n'
+        return
+    out.append('\n' if newline else ' ')
+
+
+def _skip_string(source, i):
+    """Devuelve el índice tras la cadena que empieza en ``i`` (incluye plantillas anidadas)."""
+    quote = source[i]
+    i += 1
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if quote == '`' and source.startswith('${', i):
+            i = _skip_braces(source, i + 1)
+            continue
+        i += 1
+    return n
+
+
+def _skip_braces(source, i):
+    """Salta un bloque ``{...}`` equilibrado (dentro de una plantilla) desde ``i``."""
+    depth = 0
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c in '\'"`':
+            i = _skip_string(source, i)
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return n
+
+
+def _skip_regex(source, i):
+    in_class = False
+    i += 1
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n':
+            return i
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            i += 1
+            while i < n and _IDENT_CHARS.match(source[i]):
+                i += 1
+            return i
+        i += 1
+    return n
+
+
+def _last_significant(out):
+    for chunk in reversed(out):
+        if not chunk.isspace():
+            return chunk
+    return ''
+
+
+def _regex_allowed(out):
+    """Un ``/`` abre una regex si lo anterior no puede terminar una expresión."""
+    tail = ''.join(out[-16:]).rstrip()
+    if not tail:
+        return True
+    word = re.search(r'[\w$]+$', tail)
+    if word:
+        return word.group() in _REGEX_KEYWORDS
+    return tail[-1] in _REGEX_PRECEDERS
+
+
+def _ident_before(out):
+    """Evita tocar ``miconsole.log(`` u ``obj.console.log(``."""
+    return bool(out) and (_IDENT_CHARS.match(out[-1]) is not None or out[-1] == '.')
+
+
+def _strip_debug_call(source, i, out):
+    """Elimina una llamada ``console.log(...)`` y devuelve el índice siguiente.
+
+    Si la llamada es una sentencia completa desaparece; si forma parte de una
+    expresión (``x => console.log(x)``) se sustituye por ``void 0``.
+    """
+    i = source.index('(', i)
+    depth = 0
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c in '\'"`':
+            i = _skip_string(source, i)
+            continue
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth == 0:
+                i += 1
+                break
+        i += 1
+
+    last = _last_significant(out)
+    if (not last or last[-1] in '{};') and source[i:i + 1] == ';':
+        return i + 1
+    out.append('void 0')
+    return i
+
+
+def _tidy_lines(text):
+    lines = (line.strip() for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line and line != ';') + '\n'
+
+
+# Minificado CSS ---------------------------------------------------------------
+
+def minify_css(source):
+    """Elimina comentarios y espacios innecesarios sin tocar el contenido de las cadenas."""
+    chunks = []
+    current = []
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if c in '\'"':
+            end = _skip_string(source, i)
+            chunks.append(_compact_css(''.join(current)))
+            chunks.append(source[i:end])
+            current = []
+            i = end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        else:
+            current.append(c)
+            i += 1
+    chunks.append(_compact_css(''.join(current)))
+    return ''.join(chunks).strip() + '\n'
+
+
+def _compact_css(text):
+    text = re.sub(r'\s+', ' ', text)
+    # Espacios alrededor de separadores (no el de antes de ':' por los selectores)
+    text = re.sub(r' ?([{};,>]) ?', r'\1', text)
+    text = re.sub(r': ', ':', text)
+    return text.replace(';}', '}')
+
+
+# Construcción -----------------------------------------------------------------
+
+def build_bundle(static_folder, sources):
+    parts = []
+    for source in sources:
+        with open(os.path.join(static_folder, source), 'r', encoding='utf-8') as fh:
+            text = fh.read()
+        if source.endswith('.js'):
+            # El ';' evita que un fichero sin punto y coma final se una con el siguiente
+            parts.append(minify_js(text).rstrip() + '\n;')
+        else:
+            parts.append(minify_css(text))
+    return '\n'.join(parts).encode('utf-8')
+
+
+def compress_variants(body):
+    variants = {'.gz': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(body, quality=11)
+    return variants
+
+
+def build_all(static_folder, bundles=BUNDLES):
+    """Genera todos los bundles en ``static/dist`` y devuelve el informe de tamaños."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+
+    index = {}
+    report = []
+    for name, sources in bundles.items():
+        body = build_bundle(static_folder, sources)
+        path = os.path.join(dist, name)
+        with open(path, 'wb') as fh:
+            fh.write(body)
+        compressed = compress_variants(body)
+        for suffix, data in compressed.items():
+            with open(path + suffix, 'wb') as fh:
+                fh.write(data)
+
+        before = [_read(os.path.join(static_folder, source)) for source in sources]
+        report.append({
+            'bundle': name,
+            'requests_before': len(sources),
+            'requests_after': 1,
+            'raw_before': sum(len(b) for b in before),
+            'raw_after': len(body),
+            'gzip_before': sum(len(gzip.compress(b, mtime=0)) for b in before),
+            'gzip_after': len(compressed['.gz']),
+            'br_after': len(compressed['.br']) if '.br' in compressed else None,
+        })
+        index[name] = {'sources': {source: file_hash(os.path.join(static_folder, source))
+                                   for source in sources}}
+
+    with open(os.path.join(dist, BUNDLES_FILE), 'w', encoding='utf-8') as fh:
+        json.dump(index, fh, indent=2)
+    return report
+
+
+def _read(path):
+    with open(path, 'rb') as fh:
+        return fh.read()
+
+
+def print_report(report):
+    header = f"{'bundle':<20}{'peticiones':>12}{'bytes':>22}{'gzip':>20}{'brotli':>10}"
+    print(header)
+    print('-' * len(header))
+    totals = {key: 0 for key in ('raw_before', 'raw_after', 'gzip_before', 'gzip_after')}
+    for row in report:
+        print(f"{row['bundle']:<20}"
+              f"{row['requests_before']:>7} -> {row['requests_after']:<2}"
+              f"{row['raw_before']:>10} -> {row['raw_after']:<8}"
+              f"{row['gzip_before']:>8} -> {row['gzip_after']:<8}"
+              f"{row['br_after'] if row['br_after'] is not None else '-':>10}")
+        for key in totals:
+            totals[key] += row[key]
+    print('-' * len(header))
+    print(f"{'total':<20}{'':>12}"
+          f"{totals['raw_before']:>10} -> {totals['raw_after']:<8}"
+          f"{totals['gzip_before']:>8} -> {totals['gzip_after']:<8}")
+    saved = 1 - totals['gzip_after'] / totals['gzip_before']
+    print(f"Ahorro sobre gzip: {saved:.0%}")
+
+
+# Integración con Flask --------------------------------------------------------
+
+class AssetBundles:
+    """Expone ``bundle_urls(nombre)`` a las plantillas.
+
+    Devuelve la URL (con hash) del bundle si está construido y al día; si no,
+    las URLs de los ficheros sueltos en el mismo orden.
+    """
+
+    def __init__(self, app=None, static_assets=None):
+        self.static_assets = static_assets
+        self.valid = set()
+        if app is not None:
+            self.init_app(app, static_assets)
+
+    def init_app(self, app, static_assets):
+        self.app = app
+        self.static_assets = static_assets
+        self.reload()
+        app.jinja_env.globals['bundle_urls'] = self.bundle_urls
+
+    def reload(self):
+        self.valid = set()
+        index_path = os.path.join(self.app.static_folder, DIST_DIR, BUNDLES_FILE)
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, 'r', encoding='utf-8') as fh:
+            index = json.load(fh)
+        for name, entry in index.items():
+            if name not in BUNDLES:
+                continue
+            current = {source: file_hash(os.path.join(self.app.static_folder, source))
+                       for source in BUNDLES[name]}
+            if current == entry['sources']:
+                self.valid.add(name)
+            else:
+                logger.warning(f"Bundle {name} desactualizado: ejecuta python asset_bundler.py")
+
+    def bundle_urls(self, name):
+        if name in self.valid and not self.app.debug:
+            return [self.static_assets.asset_url(f"{DIST_DIR}/{name}")]
+        return [self.static_assets.asset_url(source) for source in BUNDLES[name]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera los bundles JS/CSS minificados")
+    parser.add_argument("--static", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
+    parser.add_argument("--manifest", default=MANIFEST_PATH,
+                        help="manifiesto de estáticos que se regenera con los bundles nuevos")
+    args = parser.parse_args()
+    print_report(build_all(args.static))
+    manifest = write_manifest(args.static, args.manifest)
+    print(f"Manifiesto de estáticos: {len(manifest)} ficheros en {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
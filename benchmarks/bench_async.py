@@ -0,0 +1,132 @@
+"""Compara los workers síncronos y los asíncronos (gevent) con OpenWeather lento.
+
+En cada modo arranca gunicorn con los mismos workers y lanza a la vez dos
+cargas durante ``--duration`` segundos:
+
+* ``--slow-clients`` clientes contra ``/api/weather/refresh`` con la caché del
+  tiempo caducando cada pocos segundos y sin margen stale, así que en cada
+  caducidad las peticiones tienen que esperar a un stub con ``--latency``
+  segundos.
+* ``--fast-clients`` clientes contra ``/inicio`` (página cacheada), que no
+  necesita la API pero compite por los mismos workers.
+
+Con workers síncronos las peticiones lentas ocupan todos los workers y las
+rápidas esperan en la cola; con gevent siguen atendiéndose. El informe muestra
+req/s, p50/p99 de cada carga y cuántas peticiones llegó a tener abiertas a la
+vez el servidor, y se guarda en JSON.
+
+Uso:
+    python benchmarks/bench_async.py --workers 2 --latency 1.0 --slow-clients 200
+"""
+import argparse
+import http.client
+import math
+import os
+import sys
+import threading
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import Server, drive, git_revision, save  # noqa: E402
+from openweather_stub import start_stub  # noqa: E402
+
+MODES = {'sync': 'sync', 'async': 'gevent'}
+
+
+def peak_open_requests(port, stop, interval=0.1):
+    """Máximo de conexiones establecidas con el servidor, leído de ``/proc/net/tcp`` (Linux).
+
+    No se pregunta al propio servidor porque con workers síncronos esa petición
+    también haría cola."""
+    peak = [0]
+    target = f"{port:04X}"
+
+    def sample():
+        while not stop.is_set():
+            count = 0
+            try:
+                with open('/proc/net/tcp') as fh:
+                    for line in fh.readlines()[1:]:
+                        fields = line.split()
+                        # Estado 01 = ESTABLISHED, lado servidor (puerto local = el de gunicorn)
+                        if fields[1].endswith(':' + target) and fields[3] == '01':
+                            count += 1
+            except OSError:
+                return
+            peak[0] = max(peak[0], count)
+            stop.wait(interval)
+
+    thread = threading.Thread(target=sample, daemon=True)
+    thread.start()
+    return peak, thread
+
+
+def run_mode(mode, args):
+    stub, stub_config = start_stub(latency=args.latency)
+    # El TTL cuenta desde que empieza la consulta: tiene que superar la latencia
+    weather_ttl = max(2, math.ceil(args.latency * 3))
+    server = Server(args.workers, 1, MODES[mode], f"http://127.0.0.1:{stub.server_port}",
+                    weather_ttl=weather_ttl, env={'WEATHER_CACHE_STALE_TTL': '0', 'SERVING_MODE': mode})
+    try:
+        server.start()
+        # Primera carga de la caché para que ambos modos empiecen igual
+        conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=60)
+        conn.request('GET', '/api/weather/refresh')
+        conn.getresponse().read()
+        conn.close()
+
+        calls = stub_config.calls
+        stop = threading.Event()
+        peak, sampler = peak_open_requests(server.port, stop)
+        results = {}
+
+        def load(name, path, clients):
+            results[name] = drive(server.port, path, clients, args.duration, timeout=args.timeout)
+
+        threads = [threading.Thread(target=load, args=('slow', '/api/weather/refresh', args.slow_clients)),
+                   threading.Thread(target=load, args=('fast', '/inicio', args.fast_clients))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stop.set()
+        sampler.join()
+    finally:
+        server.stop()
+        stub.shutdown()
+
+    report = {'upstream_calls': stub_config.calls - calls, 'peak_open_connections': peak[0], **results}
+    print(f"{mode:>5}: conexiones abiertas (máx.) {peak[0]}, llamadas a la API {report['upstream_calls']}")
+    for name in ('slow', 'fast'):
+        result = results[name]
+        print(f"       {name}  {result['rps']:>8} req/s  p50 {result['p50_ms']} ms  "
+              f"p99 {result['p99_ms']} ms  errores {result['errors']}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=1.0, help="latencia del stub en segundos")
+    parser.add_argument("--slow-clients", type=int, default=200)
+    parser.add_argument("--fast-clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--timeout", type=float, default=60, help="timeout de cada petición del cliente")
+    parser.add_argument("--modes", type=lambda s: s.split(','), default=list(MODES))
+    parser.add_argument("--output", help="fichero JSON (por defecto benchmarks/results/async-<fecha>.json)")
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, API con {args.latency}s de latencia, "
+          f"{args.slow_clients} clientes lentos y {args.fast_clients} rápidos")
+    report = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'config': vars(args),
+        'modes': {mode: run_mode(mode, args) for mode in args.modes},
+    }
+    save(report, args.output, 'async')
+
+
+if __name__ == "__main__":
+    main()
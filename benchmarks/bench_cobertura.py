@@ -0,0 +1,62 @@
+"""Micro-benchmark de la búsqueda de zona de ``/api/cobertura``.
+
+Compara la rejilla de ``service_areas.AreaIndex`` con recorrer todas las zonas,
+con las zonas reales y con registros sintéticos más grandes repartidos por
+Andalucía, y comprueba que ambas búsquedas devuelven la misma distancia.
+
+Uso:
+    python benchmarks/bench_cobertura.py --zones 10,100,1000,10000 --points 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from service_areas import SERVICE_AREAS, AreaIndex, haversine_km  # noqa: E402
+
+
+def brute_force(areas, lat, lon):
+    """Referencia O(n): distancia a todas las zonas."""
+    return min(((area, haversine_km(lat, lon, area['lat'], area['lon'])) for area in areas),
+               key=lambda pair: pair[1])
+
+
+def synthetic_areas(count, rng):
+    if count <= len(SERVICE_AREAS):
+        return SERVICE_AREAS[:count]
+    return [{'slug': f"zona-{i}", 'lat': rng.uniform(36.0, 38.5), 'lon': rng.uniform(-7.5, -1.6)}
+            for i in range(count)]
+
+
+def per_call_us(func, points):
+    start = time.perf_counter()
+    for lat, lon in points:
+        func(lat, lon)
+    return (time.perf_counter() - start) / len(points) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--zones", type=lambda s: [int(n) for n in s.split(',')], default=[10, 100, 1000, 10000])
+    parser.add_argument("--points", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    # Puntos en la provincia y alrededores, donde se piden los presupuestos
+    points = [(rng.uniform(36.2, 37.3), rng.uniform(-5.6, -3.8)) for _ in range(args.points)]
+    print(f"{'zonas':>8}{'rejilla':>12}{'todas':>12}")
+    for count in args.zones:
+        areas = synthetic_areas(count, rng)
+        index = AreaIndex(areas)
+        for lat, lon in points[:200]:
+            assert abs(index.nearest(lat, lon)[1] - brute_force(areas, lat, lon)[1]) < 1e-9
+        grid = per_call_us(index.nearest, points)
+        brute = per_call_us(lambda lat, lon: brute_force(areas, lat, lon), points[:max(50, 20000 // count)])
+        print(f"{count:>8}{grid:>10.1f}µs{brute:>10.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
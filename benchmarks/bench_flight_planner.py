@@ -0,0 +1,96 @@
+"""Micro-benchmark del planificador de ventanas de vuelo.
+
+Mide el coste de planificar todas las zonas de servicio para varias duraciones
+(lo que haría una petición a ``/api/weather/windows`` con todas las zonas) y lo
+compara con una búsqueda ingenua que recorre de nuevo cada ventana.
+
+Uso:
+    python benchmarks/bench_flight_planner.py --hours 48 --durations 1,2,3,4,6,8 --repeat 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flight_planner import find_windows, hour_score  # noqa: E402
+from forecast import build_forecast  # noqa: E402
+from openweather_stub import build_onecall  # noqa: E402
+from service_areas import SERVICE_AREAS  # noqa: E402
+
+
+def naive_windows(hourly, hours, limit=3):
+    """Referencia O(n·h): vuelve a recorrer cada ventana candidata."""
+    candidates = []
+    for start in range(len(hourly) - hours + 1):
+        window = hourly[start:start + hours]
+        scores = [hour_score(hour) for hour in window]
+        if any(score is None for score in scores):
+            continue
+        candidates.append((round(sum(scores) / hours, 6), start, max(h['wind'] for h in window),
+                           max(h['gust'] for h in window), sum(h['rain'] for h in window)))
+    candidates.sort(key=lambda c: (-c[0], c[1]))
+    selected = []
+    for candidate in candidates:
+        start = candidate[1]
+        if any(start < c[1] + hours and c[1] < start + hours for c in selected):
+            continue
+        selected.append(candidate)
+        if len(selected) >= limit:
+            break
+    return selected
+
+
+def extend_series(hourly, length):
+    """Repite la serie para simular horizontes más largos que 48h."""
+    series = []
+    while len(series) < length:
+        for hour in hourly:
+            series.append(dict(hour, dt=hour['dt'] + 3600 * len(series)))
+            if len(series) == length:
+                break
+    return series
+
+
+def bench(func, series_by_area, durations, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for hourly in series_by_area:
+            for hours in durations:
+                func(hourly, hours)
+    elapsed = time.perf_counter() - start
+    return elapsed / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark del planificador de ventanas")
+    parser.add_argument("--hours", type=int, default=48, help="longitud de la serie horaria")
+    parser.add_argument("--durations", default="1,2,3,4,6,8", help="duraciones a planificar")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    durations = [int(d) for d in args.durations.split(",")]
+    series_by_area = [
+        extend_series(build_forecast(build_onecall(area['lat'], area['lon']))['hourly'], args.hours)
+        for area in SERVICE_AREAS
+    ]
+
+    # Ambas implementaciones deben elegir las mismas ventanas
+    for hourly in series_by_area:
+        for hours in durations:
+            fast = [(w['start'], w['score']) for w in find_windows(hourly, hours)]
+            slow = [(hourly[c[1]]['dt'], round(c[0], 3)) for c in naive_windows(hourly, hours)]
+            assert fast == slow, (hours, fast, slow)
+
+    plans = len(series_by_area) * len(durations)
+    sliding = bench(find_windows, series_by_area, durations, args.repeat)
+    naive = bench(naive_windows, series_by_area, durations, args.repeat)
+    print(f"{len(series_by_area)} zonas x {len(durations)} duraciones, serie de {args.hours}h")
+    print(f"  ventana deslizante: {sliding * 1000:8.3f} ms/petición  ({sliding / plans * 1e6:7.1f} µs/plan)")
+    print(f"  recorrido ingenuo:  {naive * 1000:8.3f} ms/petición  ({naive / plans * 1e6:7.1f} µs/plan)")
+    print(f"  aceleración: x{naive / sliding:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Benchmark de arranque en frío: del intérprete nuevo a la primera respuesta.
+
+Cada ejecución lanza un ``python`` nuevo que importa ``app`` y atiende una
+primera petición con el cliente de pruebas de Flask, como una instancia nueva
+de Vercel. Se mide desde que el proceso se lanza (incluye arrancar el
+intérprete) hasta que la respuesta está lista, y por separado cuánto tarda el
+``import app`` y cuánto la primera petición. Se comparan las variantes:
+
+* ``base``: como antes de optimizar el arranque (sin bytecode de plantillas).
+* ``serverless``: ``SERVERLESS=1`` con las plantillas precompiladas y el
+  manifiesto de estáticos que se sube con el código (como en ``vercel.json``).
+* ``serverless-no-manifest``: igual, pero calculando el manifiesto al arrancar.
+
+Sin manifiesto el arranque lee y hashea todo ``static/``. En un checkout con
+los vídeos como punteros de Git LFS eso apenas cuesta, así que además se mide
+la velocidad de SHA-256 y se estima lo que costaría con el tamaño real de los
+ficheros desplegados (el que indican los punteros).
+
+Cada medición se añade a ``benchmarks/results/startup-history.jsonl`` con la
+revisión de git, y se muestra la diferencia con la anterior para ver cómo
+evoluciona el arranque entre commits.
+
+Uso:
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --route /contacto --profile-imports
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from load_test import git_revision  # noqa: E402
+from openweather_stub import start_stub  # noqa: E402
+
+HISTORY = os.path.join(ROOT, 'benchmarks', 'results', 'startup-history.jsonl')
+
+VARIANTS = {
+    'base': {'SERVERLESS': '0', 'TEMPLATE_CACHE': '0', 'LOG_LEVEL': 'DEBUG', 'STATIC_MANIFEST': ''},
+    'serverless': {'SERVERLESS': '1', 'TEMPLATE_CACHE': '1', 'STATIC_MANIFEST': 'static-manifest.json'},
+    'serverless-no-manifest': {'SERVERLESS': '1', 'TEMPLATE_CACHE': '1', 'STATIC_MANIFEST': ''},
+}
+
+# Se ejecuta en el proceso hijo: time.time() es comparable entre procesos
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+response = module.app.test_client().get(sys.argv[1])
+done = time.perf_counter()
+print(json.dumps({'import': imported - start, 'first_request': done - imported,
+                  'status': response.status_code, 'finished_at': time.time()}))
+"""
+
+
+def environment(workdir, stub_url, variant):
+    return dict(
+        os.environ,
+        OPENWEATHER_BASE_URL=stub_url,
+        WEATHER_CACHE_PATH=os.path.join(workdir, 'weather.json'),
+        DATABASE_URL='sqlite:///' + os.path.join(workdir, 'startup.db'),
+        TESTIMONIOS_VERSION_PATH=os.path.join(workdir, 'testimonios.version'),
+        METRICS_DIR=os.path.join(workdir, 'metrics'),
+        **VARIANTS[variant])
+
+
+def measure(route, env):
+    started = time.time()
+    output = subprocess.run([sys.executable, '-c', CHILD, route], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['total'] = result.pop('finished_at') - started
+    return result
+
+
+def run_variant(variant, route, runs, stub_url):
+    workdir = tempfile.mkdtemp(prefix='freirefpv-startup-')
+    try:
+        env = environment(workdir, stub_url, variant)
+        # Como al desplegar: la base de datos ya existe antes del primer arranque
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'], cwd=ROOT, env=env,
+                       capture_output=True, check=True)
+        samples = [measure(route, env) for _ in range(runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    statuses = sorted({s['status'] for s in samples})
+    return {
+        'runs': runs,
+        'status': statuses,
+        **{f'{key}_ms': round(statistics.median(s[key] for s in samples) * 1000, 1)
+           for key in ('total', 'import', 'first_request')},
+        'total_max_ms': round(max(s['total'] for s in samples) * 1000, 1),
+    }
+
+
+def profile_imports(route, stub_url, limit=15):
+    """Módulos que más tardan en importarse (``python -X importtime``), acumulado."""
+    workdir = tempfile.mkdtemp(prefix='freirefpv-startup-')
+    try:
+        env = environment(workdir, stub_url, 'serverless')
+        stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD, route], cwd=ROOT,
+                                env=env, capture_output=True, text=True).stderr
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        # Solo módulos de primer nivel: los submódulos ya cuentan en su paquete
+        if '.' not in name:
+            rows.append((int(cumulative), name))
+    print("Importaciones más lentas (acumulado, variante serverless):")
+    for cumulative, name in sorted(rows, reverse=True)[:limit]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+def static_sizes(static_folder=os.path.join(ROOT, 'static')):
+    """``(bytes en disco, bytes desplegados)`` de ``static/``; los punteros LFS cuentan con su tamaño real."""
+    on_disk = deployed = 0
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            path = os.path.join(root, name)
+            size = os.path.getsize(path)
+            on_disk += size
+            if size < 1024:
+                with open(path, 'rb') as fh:
+                    head = fh.read()
+                if head.startswith(b'version https://git-lfs.github.com/spec/'):
+                    size = int(head.split(b'size ')[1].split()[0])
+            deployed += size
+    return on_disk, deployed
+
+
+def manifest_cost(hash_mb=64):
+    """Lo que tarda ``build_manifest`` aquí y lo que tardaría con el tamaño desplegado."""
+    from static_assets import build_manifest
+
+    start = time.perf_counter()
+    build_manifest(os.path.join(ROOT, 'static'))
+    here = time.perf_counter() - start
+    data = os.urandom(1 << 20)
+    start = time.perf_counter()
+    digest = hashlib.sha256()
+    for _ in range(hash_mb):
+        digest.update(data)
+    mb_per_s = hash_mb / (time.perf_counter() - start)
+    on_disk, deployed = static_sizes()
+    return {'here_ms': round(here * 1000, 1), 'on_disk_mb': round(on_disk / 2**20, 1),
+            'deployed_mb': round(deployed / 2**20, 1), 'sha256_mb_s': round(mb_per_s),
+            'deployed_estimate_ms': round(deployed / 2**20 / mb_per_s * 1000)}
+
+
+def previous_entry(route):
+    if not os.path.exists(HISTORY):
+        return None
+    entry = None
+    with open(HISTORY, encoding='utf-8') as fh:
+        for line in fh:
+            record = json.loads(line)
+            if record.get('route') == route:
+                entry = record
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="arranques por variante")
+    parser.add_argument("--route", default="/inicio", help="ruta de la primera petición")
+    parser.add_argument("--variants", type=lambda s: s.split(','), default=list(VARIANTS),
+                        help=f"separadas por comas, de {', '.join(VARIANTS)}")
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="muestra también los módulos que más tardan en importarse")
+    parser.add_argument("--no-history", action="store_true", help="no guarda la medición")
+    args = parser.parse_args()
+
+    stub, _ = start_stub()
+    stub_url = f"http://127.0.0.1:{stub.server_port}"
+    try:
+        results = {}
+        for variant in args.variants:
+            results[variant] = run_variant(variant, args.route, args.runs, stub_url)
+        if args.profile_imports:
+            profile_imports(args.route, stub_url)
+    finally:
+        stub.shutdown()
+
+    previous = previous_entry(args.route)
+    print(f"Arranque en frío hasta la primera respuesta de {args.route} (mediana de {args.runs}):")
+    print(f"  {'variante':<24}{'total':>10}{'import':>10}{'1ª petición':>13}{'máx':>10}  vs anterior")
+    for variant, result in results.items():
+        before = (previous or {}).get('variants', {}).get(variant)
+        delta = f"{result['total_ms'] - before['total_ms']:+.1f} ms" if before else "-"
+        print(f"  {variant:<24}{result['total_ms']:>8.1f}ms{result['import_ms']:>8.1f}ms"
+              f"{result['first_request_ms']:>11.1f}ms{result['total_max_ms']:>8.1f}ms  {delta}")
+        if result['status'] != [200]:
+            print(f"    códigos de estado: {result['status']}")
+
+    cost = manifest_cost()
+    print(f"Manifiesto calculado al arrancar: {cost['here_ms']} ms con {cost['on_disk_mb']} MB de static/ aquí; "
+          f"con los {cost['deployed_mb']} MB desplegados (SHA-256 a {cost['sha256_mb_s']} MB/s) "
+          f"serían unos {cost['deployed_estimate_ms']} ms más por arranque en frío")
+
+    if not args.no_history:
+        entry = {'date': datetime.now().isoformat(timespec='seconds'), 'revision': git_revision(),
+                 'python': sys.version.split()[0], 'route': args.route, 'variants': results,
+                 'manifest': cost}
+        os.makedirs(os.path.dirname(HISTORY), exist_ok=True)
+        with open(HISTORY, 'a', encoding='utf-8') as fh:
+            fh.write(json.dumps(entry) + '\n')
+        print(f"Medición añadida a {HISTORY}")
+
+
+if __name__ == "__main__":
+    main()
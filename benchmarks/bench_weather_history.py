@@ -0,0 +1,102 @@
+"""Micro-benchmark del histórico de condiciones de vuelo.
+
+Llena un archivo temporal con ``--years`` años de datos horarios sintéticos
+para ``--areas`` zonas (observación y previsión a 24 h en cada hora), y mide
+lo que cuesta archivar una previsión y lo que tarda ``/api/weather/history``
+en calcular sus agregados sobre todo el periodo y sobre los últimos 30 días.
+
+Uso:
+    python benchmarks/bench_weather_history.py --years 2 --areas 11
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast import classify_flight_conditions  # noqa: E402
+from weather_history import WeatherHistory  # noqa: E402
+
+
+def conditions(slug, hour):
+    """Viento y lluvia "reales" de una hora, siempre los mismos para esa zona y hora."""
+    rng = random.Random(f"{slug}:{hour}")
+    return abs(rng.gauss(14, 8)), max(0.0, rng.gauss(-0.5, 1.0))
+
+
+def synthetic_forecast(rng, slug, fetched_at, lead):
+    """Lo mínimo de ``build_forecast`` que usa el histórico; la previsión es la realidad con ruido."""
+    hour = int(fetched_at // 3600)
+    wind, rain = conditions(slug, hour)
+    fc_wind, fc_rain = conditions(slug, hour + lead)
+    fc_wind, fc_rain = max(0.0, fc_wind + rng.gauss(0, 3)), max(0.0, fc_rain + rng.gauss(0, 0.3))
+    return {
+        'current': {'temp': rng.uniform(8, 32), 'wind': round(wind), 'rain_amount': round(rain, 2),
+                    'humidity': rng.randint(40, 95), 'uvi': rng.uniform(0, 9),
+                    'pressure': rng.randint(1005, 1025),
+                    'flight_status': classify_flight_conditions(rain, wind)[0]},
+        'hourly': [{'dt': (hour + lead) * 3600, 'wind': round(fc_wind, 1), 'rain': round(fc_rain, 2),
+                    'flight_status': classify_flight_conditions(fc_rain, fc_wind)[0]}],
+        'timezone_offset': 7200,
+    }
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--areas", type=int, default=11)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='freirefpv-history-')
+    try:
+        retention = int(args.years * 365) + 1
+        history = WeatherHistory(os.path.join(workdir, 'history.bin'), retention_days=retention)
+        hours = int(args.years * 365 * 24)
+        end = time.time()
+        rng = random.Random(1)
+        slugs = [f"zona-{i}" for i in range(args.areas)]
+
+        elapsed = 0.0
+        for slug in slugs:
+            for hour in range(hours):
+                fetched_at = end - (hours - hour) * 3600
+                data = synthetic_forecast(rng, slug, fetched_at, history.forecast_lead)
+                start = time.perf_counter()
+                history.record(slug, data, fetched_at)
+                elapsed += time.perf_counter() - start
+        records = hours * len(slugs)
+        print(f"{records} previsiones archivadas en {elapsed:.1f} s ({elapsed / records * 1e6:.1f} µs cada una)")
+        st = os.stat(history.path)
+        print(f"Archivo: {st.st_size / 2**20:.1f} MiB de tamaño fijo, {st.st_blocks * 512 / 2**20:.1f} MiB en disco")
+
+        # La primera consulta abre el memmap e importa numpy
+        first = timed(lambda: history.summary(slugs[0], now=end), 1)
+        full = timed(lambda: history.summary(slugs[0], now=end), args.repeat)
+        month = timed(lambda: history.summary(slugs[0], days=30, now=end), args.repeat)
+        summary = history.summary(slugs[0], now=end)
+        print(f"Consulta de {summary['hours']} horas: {full:.2f} ms (primera {first:.1f} ms); "
+              f"últimos 30 días: {month:.2f} ms")
+        error = summary['forecast_error']
+        print(f"Meses: {len(summary['flyable_by_month'])}; error del viento a {error['lead_hours']} h: "
+              f"MAE {error['wind_mae']}, acierto del estado {error['status_accuracy']:.0%}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
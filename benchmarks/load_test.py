@@ -0,0 +1,326 @@
+"""Benchmark de carga de la web completa bajo gunicorn con el stub de OpenWeather.
+
+Arranca el stub de OneCall (``openweather_stub.py``) con la latencia y tasa de
+errores indicadas, lanza ``gunicorn app:app`` apuntando a él con ficheros de
+caché y base de datos temporales, y recorre las rutas una a una con
+``--concurrency`` clientes durante ``--duration`` segundos. Para cada ruta
+informa de peticiones por segundo, p50/p95/p99, errores y las llamadas que
+llegaron al stub, y guarda todo en JSON para comparar ejecuciones.
+
+Uso:
+    python benchmarks/load_test.py --workers 4 --threads 1 --latency 0.3
+    python benchmarks/load_test.py --weather-ttl 0 --error-rate 0.2     # forzar tráfico a la API
+    python benchmarks/load_test.py --baseline benchmarks/results/antes.json   # sale con 1 si empeora
+"""
+import argparse
+import http.client
+import json
+import os
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openweather_stub import start_stub  # noqa: E402
+
+ROUTES = ['/', '/inicio', '/contacto', '/api/weather/refresh', '/api/testimonios', 'static:css', 'static:js']
+HEADERS = {'Accept-Encoding': 'br, gzip', 'User-Agent': 'freirefpv-load-test'}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+class Server:
+    """``gunicorn app:app`` en un subproceso con un entorno aislado en un directorio temporal."""
+
+    def __init__(self, workers, threads, worker_class, stub_url, weather_ttl, env=None, app='app:app'):
+        self.port = free_port()
+        self.workdir = tempfile.mkdtemp(prefix='freirefpv-bench-')
+        self.log_path = os.path.join(self.workdir, 'gunicorn.log')
+        self.env = dict(
+            os.environ,
+            OPENWEATHER_BASE_URL=stub_url,
+            WEATHER_CACHE_PATH=os.path.join(self.workdir, 'weather.json'),
+            WEATHER_CACHE_TTL=str(weather_ttl),
+            DATABASE_URL='sqlite:///' + os.path.join(self.workdir, 'bench.db'),
+            TESTIMONIOS_VERSION_PATH=os.path.join(self.workdir, 'testimonios.version'),
+            METRICS_DIR=os.path.join(self.workdir, 'metrics'),
+            RATE_LIMIT='0',
+            **(env or {}))
+        self.command = [sys.executable, '-m', 'gunicorn', app,
+                        '--bind', f'127.0.0.1:{self.port}',
+                        '--workers', str(workers), '--threads', str(threads),
+                        '--worker-class', worker_class, '--timeout', '60']
+        self.process = None
+
+    def start(self, timeout=30):
+        self._log = open(self.log_path, 'wb')
+        self.process = subprocess.Popen(self.command, cwd=ROOT, env=self.env,
+                                        stdout=self._log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=2)
+                conn.request('GET', '/')
+                conn.getresponse().read()
+                conn.close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"gunicorn no arrancó:\n{self.log_tail()}")
+
+    def log_tail(self, lines=20):
+        with open(self.log_path, 'rb') as fh:
+            return b''.join(fh.readlines()[-lines:]).decode('utf-8', 'replace')
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if getattr(self, '_log', None):
+            self._log.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def request(conn, method, path, body=None):
+    headers = dict(HEADERS)
+    if body is not None:
+        body = json.dumps(body).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def seed_testimonios(port, count):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    for i in range(count):
+        request(conn, 'POST', '/api/testimonios', {
+            'nombre': f'Cliente {i}', 'ocupacion': 'Benchmark', 'texto': 'Vuelo de prueba ' * 8})
+    conn.close()
+
+
+def static_paths(port):
+    """URLs versionadas del CSS y JS que enlaza ``/inicio`` (las que pediría un navegador)."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', '/inicio')
+    html = conn.getresponse().read().decode('utf-8', 'replace')
+    conn.close()
+    paths = {}
+    for kind in ('css', 'js'):
+        match = re.search(rf'["\'](/static/[^"\']+\.{kind}(?:\?[^"\']*)?)["\']', html)
+        if match:
+            paths[f'static:{kind}'] = match.group(1)
+    return paths
+
+
+def drive(port, path, concurrency, duration, timeout=30):
+    """Cliente en bucle cerrado: cada hilo repite la petición hasta agotar ``duration``."""
+    latencies, statuses, failures = [], {}, [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        local, local_statuses, local_failures = [], {}, 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                status = request(conn, 'GET', path)
+            except (OSError, http.client.HTTPException):
+                local_failures += 1
+                conn.close()
+                continue
+            local.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            failures[0] += local_failures
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    errors = failures[0] + sum(count for status, count in statuses.items() if status >= 500)
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': _ms(percentile(latencies, 0.50)),
+        'p95_ms': _ms(percentile(latencies, 0.95)),
+        'p99_ms': _ms(percentile(latencies, 0.99)),
+        'max_ms': _ms(latencies[-1] if latencies else None),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args, routes=None, worker_class=None, app='app:app', env=None):
+    """Ejecuta el benchmark completo y devuelve el informe como diccionario."""
+    stub, stub_config = start_stub(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    stub_url = f"http://127.0.0.1:{stub.server_port}"
+    server = Server(args.workers, args.threads, worker_class or args.worker_class, stub_url,
+                    args.weather_ttl, env=dict(args.env, **(env or {})), app=app)
+    results = {}
+    try:
+        server.start()
+        if args.seed_testimonios:
+            seed_testimonios(server.port, args.seed_testimonios)
+        paths = static_paths(server.port)
+        for route in routes or args.routes:
+            path = paths.get(route, route)
+            if path.startswith('static:'):
+                print(f"  {route}: no se encontró el fichero en /inicio, se omite")
+                continue
+            if args.warmup:
+                drive(server.port, path, args.concurrency, args.warmup)
+            calls = stub_config.calls
+            result = drive(server.port, path, args.concurrency, args.duration)
+            result['path'] = path
+            result['upstream_calls'] = stub_config.calls - calls
+            results[route] = result
+            print(f"  {route:22} {result['rps']:>8} req/s  p50 {result['p50_ms']} ms  "
+                  f"p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+                  f"errores {result['errors']}  API {result['upstream_calls']}")
+    finally:
+        server.stop()
+        stub.shutdown()
+
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'config': {
+            'workers': args.workers, 'threads': args.threads,
+            'worker_class': worker_class or args.worker_class, 'app': app,
+            'concurrency': args.concurrency, 'duration': args.duration,
+            'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+            'weather_ttl': args.weather_ttl,
+        },
+        'upstream_calls_total': stub_config.calls,
+        'routes': results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Rutas cuyo p99 sube o cuyas req/s bajan más de ``tolerance`` respecto a ``baseline``."""
+    regressions = []
+    for route, result in report['routes'].items():
+        before = baseline.get('routes', {}).get(route)
+        if not before:
+            continue
+        if before['p99_ms'] and result['p99_ms'] and result['p99_ms'] > before['p99_ms'] * (1 + tolerance):
+            regressions.append(f"{route}: p99 {before['p99_ms']} -> {result['p99_ms']} ms")
+        if before['rps'] and result['rps'] < before['rps'] * (1 - tolerance):
+            regressions.append(f"{route}: {before['rps']} -> {result['rps']} req/s")
+    return regressions
+
+
+def parse_env(values):
+    env = {}
+    for value in values:
+        key, _, val = value.partition('=')
+        env[key] = val
+    return env
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--worker-class", default="sync")
+    parser.add_argument("--concurrency", type=int, default=16, help="clientes simultáneos")
+    parser.add_argument("--duration", type=float, default=10, help="segundos por ruta")
+    parser.add_argument("--warmup", type=float, default=1, help="segundos sin medir por ruta")
+    parser.add_argument("--latency", type=float, default=0.2, help="latencia del stub en segundos")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fracción de 503 del stub")
+    parser.add_argument("--weather-ttl", type=int, default=600,
+                        help="WEATHER_CACHE_TTL del servidor (0 fuerza refrescos constantes)")
+    parser.add_argument("--seed-testimonios", type=int, default=30)
+    parser.add_argument("--routes", type=lambda s: s.split(','), default=ROUTES,
+                        help="lista separada por comas (static:css y static:js para los estáticos)")
+    parser.add_argument("--env", action="append", default=[], metavar="CLAVE=VALOR",
+                        help="variable de entorno extra para el servidor")
+    parser.add_argument("--output", help="fichero JSON (por defecto benchmarks/results/load-<fecha>.json)")
+    parser.add_argument("--baseline", help="informe anterior con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="empeoramiento admitido frente a --baseline (0.2 = 20%%)")
+    return parser
+
+
+def save(report, output, prefix):
+    output = output or os.path.join(ROOT, 'benchmarks', 'results',
+                                    f"{prefix}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Resultados guardados en {output}")
+
+
+def main():
+    args = build_parser().parse_args()
+    args.env = parse_env(args.env)
+    print(f"gunicorn {args.workers} workers x {args.threads} hilos ({args.worker_class}), "
+          f"{args.concurrency} clientes, API con {args.latency}s de latencia")
+    report = run(args)
+    save(report, args.output, 'load')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fh:
+            regressions = compare(report, json.load(fh), args.tolerance)
+        if regressions:
+            print("Regresiones frente a la referencia:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("Sin regresiones frente a la referencia")
+
+
+if __name__ == "__main__":
+    main()
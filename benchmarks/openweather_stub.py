@@ -0,0 +1,228 @@
+"""Servidor local que imita la API OneCall 3.0 de OpenWeather.
+
+Sirve previsiones sintéticas (current, minutely, hourly y daily) con latencia,
+tasa de errores y cuelgues configurables, para probar el cliente y medir la web
+sin gastar cuota real. ``GET /__stats`` devuelve el número de llamadas recibidas
+y ``POST /__config`` cambia el comportamiento en caliente.
+
+Uso:
+    python benchmarks/openweather_stub.py --port 8099 --latency 0.2 --error-rate 0.1
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8099 gunicorn app:app
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubConfig:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, hang_rate=0.0,
+                 hang_seconds=30.0, status=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        # Si se fija, todas las respuestas devuelven este código (p. ej. 401 o 503)
+        self.status = status
+        self.calls = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def update(self, values):
+        for key in ("latency", "jitter", "error_rate", "hang_rate", "hang_seconds", "status"):
+            if key in values:
+                setattr(self, key, values[key])
+
+    def stats(self):
+        return {"calls": self.calls, "errors": self.errors}
+
+
+def build_onecall(lat, lon, exclude=(), now=None):
+    """Genera una respuesta OneCall verosímil y estable dentro de la misma hora."""
+    now = int(now or time.time())
+    hour = now - now % 3600
+    rng = random.Random(f"{lat:.2f},{lon:.2f},{hour}")
+
+    def weather(rain):
+        if rain > 0.5:
+            return {"id": 501, "main": "Rain", "description": "lluvia moderada", "icon": "10d"}
+        if rain > 0:
+            return {"id": 500, "main": "Rain", "description": "lluvia ligera", "icon": "10d"}
+        return {"id": 800, "main": "Clear", "description": "cielo claro", "icon": "01d"}
+
+    data = {"lat": lat, "lon": lon, "timezone": "Europe/Madrid", "timezone_offset": 7200}
+
+    current_rain = max(0.0, rng.gauss(-0.5, 0.8))
+    data["current"] = {
+        "dt": now,
+        "temp": round(rng.uniform(12, 30), 2),
+        "humidity": rng.randint(40, 90),
+        "pressure": rng.randint(1005, 1025),
+        "uvi": round(rng.uniform(0, 9), 2),
+        "wind_speed": round(rng.uniform(0, 12), 2),
+        "wind_deg": rng.randint(0, 359),
+        "weather": [weather(current_rain)],
+    }
+    if current_rain:
+        data["current"]["rain"] = {"1h": round(current_rain, 2)}
+
+    if "minutely" not in exclude:
+        data["minutely"] = [
+            {"dt": hour + 60 * i, "precipitation": round(max(0.0, rng.gauss(-0.3, 0.5)), 2)}
+            for i in range(60)
+        ]
+
+    if "hourly" not in exclude:
+        hourly = []
+        for i in range(48):
+            rain = max(0.0, rng.gauss(-0.6, 1.0))
+            entry = {
+                "dt": hour + 3600 * i,
+                "temp": round(20 + 6 * math.sin(i / 24 * 2 * math.pi) + rng.uniform(-2, 2), 2),
+                "humidity": rng.randint(40, 95),
+                "pressure": rng.randint(1005, 1025),
+                "uvi": round(max(0.0, 8 * math.sin(i / 24 * 2 * math.pi)), 2),
+                "wind_speed": round(abs(rng.gauss(6, 4)), 2),
+                "wind_gust": round(abs(rng.gauss(10, 5)), 2),
+                "wind_deg": rng.randint(0, 359),
+                "pop": round(min(1.0, rain), 2),
+                "weather": [weather(rain)],
+            }
+            if rain:
+                entry["rain"] = {"1h": round(rain, 2)}
+            hourly.append(entry)
+        data["hourly"] = hourly
+
+    if "daily" not in exclude:
+        daily = []
+        for i in range(8):
+            rain = round(max(0.0, rng.gauss(0, 1.5)), 2)
+            entry = {
+                "dt": hour - hour % 86400 + 43200 + 86400 * i,
+                "temp": {"day": round(rng.uniform(14, 32), 2),
+                         "min": round(rng.uniform(8, 16), 2),
+                         "max": round(rng.uniform(20, 34), 2)},
+                "humidity": rng.randint(40, 90),
+                "pressure": rng.randint(1005, 1025),
+                "uvi": round(rng.uniform(0, 9), 2),
+                "wind_speed": round(abs(rng.gauss(12, 8)), 2),
+                "wind_deg": rng.randint(0, 359),
+                "pop": round(min(1.0, rain / 3), 2),
+                "weather": [weather(rain)],
+            }
+            if rain:
+                entry["rain"] = rain
+            daily.append(entry)
+        data["daily"] = daily
+
+    return data
+
+
+def make_handler(config):
+    class OneCallStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/__stats":
+                return self._send_json(200, config.stats())
+            if url.path != "/data/3.0/onecall":
+                return self._send_json(404, {"cod": 404, "message": "Not found"})
+
+            with config.lock:
+                config.calls += 1
+            roll = random.random()
+
+            if roll < config.hang_rate:
+                # Simula un upstream colgado: cabeceras enviadas y cuerpo que nunca llega
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", "1000000")
+                self.end_headers()
+                self.wfile.flush()
+                time.sleep(config.hang_seconds)
+                return
+
+            delay = config.latency + random.uniform(0, config.jitter)
+            if delay:
+                time.sleep(delay)
+
+            if config.status or roll < config.hang_rate + config.error_rate:
+                with config.lock:
+                    config.errors += 1
+                return self._send_json(config.status or 503,
+                                       {"cod": config.status or 503, "message": "Stub error"})
+
+            query = parse_qs(url.query)
+            lat = float(query.get("lat", ["36.72"])[0])
+            lon = float(query.get("lon", ["-4.42"])[0])
+            exclude = query.get("exclude", [""])[0].split(",")
+            self._send_json(200, build_onecall(lat, lon, exclude))
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/__config":
+                return self._send_json(404, {"cod": 404, "message": "Not found"})
+            length = int(self.headers.get("Content-Length", 0))
+            config.update(json.loads(self.rfile.read(length) or b"{}"))
+            self._send_json(200, config.stats())
+
+    return OneCallStubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # El cliente cierra conexiones keep-alive al terminar (p. ej. al parar gunicorn)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_stub(host="127.0.0.1", port=0, **options):
+    """Arranca el stub en un hilo y devuelve ``(server, config)``; ``port=0`` elige uno libre."""
+    config = StubConfig(**options)
+    server = StubServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="openweather-stub", daemon=True).start()
+    return server, config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="segundos por respuesta")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latencia extra aleatoria")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fracción de respuestas 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fracción de respuestas colgadas")
+    parser.add_argument("--status", type=int, default=None, help="forzar este código de estado")
+    args = parser.parse_args()
+
+    config = StubConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        hang_rate=args.hang_rate, status=args.status)
+    server = StubServer((args.host, args.port), make_handler(config))
+    server.daemon_threads = True
+    print(f"Stub de OpenWeather escuchando en http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Servidor SMTP local que acepta y guarda los correos sin enviarlos.
+
+Sirve para probar el despachador de notificaciones sin un servidor real: cuenta
+conexiones y mensajes, y puede rechazar una fracción de envíos con un error
+temporal (451) o permanente (550) para ver los reintentos y la dead letter.
+
+Uso:
+    python benchmarks/smtp_sink.py --port 8025 --temp-fail-rate 0.2
+    SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_STARTTLS=0 gunicorn app:app
+"""
+import argparse
+import random
+import socketserver
+import threading
+from email import message_from_bytes, policy
+
+
+class SinkState:
+    def __init__(self, temp_fail_rate=0.0, perm_fail_rate=0.0, verbose=False):
+        self.temp_fail_rate = temp_fail_rate
+        self.perm_fail_rate = perm_fail_rate
+        self.verbose = verbose
+        self.connections = 0
+        self.messages = []
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(state):
+    class Handler(socketserver.StreamRequestHandler):
+        def reply(self, line):
+            # Las respuestas SMTP son ASCII
+            self.wfile.write(line.encode('ascii') + b'\r\n')
+
+        def handle(self):
+            with state.lock:
+                state.connections += 1
+            self.reply("220 smtp-sink ready")
+            mail_from, rcpt_to = None, []
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                command = line.decode('utf-8', 'replace').strip()
+                verb = command[:4].upper()
+                if verb in ('EHLO', 'HELO'):
+                    self.reply("250 smtp-sink")
+                elif verb == 'MAIL':
+                    mail_from, rcpt_to = command[10:].strip(), []
+                    self.reply("250 OK")
+                elif verb == 'RCPT':
+                    rcpt_to.append(command[8:].strip())
+                    self.reply("250 OK")
+                elif verb == 'DATA':
+                    self.reply("354 End data with <CRLF>.<CRLF>")
+                    data = []
+                    while True:
+                        chunk = self.rfile.readline()
+                        if not chunk or chunk in (b'.\r\n', b'.\n'):
+                            break
+                        data.append(chunk[1:] if chunk.startswith(b'..') else chunk)
+                    roll = random.random()
+                    if roll < state.perm_fail_rate:
+                        with state.lock:
+                            state.rejected += 1
+                        self.reply("550 Mailbox unavailable")
+                    elif roll < state.perm_fail_rate + state.temp_fail_rate:
+                        with state.lock:
+                            state.rejected += 1
+                        self.reply("451 Try again later")
+                    else:
+                        message = message_from_bytes(b''.join(data), policy=policy.default)
+                        with state.lock:
+                            state.messages.append({'from': mail_from, 'to': rcpt_to, 'subject': message['Subject']})
+                        if state.verbose:
+                            print(f"{rcpt_to} <- {message['Subject']}")
+                        self.reply("250 Queued")
+                elif verb in ('RSET', 'NOOP'):
+                    self.reply("250 OK")
+                elif verb == 'QUIT':
+                    self.reply("221 Bye")
+                    return
+                else:
+                    self.reply("502 Command not implemented")
+
+    return Handler
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_sink(host="127.0.0.1", port=0, **options):
+    """Arranca el sumidero en un hilo y devuelve ``(servidor, estado)``."""
+    state = SinkState(**options)
+    server = SinkServer((host, port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--temp-fail-rate", type=float, default=0.0, help="fracción de envíos con 451")
+    parser.add_argument("--perm-fail-rate", type=float, default=0.0, help="fracción de envíos con 550")
+    args = parser.parse_args()
+
+    state = SinkState(args.temp_fail_rate, args.perm_fail_rate, verbose=True)
+    server = SinkServer((args.host, args.port), make_handler(state))
+    print(f"SMTP sink en {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"{state.connections} conexiones, {len(state.messages)} mensajes, {state.rejected} rechazados")
+
+
+if __name__ == "__main__":
+    main()
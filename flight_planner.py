@@ -0,0 +1,123 @@
+"""Planificador de ventanas de vuelo sobre la previsión por horas.
+
+Busca los mejores tramos contiguos de N horas en los que todas las horas son
+volables (estado ``optimal`` o ``possible``). La búsqueda es una ventana
+deslizante de una sola pasada: sumas acumuladas para la puntuación y la lluvia
+y una cola monótona para el viento máximo, así que cuesta O(n) por duración en
+lugar de volver a recorrer cada ventana.
+"""
+from collections import deque
+
+# Puntuación base por hora volable; el resto de estados bloquean la ventana
+FLYABLE_SCORES = {'optimal': 1.0, 'possible': 0.6}
+
+# Penalización por probabilidad de precipitación (pop entre 0 y 1)
+POP_PENALTY = 0.3
+
+
+def hour_score(hour):
+    """Puntuación de una hora (None si no es volable)."""
+    base = FLYABLE_SCORES.get(hour['flight_status'])
+    if base is None:
+        return None
+    return base - POP_PENALTY * hour.get('pop', 0)
+
+
+def find_windows(hourly, hours, limit=3):
+    """Devuelve hasta ``limit`` ventanas de ``hours`` horas, sin solaparse y ordenadas.
+
+    ``hourly`` es la serie de ``forecast.build_hourly``. Cada ventana incluye
+    su inicio y fin, la puntuación media, el viento y la racha máxima, la lluvia
+    total y el peor estado de vuelo dentro del tramo.
+    """
+    n = len(hourly)
+    if hours <= 0 or hours > n:
+        return []
+
+    scores = [hour_score(hour) for hour in hourly]
+    candidates = []
+    score_sum = 0.0
+    rain_sum = 0.0
+    blocked = 0
+    possible = 0
+    max_wind = deque()  # índices con viento decreciente
+    max_gust = deque()
+
+    for i, hour in enumerate(hourly):
+        # Entra la hora i
+        if scores[i] is None:
+            blocked += 1
+        else:
+            score_sum += scores[i]
+            possible += hour['flight_status'] == 'possible'
+        rain_sum += hour['rain']
+        _push_max(max_wind, hourly, i, 'wind')
+        _push_max(max_gust, hourly, i, 'gust')
+
+        # Sale la hora i - hours
+        j = i - hours
+        if j >= 0:
+            if scores[j] is None:
+                blocked -= 1
+            else:
+                score_sum -= scores[j]
+                possible -= hourly[j]['flight_status'] == 'possible'
+            rain_sum -= hourly[j]['rain']
+            if max_wind[0] <= j:
+                max_wind.popleft()
+            if max_gust[0] <= j:
+                max_gust.popleft()
+
+        if j + 1 >= 0 and not blocked:
+            # Redondeo para que el error acumulado de la suma deslizante no altere los empates
+            candidates.append((round(score_sum / hours, 6), j + 1, hourly[max_wind[0]]['wind'],
+                               hourly[max_gust[0]]['gust'], rain_sum, possible))
+
+    # Las mejores primero; a igual puntuación, la más temprana
+    candidates.sort(key=lambda c: (-c[0], c[1]))
+    selected = []
+    for score, start, wind, gust, rain, possible_hours in candidates:
+        end = start + hours
+        if any(start < s + hours and s < end for s, _ in selected):
+            continue
+        selected.append((start, (score, wind, gust, rain, possible_hours)))
+        if len(selected) >= limit:
+            break
+
+    windows = []
+    for start, (score, wind, gust, rain, possible_hours) in selected:
+        first, last = hourly[start], hourly[start + hours - 1]
+        windows.append({
+            'start': first['dt'],
+            'end': last['dt'] + 3600,
+            'day_name': first['day_name'],
+            'date': first['date'],
+            'start_time': first['time'],
+            'end_time': hourly[start + hours]['time'] if start + hours < n else _next_hour(last['time']),
+            'hours': hours,
+            'score': round(score, 3),
+            'max_wind': wind,
+            'max_gust': gust,
+            'total_rain': round(max(rain, 0.0), 2),
+            'flight_status': 'possible' if possible_hours else 'optimal',
+        })
+    return windows
+
+
+def _push_max(queue, hourly, i, key):
+    value = hourly[i][key]
+    while queue and hourly[queue[-1]][key] <= value:
+        queue.pop()
+    queue.append(i)
+
+
+def _next_hour(time_text):
+    hour, minute = time_text.split(':')
+    return f"{(int(hour) + 1) % 24:02d}:{minute}"
+
+
+def plan(hourly, durations, limit=3, now=None):
+    """Ventanas para varias duraciones a partir de la hora en curso."""
+    if now is not None:
+        hourly = [hour for hour in hourly if hour['dt'] + 3600 > now]
+    return [{'hours': hours, 'windows': find_windows(hourly, hours, limit)} for hours in durations]
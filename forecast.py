@@ -0,0 +1,155 @@
+"""Procesado de las respuestas OneCall de OpenWeather y reglas de vuelo."""
+from datetime import datetime, timezone
+
+
+# Función auxiliar para obtener el nombre del día en español
+def get_day_name(weekday):
+    days = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+    return days[weekday]
+
+
+def classify_flight_conditions(rain_amount, wind):
+    """Devuelve ``(flight_status, status_text)`` según la lluvia (mm) y el viento.
+
+    - Verde (óptimo): Lluvia entre 0mm y 0.5mm Y viento menor a 15km/h
+    - Amarillo (posible): Lluvia entre 0mm y 0.5mm Y viento entre 15-30km/h
+    - Naranja (por determinar): Lluvia entre 0.6mm y 1.5mm
+    - Rojo (no operable): Lluvia mayor a 1.5mm O viento mayor a 30km/h
+    """
+    # Condiciones no operables (rojo)
+    if rain_amount > 1.5 or wind > 30:
+        if rain_amount > 1.5:
+            return "not-recommended", "No operable: Lluvia excesiva"
+        return "not-recommended", "No operable: Viento demasiado fuerte"
+
+    # Condiciones por determinar (naranja)
+    if rain_amount > 0.5:
+        return "caution", "Por determinar situación meteorológica"
+
+    # Condiciones óptimas (verde) o con precaución (amarillo)
+    if wind < 15:
+        return "optimal", "Óptimo para volar"
+    return "possible", "Posible con precaución"
+
+
+def build_forecast(data):
+    """Convierte la respuesta OneCall en los datos que usan las plantillas y la API."""
+    result = {}
+    
+    # Procesar datos del tiempo actual
+    current = data['current']
+    current_weather = current['weather'][0]
+    current_temp = current['temp']
+    current_description = current_weather['description']
+    current_icon = current_weather['icon']
+    current_wind = current['wind_speed']
+    current_humidity = current['humidity']
+    current_uvi = current.get('uvi', 0)
+    current_pressure = current.get('pressure', 0)
+    current_rain = 0
+    
+    if 'rain' in current and '1h' in current['rain']:
+        current_rain = current['rain']['1h']
+    
+    # Procesar los datos diarios primero para obtener la información del día actual
+    daily_forecast = []
+    
+    # Recorrer los datos diarios (hasta 5 días)
+    for i, day_data in enumerate(data['daily']):
+        if i >= 5:  # Limitamos a 5 días
+            break
+            
+        dt = datetime.fromtimestamp(day_data['dt'])
+        weather = day_data['weather'][0]
+        temp = day_data['temp']['day']  # Temperatura durante el día
+        description = weather['description']
+        icon = weather['icon']
+        wind = day_data['wind_speed']
+        humidity = day_data['humidity']
+        
+        # Comprobar si hay previsión de lluvia
+        rain_amount = day_data.get('rain', 0)
+        
+        # Determinar el estado del vuelo usando las reglas
+        day_flight_status, day_status_text = classify_flight_conditions(rain_amount, wind)
+        
+        daily_forecast.append({
+            'date': dt.strftime('%d/%m'),
+            'day_name': get_day_name(dt.weekday()),
+            'temp': round(temp),
+            'description': description.capitalize(),
+            'icon': icon,
+            'wind': round(wind),
+            'humidity': humidity,
+            'rain_amount': rain_amount,
+            'is_rainy': rain_amount > 0.1 or 'lluvia' in description.lower() or 'rain' in weather.get('main', '').lower(),
+            'flight_status': day_flight_status,
+            'status_text': day_status_text
+        })
+    
+    # Usar el estado de vuelo del día actual para el panel de clima actual
+    if daily_forecast:
+        # Tomar el estado de vuelo del primer elemento (día de hoy)
+        flight_status = daily_forecast[0]['flight_status']
+        status_text = daily_forecast[0]['status_text']
+    else:
+        # Respaldo por si no hay datos de pronóstico diario
+        flight_status = "caution"
+        status_text = "No se pudo determinar el estado"
+    
+    # Datos del tiempo actual
+    result['current'] = {
+        'temp': round(current_temp),
+        'description': current_description.capitalize(),
+        'icon': current_icon,
+        'wind': round(current_wind),
+        'wind_deg': current.get('wind_deg', 0),
+        'humidity': current_humidity,
+        'rain_amount': current_rain,
+        'uvi': current_uvi,
+        'pressure': current_pressure,
+        'flight_status': flight_status,
+        'status_text': status_text,
+        'timestamp': current['dt'],
+        'formatted_time': datetime.fromtimestamp(current['dt'] + 7200).strftime('%H:%M') # Ajustado a GMT+2 (horario de verano)
+    }
+    
+    result['daily'] = daily_forecast
+    result['hourly'] = build_hourly(data)
+    # Desfase de la hora local (con horario de verano) para agrupar el histórico por día
+    result['timezone_offset'] = data.get('timezone_offset', 7200)
+    return result
+
+
+def build_hourly(data):
+    """Serie horaria compacta (hasta 48h) ya clasificada con las reglas de vuelo.
+
+    La lluvia de la primera hora se completa con la previsión por minutos
+    (``minutely``), que es más precisa para la hora en curso.
+    """
+    hourly = data.get('hourly') or []
+    offset = data.get('timezone_offset', 7200)
+    minutely = data.get('minutely') or []
+    # OpenWeather da la precipitación por minuto en mm/h: la media es la lluvia de la hora
+    next_hour_rain = sum(m.get('precipitation', 0) for m in minutely) / 60 if minutely else 0
+
+    series = []
+    for i, hour_data in enumerate(hourly):
+        rain = hour_data.get('rain', {}).get('1h', 0)
+        if i == 0:
+            rain = max(rain, next_hour_rain)
+        wind = hour_data['wind_speed']
+        flight_status, _ = classify_flight_conditions(rain, wind)
+        local = datetime.fromtimestamp(hour_data['dt'] + offset, timezone.utc)
+        series.append({
+            'dt': hour_data['dt'],
+            'time': local.strftime('%H:%M'),
+            'date': local.strftime('%d/%m'),
+            'day_name': get_day_name(local.weekday()),
+            'wind': round(wind, 1),
+            'gust': round(hour_data.get('wind_gust', wind), 1),
+            'rain': round(rain, 2),
+            'pop': hour_data.get('pop', 0),
+            'flight_status': flight_status,
+        })
+    return series
@@ -0,0 +1,24 @@
+"""Configuración de gunicorn; se carga sola al lanzar ``gunicorn app:app`` desde la raíz.
+
+``SERVING_MODE=sync`` (por defecto) mantiene los workers síncronos de siempre:
+cada petición ocupa un worker (o un hilo con ``--threads``) hasta terminar.
+
+``SERVING_MODE=async`` usa workers gevent (``pip install gevent``): cada worker
+atiende hasta ``ASYNC_WORKER_CONNECTIONS`` peticiones a la vez y las que esperan
+a OpenWeather no bloquean a las demás. Ver ``serving.py``.
+
+Las opciones de la línea de comandos (``-k``, ``-w``...) tienen prioridad.
+"""
+import os
+
+serving_mode = os.environ.get("SERVING_MODE", "sync")
+
+if serving_mode == "async":
+    worker_class = "gevent"
+    worker_connections = int(os.environ.get("ASYNC_WORKER_CONNECTIONS", 1000))
+    # Con keep-alive, los clientes ya conectados acaparan el worker saturado y las
+    # conexiones nuevas esperan segundos a ser aceptadas; cerrando tras cada
+    # respuesta todas entran en la misma cola (p99 de 8 s a 0,35 s en bench_async.py)
+    keepalive = int(os.environ.get("ASYNC_KEEPALIVE", 0))
+elif serving_mode != "sync":
+    raise ValueError(f"SERVING_MODE debe ser 'sync' o 'async', no {serving_mode!r}")
@@ -0,0 +1,285 @@
+"""Variantes WebP/AVIF redimensionadas de las imágenes del sitio.
+
+``python image_variants.py`` recorre ``static/img``, genera para cada JPG/PNG
+versiones a varios anchos en AVIF y WebP y las guarda en ``static/variants``
+con el hash del original en el nombre
+(``img/evento.jpg`` -> ``variants/img/evento.3f2a9c1b7d0e.768.webp``). El
+manifiesto ``static/variants/variants.json`` recuerda el hash de cada original,
+así que en la siguiente ejecución solo se vuelven a codificar las imágenes que
+han cambiado y se borran las variantes huérfanas.
+
+Las plantillas usan ``responsive_img('img/evento.jpg', 'Texto alternativo',
+sizes='...')``, que genera un ``<picture>`` con ``srcset`` por formato y la
+imagen original como respaldo. Si no hay variantes (p. ej. sin ejecutar el
+generador) se emite un ``<img>`` normal.
+
+Pillow solo hace falta para generar las variantes, no para servirlas.
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+
+from markupsafe import Markup, escape
+
+from static_assets import file_hash
+
+# Pillow solo hace falta para generar variantes; la web solo lee el manifiesto
+Image = ImageOps = UnidentifiedImageError = features = None
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIR = 'img'
+OUTPUT_DIR = 'variants'
+MANIFEST_NAME = 'variants.json'
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+# Anchos generados (nunca por encima del ancho original)
+WIDTHS = (480, 768, 1200, 1920)
+
+# Ancho de referencia para el informe de ahorro en móvil (~384 px CSS a 2x)
+MOBILE_WIDTH = 768
+
+# Formato, nombre en Pillow y opciones de codificación, por orden de preferencia
+FORMATS = (
+    ('avif', 'AVIF', {'quality': 55, 'speed': 6}),
+    ('webp', 'WEBP', {'quality': 80, 'method': 6}),
+)
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+
+def _load_pillow():
+    """Importa Pillow la primera vez que se generan variantes; ``False`` si no está instalado."""
+    global Image, ImageOps, UnidentifiedImageError, features
+    if Image is None:
+        try:
+            from PIL import Image, ImageOps, UnidentifiedImageError, features
+        except ImportError:  # Pillow es opcional: sin él no se generan variantes
+            return False
+    return True
+
+
+def available_formats():
+    """Formatos de ``FORMATS`` que la instalación de Pillow sabe codificar."""
+    if not _load_pillow():
+        return []
+    supported = []
+    for name, pil_format, options in FORMATS:
+        try:
+            if features.check(name):
+                supported.append((name, pil_format, options))
+        except ValueError:  # Pillow antiguo que no conoce el formato
+            pass
+    return supported
+
+
+def target_widths(width, widths=WIDTHS):
+    targets = [w for w in widths if w < width]
+    if width <= max(widths):
+        targets.append(width)
+    return targets or [width]
+
+
+def iter_sources(static_folder):
+    base = os.path.join(static_folder, SOURCE_DIR)
+    for root, _, files in os.walk(base):
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in SOURCE_EXTENSIONS:
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, OUTPUT_DIR, MANIFEST_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(static_folder, manifest):
+    directory = os.path.join(static_folder, OUTPUT_DIR)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+        json.dump(dict(sorted(manifest.items())), fh, indent=2)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST_NAME))
+
+
+def _variant_path(source, digest, width, extension):
+    root = os.path.splitext(source)[0]
+    return f"{OUTPUT_DIR}/{root}.{digest}.{width}.{extension}"
+
+
+def _is_current(static_folder, entry, digest):
+    if entry is None or entry.get('hash') != digest:
+        return False
+    return all(os.path.exists(os.path.join(static_folder, variant['path']))
+               for variants in entry['variants'].values() for variant in variants)
+
+
+def encode_source(static_folder, source, path, digest, formats, widths=WIDTHS):
+    """Codifica un original en todos los anchos y formatos y devuelve su entrada del manifiesto."""
+    with Image.open(path) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    entry = {
+        'hash': digest,
+        'width': image.width,
+        'height': image.height,
+        'bytes': os.path.getsize(path),
+        'variants': {},
+    }
+    for width in target_widths(image.width, widths):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for name, pil_format, options in formats:
+            relative = _variant_path(source, digest, width, name)
+            output = os.path.join(static_folder, relative)
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            resized.save(output, pil_format, **options)
+            entry['variants'].setdefault(name, []).append(
+                {'width': width, 'path': relative, 'bytes': os.path.getsize(output)})
+    return entry
+
+
+def build_variants(static_folder, widths=WIDTHS, force=False):
+    """Genera las variantes que falten o estén desactualizadas y poda las huérfanas."""
+    formats = available_formats()
+    if not formats:
+        raise RuntimeError("Pillow no está instalado o no soporta WebP/AVIF")
+
+    previous = load_manifest(static_folder)
+    manifest = {}
+    stats = {'encoded': 0, 'unchanged': 0, 'failed': 0}
+    for source, path in iter_sources(static_folder):
+        digest = file_hash(path)
+        entry = previous.get(source)
+        if not force and _is_current(static_folder, entry, digest):
+            manifest[source] = entry
+            stats['unchanged'] += 1
+            continue
+        try:
+            manifest[source] = encode_source(static_folder, source, path, digest, formats, widths)
+            stats['encoded'] += 1
+            print(f"Codificada: {source}")
+        except (OSError, UnidentifiedImageError) as e:
+            # Los punteros de Git LFS sin descargar no son imágenes
+            logger.warning(f"No se pudo procesar {source}: {e}")
+            stats['failed'] += 1
+
+    stats['removed'] = _prune(static_folder, manifest)
+    _write_manifest(static_folder, manifest)
+    return manifest, stats
+
+
+def _prune(static_folder, manifest):
+    keep = {variant['path'] for entry in manifest.values()
+            for variants in entry['variants'].values() for variant in variants}
+    base = os.path.join(static_folder, OUTPUT_DIR)
+    removed = 0
+    for root, _, files in os.walk(base):
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            if name != MANIFEST_NAME and relative not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def savings_report(manifest):
+    """Filas ``(fuente, original, móvil, escritorio)`` en bytes, con el mejor formato disponible."""
+    rows = []
+    for source, entry in sorted(manifest.items()):
+        variants = next((entry['variants'][name] for name, _, _ in FORMATS if name in entry['variants']), None)
+        if not variants:
+            continue
+        mobile = next((v for v in variants if v['width'] >= MOBILE_WIDTH), variants[-1])
+        rows.append((source, entry['bytes'], mobile['bytes'], variants[-1]['bytes']))
+    return rows
+
+
+def print_report(manifest):
+    rows = savings_report(manifest)
+    if not rows:
+        print("No hay variantes generadas")
+        return
+    print(f"{'imagen':<48}{'original':>12}{'móvil':>12}{'escritorio':>12}")
+    print('-' * 84)
+    for source, original, mobile, desktop in rows:
+        print(f"{source:<48}{original:>12}{mobile:>12}{desktop:>12}")
+    print('-' * 84)
+    original = sum(r[1] for r in rows)
+    mobile = sum(r[2] for r in rows)
+    desktop = sum(r[3] for r in rows)
+    print(f"{'total':<48}{original:>12}{mobile:>12}{desktop:>12}")
+    print(f"Ahorro en móvil: {1 - mobile / original:.0%}   en escritorio: {1 - desktop / original:.0%}")
+
+
+class ResponsiveImages:
+    """Extensión de Flask que expone ``responsive_img()`` a las plantillas."""
+
+    def __init__(self, app=None, static_assets=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app, static_assets)
+
+    def init_app(self, app, static_assets):
+        self.app = app
+        self.static_assets = static_assets
+        self.reload()
+        app.jinja_env.globals['responsive_img'] = self.responsive_img
+
+    def reload(self):
+        self.manifest = load_manifest(self.app.static_folder)
+
+    def srcset(self, filename, image_format):
+        entry = self.manifest.get(filename)
+        if entry is None or image_format not in entry['variants']:
+            return None
+        return ', '.join(f"{self.static_assets.asset_url(v['path'])} {v['width']}w"
+                         for v in entry['variants'][image_format])
+
+    def responsive_img(self, filename, alt, sizes='100vw', **attrs):
+        """``<picture>`` con ``srcset`` AVIF/WebP y el original como ``<img>`` de respaldo."""
+        attrs.setdefault('loading', 'lazy')
+        attrs.setdefault('decoding', 'async')
+        img_attrs = ''.join(f' {name.rstrip("_").replace("_", "-")}="{escape(value)}"'
+                            for name, value in attrs.items())
+        img = Markup(f'<img src="{escape(self.static_assets.asset_url(filename))}" '
+                     f'alt="{escape(alt)}"{img_attrs}>')
+
+        sources = []
+        for name, _, _ in FORMATS:
+            srcset = self.srcset(filename, name)
+            if srcset:
+                sources.append(f'<source type="{MIME_TYPES[name]}" srcset="{escape(srcset)}" '
+                               f'sizes="{escape(sizes)}">')
+        if not sources:
+            return img
+        return Markup(f"<picture>{''.join(sources)}{img}</picture>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera variantes WebP/AVIF de las imágenes")
+    parser.add_argument("--static", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
+    parser.add_argument("--force", action="store_true", help="volver a codificar todas las imágenes")
+    parser.add_argument("--report", action="store_true", help="solo mostrar el ahorro de las variantes existentes")
+    args = parser.parse_args()
+
+    if args.report:
+        print_report(load_manifest(args.static))
+        return
+
+    manifest, stats = build_variants(args.static, force=args.force)
+    print(f"{stats['encoded']} codificadas, {stats['unchanged']} sin cambios, "
+          f"{stats['failed']} con error, {stats['removed']} variantes eliminadas")
+    print_report(manifest)
+
+
+if __name__ == "__main__":
+    main()
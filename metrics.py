@@ -0,0 +1,397 @@
+"""Métricas de latencia en formato Prometheus y cabecera ``Server-Timing``.
+
+Se miden cuatro cosas, cada una en su histograma o contador:
+
+* ``freirefpv_http_request_duration_seconds``: duración de cada petición por
+  plantilla de ruta (``/api/testimonios``, no la URL concreta), método y estado.
+* ``freirefpv_upstream_request_duration_seconds``: llamadas a servicios
+  externos (OpenWeather) con su resultado.
+* ``freirefpv_template_render_duration_seconds``: renderizado de plantillas.
+* ``freirefpv_cache_requests_total``: aciertos y fallos de cada caché.
+
+Observar un valor es un ``bisect`` y una suma bajo un lock, así que se puede
+dejar activo en producción. Los cubos son fijos, lo que permite sumar
+histogramas de varios procesos y calcular el p99 con ``histogram_quantile``.
+
+Cada worker de gunicorn tiene sus propios contadores. Para que ``/metrics``
+devuelva el total, cada proceso vuelca su estado a ``<directorio>/<pid>.json``
+como mucho cada ``dump_interval`` segundos, y el worker que atiende ``/metrics``
+suma los ficheros de los procesos vivos más ``archive.json``. Cuando un worker
+muere (o gunicorn lo recicla), sus contadores e histogramas se suman al archivo
+bajo un ``flock`` antes de borrar su fichero, como el modo multiproceso de
+``prometheus_client``: los totales de ``/metrics`` nunca bajan, y Prometheus no
+ve un reinicio del contador cada vez que cambia un worker. Solo se descartarían
+los valores que son de cada proceso (los gauges, que de momento no hay).
+
+En las respuestas se añade ``Server-Timing`` con el total y el tiempo de
+renderizado, de servicios externos y el resultado de las cachés, visible en la
+pestaña de red del navegador.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_app_context, has_request_context, request, template_rendered, before_render_template
+
+from serving import lock_exclusive
+
+logger = logging.getLogger(__name__)
+
+# Segundos; de 1 ms a 10 s cubre desde una página cacheada hasta una API lenta
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Tipos cuyos valores se acumulan en el archivo cuando muere un worker
+ARCHIVED_KINDS = ('counter', 'histogram')
+ARCHIVE_FILENAME = 'archive.json'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        # Cubo no acumulado: el primero cuyo límite es >= value (el último es +Inf)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), [list(counts), total]] for labels, (counts, total) in self._values.items()]
+
+
+class Registry:
+    """Conjunto de métricas de un proceso."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name, help, labels=()):
+        return self._metrics.setdefault(name, Counter(name, help, tuple(labels)))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._metrics.setdefault(name, Histogram(name, help, tuple(labels), buckets))
+
+    def snapshot(self):
+        """Estado serializable en JSON, para volcarlo a disco y sumarlo con otros procesos."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def merge(self, snapshots):
+        """Suma varios ``snapshot()``: ``{nombre: {etiquetas: valor}}``."""
+        merged = {name: {} for name in self._metrics}
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                target = merged[name]
+                for labels, value in values:
+                    labels = tuple(labels)
+                    if metric.kind == 'counter':
+                        target[labels] = target.get(labels, 0) + value
+                        continue
+                    counts, total = value
+                    if len(counts) != len(metric.buckets) + 1:
+                        continue  # Volcado de otra versión con otros cubos
+                    current = target.get(labels)
+                    if current is None:
+                        target[labels] = [list(counts), total]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], counts)]
+                        current[1] += total
+        return merged
+
+    def archivable(self, snapshots):
+        """Suma de ``snapshots`` en formato ``snapshot()``, solo con contadores e histogramas."""
+        merged = self.merge(snapshots)
+        return {name: [[list(labels), value] for labels, value in merged[name].items()]
+                for name, metric in self._metrics.items() if metric.kind in ARCHIVED_KINDS}
+
+    def render(self, snapshots):
+        """Texto en el formato de exposición de Prometheus (versión 0.0.4)."""
+        merged = self.merge(snapshots)
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, value in sorted(merged[name].items()):
+                pairs = list(zip(metric.labels, labels))
+                if metric.kind == 'counter':
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(pairs + [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(pairs)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (f'{key}="{_escape(value)}"' for key, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Métricas de la aplicación ---------------------------------------------------
+
+registry = Registry()
+REQUEST_LATENCY = registry.histogram(
+    'freirefpv_http_request_duration_seconds', 'Duración de las peticiones HTTP',
+    ('route', 'method', 'status'))
+UPSTREAM_LATENCY = registry.histogram(
+    'freirefpv_upstream_request_duration_seconds', 'Duración de las llamadas a servicios externos',
+    ('service', 'outcome'))
+RENDER_LATENCY = registry.histogram(
+    'freirefpv_template_render_duration_seconds', 'Duración del renderizado de plantillas',
+    ('template',))
+CACHE_REQUESTS = registry.counter(
+    'freirefpv_cache_requests_total', 'Consultas a las cachés por resultado',
+    ('cache', 'result'))
+
+
+def server_timing(name, duration=None, description=None):
+    """Añade (o acumula) una entrada a la cabecera ``Server-Timing`` de la petición en curso."""
+    if not has_request_context():
+        return
+    timings = g.get('_server_timing')
+    if timings is None:
+        return
+    entry = timings.setdefault(name, [None, None])
+    if duration is not None:
+        entry[0] = (entry[0] or 0) + duration
+    if description is not None:
+        entry[1] = description
+
+
+def cache_event(cache, result):
+    """Cuenta una consulta a ``cache`` (``hit``, ``miss``, ``stale``...)."""
+    CACHE_REQUESTS.inc(cache, result)
+    server_timing(f"cache-{cache}", description=result)
+
+
+@contextmanager
+def upstream_timer(service):
+    """Mide una llamada a un servicio externo; si lanza una excepción cuenta como ``error``."""
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_LATENCY.observe(elapsed, service, outcome)
+        server_timing('upstream', elapsed)
+
+
+class Instrumentation:
+    """Mide las peticiones y plantillas de la app y publica las métricas de todos los workers."""
+
+    def __init__(self, app, enabled=True, directory=None, dump_interval=10, timing_header=True):
+        self.enabled = enabled
+        self.directory = directory
+        self.dump_interval = dump_interval
+        self.timing_header = timing_header
+        self._last_dump = 0
+        self._dump_lock = threading.Lock()
+        # PID con el que se volcó por última vez; cambia tras un fork (gunicorn --preload)
+        self._dump_pid = None
+
+        if not enabled:
+            return
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._start_render, app)
+        template_rendered.connect(self._finish_render, app)
+
+    # Peticiones -----------------------------------------------------------------
+
+    def _start_request(self):
+        g._metrics_start = time.perf_counter()
+        g._server_timing = {}
+
+    def _finish_request(self, response):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        # La plantilla de la ruta y no la URL, para no crear una serie por testimonio o vídeo
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_LATENCY.observe(elapsed, route, request.method, str(response.status_code))
+
+        if self.timing_header:
+            entries = [f"total;dur={elapsed * 1000:.1f}"]
+            for name, (duration, description) in g.pop('_server_timing', {}).items():
+                entry = name
+                if duration is not None:
+                    entry += f";dur={duration * 1000:.1f}"
+                if description is not None:
+                    entry += f';desc="{description}"'
+                entries.append(entry)
+            response.headers['Server-Timing'] = ', '.join(entries)
+
+        if self.directory and time.monotonic() - self._last_dump >= self.dump_interval:
+            self.dump()
+        return response
+
+    # Plantillas -------------------------------------------------------------------
+
+    def _start_render(self, sender, template, context, **extra):
+        if has_app_context():
+            g.setdefault('_render_starts', []).append(time.perf_counter())
+
+    def _finish_render(self, sender, template, context, **extra):
+        starts = g.get('_render_starts') if has_app_context() else None
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        RENDER_LATENCY.observe(elapsed, template.name or 'string')
+        server_timing('render', elapsed)
+
+    # Volcado y agregación entre procesos ---------------------------------------
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def dump(self):
+        """Escribe el estado de este proceso de forma atómica."""
+        if not self._dump_lock.acquire(blocking=False):
+            return  # Otro hilo ya está volcando
+        try:
+            self._last_dump = time.monotonic()
+            path = self._path(os.getpid())
+            if self._dump_pid != os.getpid():
+                # Si ya hay un fichero con nuestro PID es de un worker muerto que lo usaba antes
+                if os.path.exists(path):
+                    with self._archive_lock():
+                        self._archive(path)
+                self._dump_pid = os.getpid()
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(registry.snapshot(), fh)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"No se pudieron volcar las métricas a {self.directory}: {e}")
+        finally:
+            self._dump_lock.release()
+
+    @contextmanager
+    def _archive_lock(self):
+        with open(os.path.join(self.directory, ARCHIVE_FILENAME + '.lock'), 'a') as lock:
+            lock_exclusive(lock)
+            yield
+
+    def _archive(self, path):
+        """Suma el volcado de un worker muerto a ``archive.json`` y lo borra (con el lock tomado)."""
+        if not os.path.exists(path):
+            return  # Otro worker lo archivó mientras esperábamos el lock
+        dead = _load(path)
+        if dead is not None:
+            archive_path = os.path.join(self.directory, ARCHIVE_FILENAME)
+            archive = _load(archive_path) or {}
+            tmp_path = f"{archive_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(registry.archivable([archive, dead]), fh)
+            os.replace(tmp_path, archive_path)
+        os.remove(path)
+
+    def _worker_snapshots(self):
+        # Con el lock, para no leer el volcado de un worker y además el archivo al que otro lo acaba de sumar
+        with self._archive_lock():
+            snapshots = []
+            for filename in os.listdir(self.directory):
+                pid, ext = os.path.splitext(filename)
+                if ext != '.json' or not pid.isdigit():
+                    continue
+                path = os.path.join(self.directory, filename)
+                if int(pid) != os.getpid() and not _alive(int(pid)):
+                    self._archive(path)
+                    continue
+                snapshot = _load(path)
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+            archive = _load(os.path.join(self.directory, ARCHIVE_FILENAME))
+            if archive is not None:
+                snapshots.append(archive)
+            return snapshots
+
+    def render(self):
+        """Métricas de todos los workers en formato Prometheus."""
+        if not self.directory:
+            return registry.render([registry.snapshot()])
+        self.dump()
+        try:
+            return registry.render(self._worker_snapshots())
+        except OSError as e:
+            logger.warning(f"No se pudieron leer las métricas de {self.directory}: {e}")
+            return registry.render([registry.snapshot()])
+
+
+def _load(path):
+    """Volcado JSON de ``path``; ``None`` si ya no existe."""
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logger.warning(f"Volcado de métricas ilegible en {path}: {e}")
+        return None
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -30,6 +30,13 @@ class Contacto(db.Model):
 
 class Testimonio(db.Model):
     """Modelo para los testimonios de clientes"""
+    __table_args__ = (
+        # Listado público: aprobados del más reciente al más antiguo (paginación por cursor)
+        db.Index('ix_testimonio_aprobado_fecha', 'aprobado', 'fecha_creacion'),
+        # Borrado por el autor a partir de su token
+        db.Index('ix_testimonio_token', 'token'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(150), nullable=False)
     ocupacion = db.Column(db.String(150), nullable=False)
@@ -48,4 +55,36 @@ class Testimonio(db.Model):
             'texto': self.texto,
             'fecha_creacion': self.fecha_creacion.strftime('%d %B %Y'),
             'aprobado': self.aprobado
-        }
\ No newline at end of file
+        }
+
+class NotificacionPendiente(db.Model):
+    """Correo pendiente de enviar por el despachador de notificaciones"""
+    __table_args__ = (
+        # Los workers buscan los trabajos cuyo siguiente intento ya ha vencido
+        db.Index('ix_notificacion_proximo_intento', 'proximo_intento'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    origen = db.Column(db.String(50), nullable=False)  # 'pedido' o 'contacto'
+    destinatario = db.Column(db.String(150), nullable=False)
+    responder_a = db.Column(db.String(150), nullable=True)
+    asunto = db.Column(db.String(200), nullable=False)
+    cuerpo = db.Column(db.Text, nullable=False)
+    intentos = db.Column(db.Integer, default=0, nullable=False)
+    proximo_intento = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    bloqueado_hasta = db.Column(db.DateTime, nullable=True)  # Reservado por un worker hasta esta hora
+    ultimo_error = db.Column(db.Text, nullable=True)
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+
+class NotificacionFallida(db.Model):
+    """Correos descartados tras agotar los reintentos (dead letter)"""
+    id = db.Column(db.Integer, primary_key=True)
+    origen = db.Column(db.String(50), nullable=False)
+    destinatario = db.Column(db.String(150), nullable=False)
+    responder_a = db.Column(db.String(150), nullable=True)
+    asunto = db.Column(db.String(200), nullable=False)
+    cuerpo = db.Column(db.Text, nullable=False)
+    intentos = db.Column(db.Integer, nullable=False)
+    ultimo_error = db.Column(db.Text, nullable=True)
+    fecha_creacion = db.Column(db.DateTime)
+    fecha_fallo = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,351 @@
+"""Despachador de notificaciones por correo (SMTP) con cola persistente.
+
+Las rutas no envían correo: solo añaden filas a ``NotificacionPendiente`` en la
+misma transacción que guarda el pedido o el mensaje de contacto, así que nunca
+esperan al servidor de correo. Un pequeño pool de hilos por worker:
+
+* reserva en bloque los trabajos vencidos (``UPDATE ... WHERE bloqueado_hasta``
+  con comprobación de filas afectadas, seguro entre procesos);
+* los envía reutilizando una conexión SMTP por hilo;
+* si un envío falla, reprograma el trabajo con backoff exponencial y jitter, y
+  tras ``max_attempts`` lo mueve a ``NotificacionFallida`` (dead letter).
+
+Para probarlo en local: ``python benchmarks/smtp_sink.py --port 8025`` y
+``SMTP_HOST=127.0.0.1 SMTP_PORT=8025``.
+"""
+import logging
+import os
+import random
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import or_, update
+
+from models import NotificacionFallida, NotificacionPendiente, db
+
+logger = logging.getLogger(__name__)
+
+# Campos del formulario de contacto y longitud máxima (la del modelo)
+CONTACT_FIELDS = {'nombre': 150, 'email': 150, 'telefono': 50, 'asunto': 200}
+MAX_MENSAJE = 5000
+
+
+class NotificationError(ValueError):
+    """Datos de contacto no válidos."""
+
+
+def validate_contact(data):
+    """Limpia y valida el formulario de contacto; devuelve los campos de ``Contacto``."""
+    if not isinstance(data, dict):
+        raise NotificationError("Envía un objeto JSON")
+    contact = {}
+    for field, max_length in CONTACT_FIELDS.items():
+        value = str(data.get(field) or '').strip()
+        if not value:
+            raise NotificationError(f"Falta el campo {field}")
+        if len(value) > max_length:
+            raise NotificationError(f"El campo {field} admite como máximo {max_length} caracteres")
+        contact[field] = value
+
+    from email_validator import EmailNotValidError, validate_email
+
+    try:
+        contact['email'] = validate_email(contact['email'], check_deliverability=False).normalized
+    except EmailNotValidError:
+        raise NotificationError("El email no es válido")
+    mensaje = str(data.get('mensaje') or '').strip()
+    if not mensaje:
+        raise NotificationError("Falta el campo mensaje")
+    if len(mensaje) > MAX_MENSAJE:
+        raise NotificationError(f"El mensaje admite como máximo {MAX_MENSAJE} caracteres")
+    contact['mensaje'] = mensaje
+    return contact
+
+
+# Textos de los correos (los mismos que enviaba EmailJS desde el navegador) ------
+
+def pedido_messages(pedido, admin_email):
+    admin_body = (
+        "Nuevo pedido de Freire FPV\n"
+        f"Tipo de servicio: {pedido.tipo_servicio}\n"
+        f"Precio base: {pedido.precio_base}\n"
+        f"Ubicación: {pedido.ubicacion}\n"
+        f"Duración aproximada: {pedido.duracion}\n"
+        f"Nombre: {pedido.nombre}\n"
+        f"Email: {pedido.email}\n"
+        f"Teléfono: {pedido.telefono}\n"
+        + (f"Mensaje adicional: {pedido.mensaje}\n" if pedido.mensaje else "")
+    )
+    client_body = (
+        f"Hola {pedido.nombre},\n\n"
+        "¡Gracias por solicitar nuestros servicios de grabación con drones FPV!\n\n"
+        "Hemos recibido tu pedido:\n"
+        f"- Servicio: {pedido.tipo_servicio}\n"
+        f"- Ubicación: {pedido.ubicacion}\n"
+        f"- Duración: {pedido.duracion}\n\n"
+        "Te contactaremos en un plazo máximo de 24 horas para confirmar todos los detalles.\n\n"
+        "Saludos,\nCarlos Freire\nFreire FPV\n"
+    )
+    return [
+        NotificacionPendiente(origen='pedido', destinatario=admin_email, responder_a=pedido.email,
+                              asunto='Nuevo pedido de Freire FPV', cuerpo=admin_body),
+        NotificacionPendiente(origen='pedido', destinatario=pedido.email, responder_a=admin_email,
+                              asunto='Confirmación de tu pedido - Freire FPV', cuerpo=client_body),
+    ]
+
+
+def contacto_messages(contacto, admin_email):
+    admin_body = (
+        "Consulta de contacto - Freire FPV\n"
+        f"Nombre: {contacto.nombre}\n"
+        f"Email: {contacto.email}\n"
+        f"Teléfono: {contacto.telefono}\n"
+        f"Asunto: {contacto.asunto}\n"
+        f"Mensaje: {contacto.mensaje}\n"
+    )
+    client_body = (
+        f"Hola {contacto.nombre},\n\n"
+        "¡Gracias por contactar con Freire FPV!\n\n"
+        f"Hemos recibido tu consulta sobre: {contacto.asunto}\n\n"
+        "Te contactaremos en un plazo máximo de 24 horas.\n\n"
+        "Saludos,\nCarlos Freire\nFreire FPV\n"
+    )
+    return [
+        NotificacionPendiente(origen='contacto', destinatario=admin_email, responder_a=contacto.email,
+                              asunto='Consulta de contacto - Freire FPV', cuerpo=admin_body),
+        NotificacionPendiente(origen='contacto', destinatario=contacto.email, responder_a=admin_email,
+                              asunto='Hemos recibido tu consulta - Freire FPV', cuerpo=client_body),
+    ]
+
+
+class NotificationDispatcher:
+    """Pool de hilos que vacía ``NotificacionPendiente`` por SMTP."""
+
+    def __init__(self, app, host=None, port=25, username=None, password=None, use_tls=False,
+                 use_ssl=False, sender='Freire FPV <no-reply@freirefpv.com>',
+                 admin_email='carlosfreire777@gmail.com', workers=2, batch_size=20,
+                 poll_interval=5.0, lease=120, max_attempts=6, backoff_base=30,
+                 max_backoff=3600, smtp_timeout=10, idle_timeout=30):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.sender = sender
+        self.admin_email = admin_email
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.smtp_timeout = smtp_timeout
+        self.idle_timeout = idle_timeout
+
+        self.stats = {'sent': 0, 'retried': 0, 'dead': 0}
+        self._pid = None
+        self._threads = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.host)
+
+    # Encolado (en la transacción de la ruta) -----------------------------------
+
+    def enqueue(self, jobs):
+        """Añade los trabajos a la sesión actual; se guardan con el ``commit`` del llamante."""
+        if not self.enabled:
+            return
+        db.session.add_all(jobs)
+
+    def enqueue_pedidos(self, pedidos):
+        for pedido in pedidos:
+            self.enqueue(pedido_messages(pedido, self.admin_email))
+
+    def enqueue_contacto(self, contacto):
+        self.enqueue(contacto_messages(contacto, self.admin_email))
+
+    def notify(self):
+        """Despierta a los hilos de este worker tras confirmar nuevos trabajos."""
+        self._wake.set()
+
+    # Pool de hilos ------------------------------------------------------------
+
+    def ensure_started(self):
+        """Arranca el pool en este proceso (se comprueba el PID por el fork de gunicorn)."""
+        if not self.enabled or (self._pid == os.getpid() and any(t.is_alive() for t in self._threads)):
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and any(t.is_alive() for t in self._threads):
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._threads = [threading.Thread(target=self._run, name=f"notifications-{i}", daemon=True)
+                             for i in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        smtp, last_used = None, 0
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    jobs = self._claim()
+                    if jobs:
+                        smtp = self._send_batch(smtp, jobs, last_used)
+                        last_used = time.monotonic()
+            except Exception as e:
+                logger.error(f"Error en el despachador de notificaciones: {e}")
+                smtp = self._close(smtp)
+                jobs = None
+            if not jobs:
+                if smtp is not None and time.monotonic() - last_used > self.idle_timeout:
+                    smtp = self._close(smtp)
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+        self._close(smtp)
+
+    def _claim(self):
+        """Reserva hasta ``batch_size`` trabajos vencidos para este hilo."""
+        now = datetime.utcnow()
+        free = or_(NotificacionPendiente.bloqueado_hasta.is_(None),
+                   NotificacionPendiente.bloqueado_hasta < now)
+        candidates = [row.id for row in (
+            NotificacionPendiente.query.with_entities(NotificacionPendiente.id)
+            .filter(NotificacionPendiente.proximo_intento <= now, free)
+            .order_by(NotificacionPendiente.proximo_intento)
+            .limit(self.batch_size).all())]
+        claimed = []
+        lease_until = now + timedelta(seconds=self.lease)
+        for job_id in candidates:
+            # Solo uno de los hilos (de cualquier proceso) consigue cambiar la fila
+            result = db.session.execute(
+                update(NotificacionPendiente)
+                .where(NotificacionPendiente.id == job_id, free)
+                .values(bloqueado_hasta=lease_until))
+            if result.rowcount == 1:
+                claimed.append(job_id)
+        db.session.commit()
+        if not claimed:
+            return []
+        return NotificacionPendiente.query.filter(NotificacionPendiente.id.in_(claimed)).all()
+
+    def _send_batch(self, smtp, jobs, last_used):
+        try:
+            smtp = self._connection(smtp, last_used)
+        except (smtplib.SMTPException, OSError) as e:
+            # Servidor caído o credenciales rechazadas: cuenta como intento de todo el lote
+            logger.error(f"No se pudo conectar con el servidor SMTP: {e}")
+            for job in jobs:
+                self._fail(job, e)
+            db.session.commit()
+            return None
+        for job in jobs:
+            try:
+                smtp = self._send(smtp, job)
+                db.session.delete(job)
+                self._count('sent')
+            except (smtplib.SMTPException, OSError) as e:
+                smtp = self._close(smtp) if not isinstance(e, smtplib.SMTPResponseException) else smtp
+                self._fail(job, e)
+            db.session.commit()
+        return smtp
+
+    def _send(self, smtp, job):
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = job.destinatario
+        if job.responder_a:
+            message['Reply-To'] = job.responder_a
+        message['Subject'] = job.asunto
+        message.set_content(job.cuerpo)
+        if smtp is None:
+            smtp = self._connect()
+        try:
+            smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # La conexión reutilizada caducó en el servidor: una reconexión y reintento
+            smtp = self._connect()
+            smtp.send_message(message)
+        return smtp
+
+    def _fail(self, job, error):
+        job.intentos += 1
+        job.ultimo_error = str(error)[:1000]
+        job.bloqueado_hasta = None
+        permanent = isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+        if permanent or job.intentos >= self.max_attempts:
+            db.session.add(NotificacionFallida(
+                origen=job.origen, destinatario=job.destinatario, responder_a=job.responder_a,
+                asunto=job.asunto, cuerpo=job.cuerpo, intentos=job.intentos,
+                ultimo_error=job.ultimo_error, fecha_creacion=job.fecha_creacion))
+            db.session.delete(job)
+            self._count('dead')
+            logger.error(f"Notificación {job.id} a {job.destinatario} descartada: {error}")
+            return
+        delay = min(self.max_backoff, self.backoff_base * 2 ** (job.intentos - 1))
+        delay *= random.uniform(0.9, 1.1)
+        job.proximo_intento = datetime.utcnow() + timedelta(seconds=delay)
+        self._count('retried')
+        logger.warning(f"Notificación {job.id} reintentará en {delay:.0f}s: {error}")
+
+    # Conexión SMTP ------------------------------------------------------------
+
+    def _connect(self):
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.smtp_timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.smtp_timeout)
+            if self.use_tls:
+                smtp.starttls()
+        if self.username:
+            try:
+                smtp.login(self.username, self.password)
+            except (smtplib.SMTPException, OSError):
+                self._close(smtp)
+                raise
+        return smtp
+
+    def _connection(self, smtp, last_used):
+        """Reutiliza la conexión del hilo si sigue viva (NOOP tras un rato sin uso)."""
+        if smtp is None:
+            return self._connect()
+        if time.monotonic() - last_used > self.idle_timeout / 2:
+            try:
+                smtp.noop()
+            except (smtplib.SMTPException, OSError):
+                self._close(smtp)
+                return self._connect()
+        return smtp
+
+    def _close(self, smtp):
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+        return None
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def health(self):
+        with self.app.app_context():
+            pending = NotificacionPendiente.query.count()
+            dead = NotificacionFallida.query.count()
+        return {'enabled': self.enabled, 'pending': pending, 'dead_letters': dead, **self.stats}
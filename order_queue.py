@@ -0,0 +1,275 @@
+"""Recepción de pedidos con escritura diferida y por lotes.
+
+``/api/pedidos`` solo valida el pedido y lo deja en una cola acotada en memoria;
+un hilo por worker la vacía y guarda los pedidos en la base de datos en lotes
+de hasta ``batch_size`` con una sola transacción. Así una ráfaga de reservas
+tras una campaña cuesta una transacción por lote y no una por petición.
+
+Garantías:
+
+* Cola llena: ``submit`` lanza ``OrderQueueFull`` y la ruta responde 503 con
+  ``Retry-After`` (contrapresión en vez de crecer sin límite).
+* Al apagar el worker (``atexit``, que gunicorn ejecuta al salir por SIGTERM)
+  se vacía la cola. Lo que no se pueda guardar porque la base de datos no
+  responde se anexa a un fichero JSONL que se recupera al arrancar.
+
+Con ``enabled=False`` (p. ej. en Vercel, donde no hay hilos persistentes) cada
+pedido se guarda en la misma petición.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from models import Pedido, db
+from serving import lock_exclusive
+
+logger = logging.getLogger(__name__)
+
+# Campos obligatorios y longitud máxima (la del modelo)
+REQUIRED_FIELDS = {
+    'tipo_servicio': 100,
+    'precio_base': 50,
+    'ubicacion': 200,
+    'duracion': 100,
+    'nombre': 150,
+    'email': 150,
+    'telefono': 50,
+}
+MAX_MENSAJE = 2000
+
+
+class OrderError(ValueError):
+    """Pedido con datos no válidos."""
+
+
+class OrderQueueFull(Exception):
+    """La cola de pedidos está llena; el cliente debe reintentar."""
+
+
+def validate_order(data):
+    """Limpia y valida los datos del formulario; devuelve los campos de ``Pedido``."""
+    if not isinstance(data, dict):
+        raise OrderError("Envía un objeto JSON")
+    order = {}
+    for field, max_length in REQUIRED_FIELDS.items():
+        value = str(data.get(field) or '').strip()
+        if not value:
+            raise OrderError(f"Falta el campo {field}")
+        if len(value) > max_length:
+            raise OrderError(f"El campo {field} admite como máximo {max_length} caracteres")
+        order[field] = value
+    # email_validator tarda en importarse: se carga con el primer pedido, no al arrancar
+    from email_validator import EmailNotValidError, validate_email
+
+    try:
+        order['email'] = validate_email(order['email'], check_deliverability=False).normalized
+    except EmailNotValidError:
+        raise OrderError("El email no es válido")
+    mensaje = str(data.get('mensaje') or '').strip()
+    if len(mensaje) > MAX_MENSAJE:
+        raise OrderError(f"El mensaje admite como máximo {MAX_MENSAJE} caracteres")
+    order['mensaje'] = mensaje or None
+    order['fecha_solicitud'] = datetime.utcnow().isoformat()
+    return order
+
+
+def _to_model(order):
+    return Pedido(**{**order, 'fecha_solicitud': datetime.fromisoformat(order['fecha_solicitud'])})
+
+
+class OrderWriter:
+    """Cola acotada de pedidos y escritor por lotes en segundo plano."""
+
+    def __init__(self, app, spill_path, batch_size=50, max_delay=1.0, max_queue=1000,
+                 retry_delay=2.0, enabled=True, notifier=None):
+        self.app = app
+        self.notifier = notifier
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.retry_delay = retry_delay
+        self.enabled = enabled
+        self.queue = queue.Queue(maxsize=max_queue)
+
+        self.stats = {'accepted': 0, 'written': 0, 'batches': 0, 'rejected': 0, 'spilled': 0}
+        self._stats_lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def submit(self, order):
+        """Encola un pedido ya validado (o lo guarda directamente si la cola está desactivada)."""
+        if not self.enabled:
+            self._write([order])
+            self._count('accepted')
+            return
+        self.ensure_started()
+        try:
+            self.queue.put_nowait(order)
+        except queue.Full:
+            self._count('rejected')
+            raise OrderQueueFull()
+        self._count('accepted')
+
+    def ensure_started(self):
+        """Arranca el hilo escritor en este proceso (se comprueba el PID por el fork de gunicorn)."""
+        if not self.enabled or (self._pid == os.getpid() and self._thread.is_alive()):
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self.recover()
+            self._thread = threading.Thread(target=self._run, name="order-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            while batch:
+                try:
+                    self._write(batch)
+                    batch = None
+                except Exception as e:
+                    logger.error(f"No se pudo guardar un lote de {len(batch)} pedidos: {e}")
+                    if self._stop.wait(self.retry_delay):
+                        # Apagando: shutdown() se encarga de lo que quede
+                        self._requeue_or_spill(batch)
+                        return
+
+    def _next_batch(self):
+        """Espera el primer pedido y junta los que lleguen en ``max_delay`` segundos."""
+        try:
+            batch = [self.queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        with self.app.app_context():
+            try:
+                pedidos = [_to_model(order) for order in batch]
+                db.session.add_all(pedidos)
+                if self.notifier is not None:
+                    # Los avisos por correo se guardan en la misma transacción que los pedidos
+                    self.notifier.enqueue_pedidos(pedidos)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        if self.notifier is not None:
+            self.notifier.notify()
+        self._count('written', len(batch))
+        self._count('batches')
+
+    def _requeue_or_spill(self, batch):
+        for order in batch:
+            try:
+                self.queue.put_nowait(order)
+            except queue.Full:
+                self._spill([order])
+
+    def shutdown(self, timeout=5.0):
+        """Detiene el hilo y guarda (o vuelca a disco) todo lo que quede en la cola."""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        pending = []
+        while True:
+            try:
+                pending.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.error(f"Base de datos no disponible al apagar, se guardan {len(batch)} pedidos en {self.spill_path}: {e}")
+                self._spill(batch)
+
+    def _count(self, key, amount=1):
+        # Lo actualizan los hilos de las peticiones y el hilo escritor
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    # Fichero de pedidos pendientes ---------------------------------------------
+
+    def _spill(self, orders):
+        os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+        with open(self.spill_path, 'a', encoding='utf-8') as fh:
+            lock_exclusive(fh)
+            for order in orders:
+                fh.write(json.dumps(order, ensure_ascii=False) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+        self._count('spilled', len(orders))
+
+    def recover(self):
+        """Guarda los pedidos que quedaron en el fichero de pendientes en un apagado anterior."""
+        if not os.path.exists(self.spill_path):
+            return 0
+        with open(self.spill_path, 'r+', encoding='utf-8') as fh:
+            # El bloqueo evita que dos workers recuperen los mismos pedidos
+            lock_exclusive(fh)
+            orders, corrupt = [], []
+            for line in fh:
+                if not line.strip():
+                    continue
+                try:
+                    order = json.loads(line)
+                except ValueError:
+                    order = None
+                # Una línea a medias (SIGKILL o disco lleno al volcar) no debe bloquear las demás
+                if isinstance(order, dict):
+                    orders.append(order)
+                else:
+                    corrupt.append(line if line.endswith('\n') else line + '\n')
+            if corrupt:
+                self._quarantine(corrupt)
+            if not orders:
+                fh.seek(0)
+                fh.truncate()
+                return 0
+            written = 0
+            try:
+                while written < len(orders):
+                    batch = orders[written:written + self.batch_size]
+                    self._write(batch)
+                    written += len(batch)
+            except Exception as e:
+                logger.error(f"No se pudieron recuperar los pedidos pendientes: {e}")
+            # Solo se conservan los que no se hayan podido guardar
+            fh.seek(0)
+            fh.truncate()
+            for order in orders[written:]:
+                fh.write(json.dumps(order, ensure_ascii=False) + '\n')
+        if written:
+            logger.info(f"Recuperados {written} pedidos pendientes de {self.spill_path}")
+        return written
+
+    def _quarantine(self, lines):
+        """Aparta las líneas ilegibles del fichero de pendientes para revisarlas a mano."""
+        path = self.spill_path + '.corrupt'
+        with open(path, 'a', encoding='utf-8') as fh:
+            fh.writelines(lines)
+        logger.error(f"{len(lines)} líneas ilegibles en {self.spill_path}, apartadas en {path}")
@@ -0,0 +1,131 @@
+"""Caché de páginas completas ya renderizadas para las rutas sin datos dinámicos.
+
+Las páginas cuyo contenido solo depende de la configuración fijada al arrancar
+(p. ej. ``emailjs_public_key``) se renderizan una vez y se guardan como bytes,
+junto con sus variantes gzip y brotli y un ETag fuerte por variante. Cada
+petición solo negocia la codificación y responde, o devuelve 304 si el cliente
+ya tiene la versión. En modo debug (o con ``PAGE_CACHE=0``) se renderiza en cada
+petición para que los cambios en las plantillas se vean al momento.
+
+Las respuestas JSON que cambian de vez en cuando (el tiempo, las páginas de
+testimonios) usan lo mismo: ``VersionedPage`` serializa cada versión de los
+datos una sola vez y ``PageCache.serve`` la sirve con su ETag de contenido.
+"""
+import gzip
+import hashlib
+import json
+import threading
+
+from flask import current_app, make_response, render_template, request
+
+from metrics import cache_event
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se sirve gzip
+    brotli = None
+
+# Por debajo de este tamaño comprimir apenas ahorra bytes y cuesta CPU al crear la versión
+COMPRESS_MIN_BYTES = 1024
+
+
+def json_body(data):
+    """Serializa ``data`` a JSON compacto en UTF-8."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class CachedPage:
+    """Cuerpo de una página en cada codificación, con su ETag.
+
+    Con ``min_compress`` los cuerpos más pequeños se sirven solo sin comprimir.
+    """
+
+    def __init__(self, body, min_compress=0):
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {'identity': (body, digest)}
+        if len(body) < min_compress:
+            return
+        self.variants['gzip'] = (gzip.compress(body, compresslevel=9, mtime=0), f"{digest}-gz")
+        if brotli is not None:
+            self.variants['br'] = (brotli.compress(body, quality=11), f"{digest}-br")
+
+
+class VersionedPage:
+    """Última versión serializada de unos datos que cambian de vez en cuando.
+
+    ``get(version, build)`` solo llama a ``build()`` (que devuelve los bytes)
+    cuando la versión es distinta de la guardada; con ``enabled=False`` lo hace
+    siempre.
+    """
+
+    def __init__(self, name, min_compress=COMPRESS_MIN_BYTES, enabled=True):
+        self.name = name
+        self.min_compress = min_compress
+        self.enabled = enabled
+        self._entry = None  # (versión, CachedPage), se sustituye de una vez
+        self._lock = threading.Lock()
+
+    def get(self, version, build):
+        entry = self._entry
+        if self.enabled and entry is not None and entry[0] == version:
+            cache_event(self.name, 'hit')
+            return entry[1]
+        cache_event(self.name, 'miss')
+        with self._lock:
+            # Otra petición pudo serializar esta versión mientras esperábamos
+            entry = self._entry
+            if self.enabled and entry is not None and entry[0] == version:
+                return entry[1]
+            page = CachedPage(build(), min_compress=self.min_compress)
+            self._entry = (version, page)
+        return page
+
+
+class PageCache:
+    """Renderiza cada plantilla una sola vez y sirve los bytes con ETag y compresión."""
+
+    def __init__(self, enabled=True, max_age=300):
+        self.enabled = enabled
+        self.max_age = max_age
+        self._pages = {}
+
+    def render(self, template_name, **context):
+        if not self.enabled or current_app.debug:
+            return render_template(template_name, **context)
+
+        key = (template_name, tuple(sorted(context.items())))
+        page = self._pages.get(key)
+        cache_event('page', 'miss' if page is None else 'hit')
+        if page is None:
+            # Si dos peticiones llegan a la vez se renderiza dos veces, sin más consecuencias
+            page = CachedPage(render_template(template_name, **context).encode('utf-8'))
+            self._pages[key] = page
+        return self.serve(page)
+
+    def serve(self, page, content_type='text/html; charset=utf-8', max_age=None):
+        """Responde con la variante de ``page`` que acepta el cliente (o 304 si ya la tiene)."""
+        encoding = self._negotiate(page)
+        body, etag = page.variants[encoding]
+
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(body)
+            response.content_type = content_type
+            if encoding != 'identity':
+                response.content_encoding = encoding
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = self.max_age if max_age is None else max_age
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def _negotiate(self, page):
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in page.variants and accepted[encoding]:
+                return encoding
+        return 'identity'
+
+    def clear(self):
+        self._pages.clear()
@@ -0,0 +1,211 @@
+"""Limitador de peticiones por token bucket para las rutas de escritura.
+
+Cada clave (IP del cliente, token de un testimonio...) tiene un cubo con
+``capacity`` fichas que se rellena a ``capacity / period`` fichas por segundo.
+Comprobar una petición es O(1): se recalculan las fichas a partir del tiempo
+transcurrido y se gasta una. Si no quedan, la vista ni se ejecuta y se responde
+429 con ``Retry-After``. Cuando una ruta tiene varias reglas y una rechaza la
+petición, se devuelven las fichas que ya habían gastado las anteriores: una
+petición no atendida no cuenta en ningún límite.
+
+Dos almacenes:
+
+* ``MemoryBackend``: diccionario con expulsión LRU de las claves inactivas, así
+  que la memoria está acotada aunque un bot rote IPs o tokens. Es por proceso.
+* ``SQLiteBackend``: un fichero SQLite compartido por todos los workers de
+  gunicorn (``RATE_LIMIT_SHARED=1``). Cada comprobación es una transacción
+  ``BEGIN IMMEDIATE`` sobre la clave primaria; las filas que ya estarían llenas
+  se podan periódicamente.
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import jsonify, request
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+class Limit:
+    """``capacity`` peticiones cada ``period`` segundos, con ráfagas de hasta ``capacity``."""
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+
+    def __repr__(self):
+        return f"Limit({self.capacity}/{self.period}s)"
+
+
+def parse_limit(text):
+    """``"3/hour"`` o ``"3/3600"`` -> ``Limit(3, 3600)``."""
+    count, _, period = text.partition('/')
+    period = period.strip()
+    seconds = PERIODS.get(period) or float(period)
+    return Limit(int(count), seconds)
+
+
+def _consume(tokens, updated, now, limit):
+    """Rellena el cubo y gasta una ficha: ``(fichas, segundos de espera)``."""
+    tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / limit.rate
+
+
+class MemoryBackend:
+    """Cubos en memoria del proceso, con como mucho ``max_keys`` claves."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.capacity, now))
+            tokens, retry_after = _consume(tokens, updated, now, limit)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def refund(self, key, limit):
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated = self._buckets[key]
+                self._buckets[key] = (min(limit.capacity, tokens + 1), updated)
+
+
+class SQLiteBackend:
+    """Cubos en un fichero SQLite compartido entre procesos."""
+
+    def __init__(self, path, prune_interval=300):
+        self.path = path
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._last_prune = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets ("
+                         "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, "
+                         "expires REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_buckets_expires ON buckets (expires)")
+
+    def _connect(self):
+        # Una conexión por hilo y por proceso (no se puede heredar tras un fork)
+        conn, pid = getattr(self._local, 'conn', (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = (conn, os.getpid())
+        return conn
+
+    def hit(self, key, limit, now=None):
+        # Reloj de pared: el monotónico no es comparable entre procesos
+        now = time.time() if now is None else now
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (limit.capacity, now)
+            tokens, retry_after = _consume(tokens, updated, now, limit)
+            # Pasado ``expires`` el cubo volvería a estar lleno y la fila sobra
+            expires = now + (limit.capacity - tokens) / limit.rate
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated, expires) VALUES (?, ?, ?, ?)",
+                         (key, tokens, now, expires))
+            if now - self._last_prune > self.prune_interval:
+                conn.execute("DELETE FROM buckets WHERE expires < ?", (now,))
+                self._last_prune = now
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return retry_after
+
+    def refund(self, key, limit):
+        conn = self._connect()
+        tokens = "MIN(tokens + 1, :capacity)"
+        conn.execute(f"UPDATE buckets SET tokens = {tokens}, "
+                     f"expires = updated + (:capacity - {tokens}) / :rate WHERE key = :key",
+                     {'capacity': limit.capacity, 'rate': limit.rate, 'key': key})
+
+
+class RateLimiter:
+    """Aplica límites por clave a las vistas con el decorador ``limit``."""
+
+    def __init__(self, backend, enabled=True):
+        self.backend = backend
+        self.enabled = enabled
+
+    def check(self, scope, key, limit):
+        """Segundos que hay que esperar (0 si la petición se permite)."""
+        if not self.enabled:
+            return 0
+        try:
+            return self.backend.hit(f"{scope}:{key}", limit)
+        except sqlite3.Error as e:
+            # Si el almacén compartido falla no bloqueamos a los usuarios legítimos
+            logger.warning(f"Limitador no disponible ({scope}): {e}")
+            return 0
+
+    def refund(self, scope, key, limit):
+        """Devuelve la ficha gastada por ``check`` en una petición que no se atiende."""
+        if not self.enabled:
+            return
+        try:
+            self.backend.refund(f"{scope}:{key}", limit)
+        except sqlite3.Error as e:
+            logger.warning(f"Limitador no disponible ({scope}): {e}")
+
+    def limit(self, scope, rules):
+        """Decorador: ``rules`` es una lista de ``(nombre, función de clave, Limit)``.
+
+        La función de clave recibe los argumentos de la vista y devuelve la
+        clave (o ``None`` para no aplicar esa regla).
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                charged = []
+                for name, key_func, limit in rules:
+                    key = key_func(**kwargs)
+                    if key is None:
+                        continue
+                    retry_after = self.check(f"{scope}:{name}", key, limit)
+                    if retry_after:
+                        for charged_scope, charged_key, charged_limit in charged:
+                            self.refund(charged_scope, charged_key, charged_limit)
+                        response = jsonify({
+                            "success": False,
+                            "error": "Demasiadas peticiones. Inténtalo de nuevo más tarde."
+                        })
+                        response.status_code = 429
+                        response.headers['Retry-After'] = str(math.ceil(retry_after))
+                        return response
+                    charged.append((f"{scope}:{name}", key, limit))
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def client_ip(**kwargs):
+    return request.remote_addr
+
+
+def create_backend(shared=False, path=None, max_keys=10000):
+    if shared:
+        try:
+            return SQLiteBackend(path)
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo abrir {path}, el limitador será por proceso: {e}")
+    return MemoryBackend(max_keys=max_keys)
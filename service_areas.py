@@ -0,0 +1,220 @@
+"""Registro de las zonas de servicio de Freire FPV.
+
+Es la fuente única de las zonas que se muestran en el mapa de contacto, de las
+que se consulta el tiempo en ``/api/weather/areas`` y de la cobertura de
+``/api/cobertura``. ``distance`` son los kilómetros por carretera desde la base
+de operaciones (Torremolinos).
+
+Para saber qué zona cubre un punto, ``AreaIndex`` reparte las zonas en una
+rejilla (celdas de tamaño según la densidad de zonas) y solo mira las celdas
+alrededor del punto, de dentro hacia fuera, hasta que ninguna celda sin mirar
+puede tener una zona más cercana. El coste depende de las zonas cercanas y no
+del total.
+"""
+import math
+
+from service_catalog import price_range
+
+SERVICE_AREAS = [
+    {'slug': 'malaga-capital', 'name': 'Málaga Capital', 'lat': 36.7213, 'lon': -4.4214,
+     'description': 'Sede principal', 'distance': 15,
+     'info': 'Centro económico y cultural de la provincia'},
+    {'slug': 'marbella', 'name': 'Marbella', 'lat': 36.5092, 'lon': -4.8862,
+     'description': 'Servicio completo', 'distance': 48,
+     'info': 'Destino turístico de lujo en la Costa del Sol'},
+    {'slug': 'fuengirola', 'name': 'Fuengirola', 'lat': 36.5394, 'lon': -4.6248,
+     'description': 'Servicio completo', 'distance': 18,
+     'info': 'Popular destino de playa con ambiente familiar'},
+    {'slug': 'benalmadena', 'name': 'Benalmádena', 'lat': 36.5951, 'lon': -4.5162,
+     'description': 'Servicio completo', 'distance': 8,
+     'info': 'Conocida por su puerto deportivo y parque de atracciones'},
+    {'slug': 'torremolinos', 'name': 'Torremolinos', 'lat': 36.6225, 'lon': -4.4986,
+     'description': 'Servicio completo', 'distance': 0,
+     'info': 'Base de operaciones principal con disponibilidad inmediata'},
+    {'slug': 'nerja', 'name': 'Nerja', 'lat': 36.7446, 'lon': -3.8768,
+     'description': 'Servicio bajo demanda', 'distance': 65,
+     'info': 'Famosa por sus cuevas y acantilados impresionantes'},
+    {'slug': 'estepona', 'name': 'Estepona', 'lat': 36.4277, 'lon': -5.1466,
+     'description': 'Servicio bajo demanda', 'distance': 70,
+     'info': 'Ciudad costera con encanto andaluz tradicional'},
+    {'slug': 'ronda', 'name': 'Ronda', 'lat': 36.7429, 'lon': -5.1675,
+     'description': 'Servicio bajo demanda', 'distance': 85,
+     'info': 'Impresionante ciudad de montaña con vistas panorámicas'},
+    {'slug': 'rincon-de-la-victoria', 'name': 'Rincón de la Victoria', 'lat': 36.7172, 'lon': -4.2773,
+     'description': 'Servicio completo', 'distance': 22,
+     'info': 'Zona residencial con hermosas playas'},
+    {'slug': 'antequera', 'name': 'Antequera', 'lat': 37.0192, 'lon': -4.5633,
+     'description': 'Servicio bajo demanda', 'distance': 52,
+     'info': 'Ciudad histórica con impresionante patrimonio'},
+]
+
+_AREAS_BY_SLUG = {area['slug']: area for area in SERVICE_AREAS}
+
+
+def get_area(slug):
+    """Devuelve la zona con ese slug o None."""
+    return _AREAS_BY_SLUG.get(slug)
+
+
+def map_areas():
+    """Zonas en el formato que espera el mapa de Mapbox (``coordinates`` = [lon, lat])."""
+    return [
+        {'name': area['name'], 'coordinates': [area['lon'], area['lat']],
+         'description': area['description'], 'distance': area['distance'], 'info': area['info']}
+        for area in SERVICE_AREAS
+    ]
+
+
+# Un punto está cubierto si está a menos de COVERAGE_RADIUS_KM del centro de alguna zona
+COVERAGE_RADIUS_KM = 20
+
+EARTH_RADIUS_KM = 6371.0
+# A partir de esta distancia de la zona ocupada, AreaIndex recorre todas las zonas (nunca habrá cobertura)
+FAR_KM = 200
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distancia en km sobre la esfera entre dos puntos."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class AreaIndex:
+    """Rejilla regular sobre los centros de las zonas para buscar la más cercana."""
+
+    def __init__(self, areas, cell_deg=None):
+        if cell_deg is None:
+            # Unas pocas zonas por celda: celdas más pequeñas cuanto más densas son las zonas
+            lat_span = max(a['lat'] for a in areas) - min(a['lat'] for a in areas)
+            lon_span = max(a['lon'] for a in areas) - min(a['lon'] for a in areas)
+            cell_deg = min(0.25, max(0.01, 2 * math.sqrt(lat_span * lon_span / len(areas))))
+        self.cell_deg = cell_deg
+        self.areas = list(areas)
+        self.cells = {}
+        for area in areas:
+            self.cells.setdefault(self._cell(area['lat'], area['lon']), []).append(area)
+        rows = [row for row, _ in self.cells]
+        cols = [col for _, col in self.cells]
+        self.bounds = (min(rows), max(rows), min(cols), max(cols))
+        self._max_abs_lat = max(abs(min(rows)), abs(max(rows) + 1)) * cell_deg
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def nearest(self, lat, lon):
+        """``(zona, km)`` de la zona más cercana al punto."""
+        row, col = self._cell(lat, lon)
+        min_row, max_row, min_col, max_col = self.bounds
+        # Cota inferior de los km que recorre una celda: la longitud se estrecha con la latitud
+        # (con margen, porque el arco de círculo máximo es algo más corto que el del paralelo)
+        widest_lat = min(89.0, max(self._max_abs_lat, abs(lat) + self.cell_deg))
+        cell_km = 0.99 * self.cell_deg * KM_PER_DEGREE * math.cos(math.radians(widest_lat))
+        # Los anillos anteriores al primero que toca la rejilla ocupada están vacíos, y después del último no queda nada
+        first_ring = max(min_row - row, row - max_row, min_col - col, col - max_col, 0)
+        if first_ring * cell_km > FAR_KM:
+            # Lejos de todas las zonas la rejilla plana deja de ser una cota fiable: se miran todas
+            return min(((area, haversine_km(lat, lon, area['lat'], area['lon'])) for area in self.areas),
+                       key=lambda pair: pair[1])
+        last_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+        best, best_km = None, math.inf
+        for ring in range(first_ring, last_ring + 1):
+            for cell in _ring_cells(row, col, ring, self.bounds):
+                for area in self.cells.get(cell, ()):
+                    km = haversine_km(lat, lon, area['lat'], area['lon'])
+                    if km < best_km:
+                        best, best_km = area, km
+            # Las celdas de los anillos siguientes están al menos a ``ring`` celdas del punto
+            if best_km <= ring * cell_km:
+                break
+        return best, best_km
+
+
+def _ring_cells(row, col, ring, bounds):
+    """Celdas a distancia ``ring`` (en celdas) de la del punto, solo dentro de la zona ocupada."""
+    min_row, max_row, min_col, max_col = bounds
+    if ring == 0:
+        yield row, col
+        return
+    cols = range(max(col - ring, min_col), min(col + ring, max_col) + 1)
+    for r in (row - ring, row + ring):
+        if min_row <= r <= max_row:
+            for c in cols:
+                yield r, c
+    rows = range(max(row - ring + 1, min_row), min(row + ring - 1, max_row) + 1)
+    for c in (col - ring, col + ring):
+        if min_col <= c <= max_col:
+            for r in rows:
+                yield r, c
+
+
+AREA_INDEX = AreaIndex(SERVICE_AREAS)
+
+
+def travel_surcharge(travel_km, free_km, eur_per_km):
+    """Recargo en euros por los km del trayecto que pasan de ``free_km``."""
+    return round(max(0, travel_km - free_km) * eur_per_km)
+
+
+def coverage(lat, lon, services=None, index=AREA_INDEX, travel_rate=None):
+    """Zona más cercana a un punto, si está cubierto, recargo y presupuesto orientativo.
+
+    El trayecto es la distancia por carretera hasta la zona más la distancia en
+    línea recta de la zona al punto. ``services`` limita el precio base a esos
+    servicios del catálogo (todos por defecto). ``travel_rate`` es la tarifa de
+    desplazamiento ``(km incluidos, euros por km)``. Sin tarifa, o fuera de
+    cobertura, no hay presupuesto (``travel_surcharge`` y ``total`` son None).
+    """
+    area, km = index.nearest(lat, lon)
+    covered = km <= COVERAGE_RADIUS_KM
+    travel_km = area['distance'] + round(km)
+    quoted = covered and travel_rate is not None
+    surcharge = travel_surcharge(travel_km, *travel_rate) if quoted else None
+    base_from, base_to = price_range(services)
+    total = None
+    if quoted:
+        total = {'from': base_from + surcharge, 'to': base_to + surcharge if base_to is not None else None}
+    return {
+        'lat': lat,
+        'lon': lon,
+        'covered': covered,
+        'area': {key: area[key] for key in ('slug', 'name', 'description', 'distance')},
+        'distance_km': round(km, 1),
+        'on_demand': area['description'] != 'Servicio completo',
+        'travel_km': travel_km,
+        'travel_surcharge': surcharge,
+        'base_price': {'from': base_from, 'to': base_to},
+        'total': total,
+    }
+
+
+def coverage_geojson(points=32):
+    """Zonas para el mapa en GeoJSON: el centro de cada una y su círculo de cobertura."""
+    features = []
+    for area in SERVICE_AREAS:
+        properties = {key: area[key] for key in ('slug', 'name', 'description', 'distance', 'info')}
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [area['lon'], area['lat']]},
+            'properties': dict(properties, kind='area'),
+        })
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Polygon', 'coordinates': [_circle(area['lat'], area['lon'],
+                                                                    COVERAGE_RADIUS_KM, points)]},
+            'properties': dict(properties, kind='coverage', radius_km=COVERAGE_RADIUS_KM),
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def _circle(lat, lon, radius_km, points):
+    """Anillo cerrado (lon, lat) que aproxima un círculo de ese radio."""
+    ring = []
+    for i in range(points + 1):
+        angle = 2 * math.pi * (i % points) / points
+        d_lat = radius_km * math.cos(angle) / KM_PER_DEGREE
+        d_lon = radius_km * math.sin(angle) / (KM_PER_DEGREE * math.cos(math.radians(lat)))
+        ring.append([round(lon + d_lon, 5), round(lat + d_lat, 5)])
+    return ring
@@ -0,0 +1,49 @@
+"""Catálogo de servicios con sus precios base.
+
+Es la fuente única de los precios: ``servicios.html`` muestra ``label`` (y lo
+envía como ``precio_base`` al hacer un pedido) y ``/api/cobertura`` usa
+``price_from``/``price_to`` para calcular presupuestos. ``price_to`` es None
+cuando el precio es "desde" sin tope.
+"""
+
+SERVICES = [
+    {'slug': 'casas-villas', 'name': 'Casas/Villas', 'price_from': 150, 'price_to': None,
+     'label': 'Desde 150€ (1-2 horas)'},
+    {'slug': 'edificios', 'name': 'Edificios/Construcciones', 'price_from': 150, 'price_to': None,
+     'label': 'Desde 150€ (según duración)'},
+    {'slug': 'eventos', 'name': 'Eventos', 'price_from': 150, 'price_to': None,
+     'label': 'Desde 150€ (según horas)'},
+    {'slug': 'colegios', 'name': 'Colegios', 'price_from': 200, 'price_to': 250,
+     'label': 'Desde 200-250€ (según proyecto)'},
+    {'slug': 'naturaleza', 'name': 'Naturaleza y Paisajes', 'price_from': 50, 'price_to': 200,
+     'label': 'Desde 50-200€ (según duración y ubicación)'},
+    {'slug': 'deportes', 'name': 'Deportes y Acción', 'price_from': 100, 'price_to': None,
+     'label': 'Desde 100€ (según horas y ubicación)'},
+    {'slug': 'bodas', 'name': 'Bodas y Celebraciones Especiales', 'price_from': 250, 'price_to': None,
+     'label': 'Desde 250€ (según duración y detalles)'},
+    {'slug': 'publicidad', 'name': 'Publicidad y Marketing', 'price_from': 150, 'price_to': None,
+     'label': 'Desde 150€ (según proyecto y complejidad)'},
+    {'slug': 'inspecciones', 'name': 'Inspecciones Técnicas', 'price_from': 50, 'price_to': None,
+     'label': 'Desde 50€ (según complejidad)'},
+]
+
+_SERVICES_BY_SLUG = {service['slug']: service for service in SERVICES}
+
+
+def get_service(slug):
+    """Devuelve el servicio con ese slug o None."""
+    return _SERVICES_BY_SLUG.get(slug)
+
+
+def price_label(slug):
+    """Texto del precio tal y como se muestra en la web (global de Jinja)."""
+    return _SERVICES_BY_SLUG[slug]['label']
+
+
+def price_range(services=None):
+    """``(desde, hasta)`` de los servicios indicados (todos por defecto); ``hasta`` es None sin tope."""
+    services = SERVICES if services is None else services
+    price_from = min(service['price_from'] for service in services)
+    tops = [service['price_to'] for service in services]
+    price_to = None if None in tops else max(tops)
+    return price_from, price_to
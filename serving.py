@@ -0,0 +1,40 @@
+"""Utilidades para servir la app con workers síncronos o asíncronos (gevent).
+
+Con ``SERVING_MODE=async`` (ver ``gunicorn.conf.py``) cada worker de gunicorn
+es un bucle de eventos gevent: los sockets, ``time.sleep`` y los bloqueos de
+``threading`` quedan parcheados y ceden el control mientras esperan, así que una
+petición que espera a OpenWeather no ocupa el proceso y uno solo puede mantener
+cientos de conexiones abiertas.
+
+Lo que gevent no puede parchear son las llamadas al sistema que bloquean, como
+``fcntl.flock`` sin ``LOCK_NB``: bloquearían todo el worker. ``lock_exclusive``
+las sustituye por intentos no bloqueantes con pausas cortas cuando el proceso
+corre con gevent, y por el ``flock`` de siempre en los workers síncronos.
+"""
+import fcntl
+import sys
+import time
+
+
+def cooperative():
+    """``True`` si el proceso corre con gevent y los bloqueos deben ceder el control."""
+    # Si gevent no se ha importado, nada está parcheado (y no se paga su importación)
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('socket')
+
+
+def lock_exclusive(fh, blocking=True, poll_interval=0.02):
+    """``flock`` exclusivo; con ``blocking=False`` lanza ``BlockingIOError`` si está ocupado."""
+    if not blocking:
+        fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return
+    if not cooperative():
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            # time.sleep está parcheado: el resto de peticiones siguen atendiéndose
+            time.sleep(poll_interval)
@@ -0,0 +1,741 @@
+document.addEventListener('DOMContentLoaded', function() {
+if (typeof emailjs !== 'undefined') {
+if (typeof window._emailjsInit !== 'undefined') {
+} else {
+}
+const contactForm = document.getElementById('contact-form');
+if (contactForm) {
+}
+const servicioForm = document.getElementById('servicio-form');
+if (servicioForm) {
+}
+} else {
+}
+});
+;
+document.addEventListener('DOMContentLoaded', function() {
+});
+document.addEventListener('DOMContentLoaded', function() {
+const heroVideo = document.getElementById('hero-background-video');
+const preloadingContainer = document.getElementById('preloading-container');
+const gifSlides = document.querySelectorAll('.gif-slide');
+if (heroVideo && preloadingContainer && gifSlides.length > 0) {
+heroVideo.currentTime = 0;
+heroVideo.muted = true;
+let currentGifIndex = 0;
+let gifIntervalId;
+function showNextGif() {
+gifSlides[currentGifIndex].classList.remove('active');
+currentGifIndex = (currentGifIndex + 1) % gifSlides.length;
+gifSlides[currentGifIndex].classList.add('active');
+if (currentGifIndex === gifSlides.length - 1) {
+checkVideoReady();
+}
+}
+gifIntervalId = setInterval(showNextGif, 2000);
+function checkVideoReady() {
+if (heroVideo.readyState >= 3) {
+clearInterval(gifIntervalId);
+setTimeout(() => {
+heroVideo.play().then(() => {
+setTimeout(() => {
+preloadingContainer.classList.add('hidden');
+}, 500);
+}).catch(e => {
+console.error('Error al iniciar el video tras los GIFs:', e);
+});
+}, 1500);
+} else {
+}
+}
+heroVideo.addEventListener('loadeddata', function() {
+});
+heroVideo.addEventListener('loadedmetadata', function() {
+});
+heroVideo.addEventListener('canplay', function() {
+if (currentGifIndex === gifSlides.length - 1) {
+checkVideoReady();
+}
+});
+heroVideo.addEventListener('error', function(e) {
+console.error('Error al cargar el video de fondo:', e.target.error);
+});
+heroVideo.addEventListener('pause', function() {
+setTimeout(() => heroVideo.play().catch(e => void 0), 100);
+});
+heroVideo.addEventListener('playing', () => void 0);
+heroVideo.addEventListener('waiting', () => void 0);
+heroVideo.addEventListener('ended', () => void 0);
+try {
+heroVideo.load();
+} catch(e) {
+console.error('Error al forzar la carga del video de fondo:', e);
+}
+}
+});
+document.addEventListener('DOMContentLoaded', function() {
+const mobileMenu = document.getElementById('mobile-menu');
+const navMenu = document.querySelector('.nav-menu');
+if (mobileMenu) {
+mobileMenu.addEventListener('click', function() {
+mobileMenu.classList.toggle('active');
+navMenu.classList.toggle('active');
+const bars = mobileMenu.querySelectorAll('.bar');
+if (mobileMenu.classList.contains('active')) {
+bars[0].style.transform = 'rotate(-45deg) translate(-5px, 6px)';
+bars[1].style.opacity = '0';
+bars[2].style.transform = 'rotate(45deg) translate(-5px, -6px)';
+} else {
+bars[0].style.transform = 'none';
+bars[1].style.opacity = '1';
+bars[2].style.transform = 'none';
+}
+});
+}
+const navLinks = document.querySelectorAll('.nav-link');
+navLinks.forEach(link => {
+link.addEventListener('click', () => {
+if (navMenu.classList.contains('active')) {
+mobileMenu.click();
+}
+});
+});
+const animateElements = document.querySelectorAll('.animate-on-scroll');
+function checkScroll() {
+const triggerBottom = window.innerHeight * 0.8;
+animateElements.forEach(element => {
+const elementTop = element.getBoundingClientRect().top;
+if (elementTop < triggerBottom) {
+element.classList.add('show');
+}
+});
+}
+checkScroll();
+window.addEventListener('scroll', checkScroll);
+const modal = document.getElementById('servicio-modal');
+const modalButtons = document.querySelectorAll('.open-modal');
+const closeModal = document.querySelector('.close-modal');
+const successMessage = document.getElementById('success-message');
+const closeSuccessButton = document.querySelector('.btn-close');
+modalButtons.forEach(button => {
+button.addEventListener('click', function() {
+const serviceCard = this.closest('.service-card');
+const serviceType = serviceCard.dataset.service;
+const servicePrice = serviceCard.dataset.precio;
+document.getElementById('tipo-servicio').value = serviceType;
+document.getElementById('precio-base').value = servicePrice;
+modal.classList.add('show');
+document.body.style.overflow = 'hidden';
+});
+});
+if (closeModal) {
+closeModal.addEventListener('click', function() {
+modal.classList.remove('show');
+document.body.style.overflow = 'auto';
+});
+}
+window.addEventListener('click', function(event) {
+if (event.target === modal) {
+modal.classList.remove('show');
+document.body.style.overflow = 'auto';
+}
+});
+const servicioForm = document.getElementById('servicio-form');
+if (servicioForm) {
+servicioForm.addEventListener('submit', function(e) {
+e.preventDefault();
+const tipoServicio = document.getElementById('tipo-servicio').value;
+const precioBase = document.getElementById('precio-base').value;
+const ubicacion = document.getElementById('ubicacion').value;
+const duracion = document.getElementById('duracion').value;
+const nombre = document.getElementById('nombre').value;
+const email = document.getElementById('email').value;
+const telefono = document.getElementById('telefono').value;
+const mensaje = document.getElementById('mensaje').value;
+const templateParams = {
+from_name: nombre,
+tipo_servicio: tipoServicio,
+precio_base: precioBase,
+ubicacion: ubicacion,
+duracion: duracion,
+email: email,
+telefono: telefono,
+mensaje: mensaje
+};
+templateParams.to_email = 'carlosfreire777@gmail.com';
+templateParams.subject = 'Nuevo pedido de Freire FPV';
+templateParams.message = `
+Nuevo pedido de Freire FPV
+Tipo de servicio: ${tipoServicio}
+Precio base: ${precioBase}
+Ubicación: ${ubicacion}
+Duración aproximada: ${duracion}
+Nombre: ${nombre}
+Email: ${email}
+Teléfono: ${telefono}
+${mensaje ? 'Mensaje adicional: ' + mensaje : ''}
+`;
+const adminParams = {
+from_name: nombre,
+email: email,
+telefono: telefono,
+tipo_servicio: tipoServicio,
+precio_base: precioBase,
+ubicacion: ubicacion,
+duracion: duracion,
+mensaje: mensaje,
+to_email: 'carlosfreire777@gmail.com',
+subject: 'Nuevo pedido de Freire FPV',
+message: `
+Nuevo pedido de Freire FPV
+Tipo de servicio: ${tipoServicio}
+Precio base: ${precioBase}
+Ubicación: ${ubicacion}
+Duración aproximada: ${duracion}
+Nombre: ${nombre}
+Email: ${email}
+Teléfono: ${telefono}
+${mensaje ? 'Mensaje adicional: ' + mensaje : ''}
+`
+};
+const clientParams = {
+from_name: 'Freire FPV',
+to_email: email,
+subject: 'Confirmación de tu pedido - Freire FPV',
+message: `
+Hola ${nombre},
+¡Gracias por solicitar nuestros servicios de grabación con drones FPV!
+Hemos recibido tu pedido:
+- Servicio: ${tipoServicio}
+- Ubicación: ${ubicacion}
+- Duración: ${duracion}
+Te contactaremos en un plazo máximo de 24 horas para confirmar todos los detalles.
+Saludos,
+Carlos Freire
+Freire FPV
+`
+};
+const pedidoRequest = fetch('/api/pedidos', {
+method: 'POST',
+headers: { 'Content-Type': 'application/json' },
+keepalive: true,
+body: JSON.stringify({
+tipo_servicio: tipoServicio,
+precio_base: precioBase,
+ubicacion: ubicacion,
+duracion: duracion,
+nombre: nombre,
+email: email,
+telefono: telefono,
+mensaje: mensaje
+})
+}).then(response => {
+if (!response.ok) throw new Error('HTTP ' + response.status);
+return response;
+});
+let delivery;
+if (window.serverNotifications) {
+delivery = pedidoRequest;
+} else {
+pedidoRequest.catch(error => void 0);
+delivery = emailjs.send('service_k65jk6c', 'template_1exdmsp', adminParams)
+.then(function(response) {
+return emailjs.send('service_k65jk6c', 'template_tnzvsui', clientParams);
+});
+}
+delivery
+.then(function() {
+modal.classList.remove('show');
+successMessage.style.display = 'flex';
+servicioForm.reset();
+const flyingDrone = document.createElement('div');
+flyingDrone.className = 'flying-drone';
+document.body.appendChild(flyingDrone);
+setTimeout(() => {
+document.body.removeChild(flyingDrone);
+}, 5000);
+})
+.catch(function(error) {
+alert("Error al enviar, intenta de nuevo");
+});
+});
+}
+if (closeSuccessButton) {
+closeSuccessButton.addEventListener('click', function() {
+successMessage.style.display = 'none';
+document.body.style.overflow = 'auto';
+});
+}
+const contactForm = document.getElementById('contact-form');
+if (contactForm) {
+const contactSubmitBtn = document.getElementById('contacto-submit-btn');
+contactForm.addEventListener('submit', function(e) {
+e.preventDefault();
+contactSubmitBtn.classList.add('sending');
+contactSubmitBtn.innerHTML = '<span>Enviando...</span>';
+const nombre = document.getElementById('nombre-contacto').value;
+const email = document.getElementById('email-contacto').value;
+const telefono = document.getElementById('telefono-contacto').value;
+const asunto = document.getElementById('asunto').value;
+const mensaje = document.getElementById('mensaje-contacto').value;
+const adminContactParams = {
+from_name: nombre,
+email: email,
+telefono: telefono,
+asunto: asunto,
+mensaje: mensaje,
+to_email: 'carlosfreire777@gmail.com',
+subject: 'Consulta de contacto - Freire FPV',
+message: `
+Consulta de contacto - Freire FPV
+Asunto: ${asunto}
+Nombre: ${nombre}
+Email: ${email}
+Teléfono: ${telefono}
+Mensaje: ${mensaje}
+`
+};
+const clientContactParams = {
+from_name: 'Freire FPV',
+to_email: email,
+subject: 'Hemos recibido tu consulta - Freire FPV',
+message: `
+Hola ${nombre},
+¡Gracias por contactar con Freire FPV!
+Hemos recibido tu consulta sobre "${asunto}" y te responderemos a la mayor brevedad posible.
+Te contactaremos en un plazo máximo de 24 horas.
+Saludos,
+Carlos Freire
+Freire FPV
+`
+};
+const contactoRequest = fetch('/api/contacto', {
+method: 'POST',
+headers: { 'Content-Type': 'application/json' },
+keepalive: true,
+body: JSON.stringify({
+nombre: nombre,
+email: email,
+telefono: telefono,
+asunto: asunto,
+mensaje: mensaje
+})
+}).then(response => {
+if (!response.ok) throw new Error('HTTP ' + response.status);
+return response;
+});
+let delivery;
+if (window.serverNotifications) {
+delivery = contactoRequest;
+} else {
+contactoRequest.catch(error => void 0);
+delivery = emailjs.send('service_k65jk6c', 'template_1exdmsp', adminContactParams)
+.then(function(response) {
+return emailjs.send('service_k65jk6c', 'template_tnzvsui', clientContactParams);
+});
+}
+delivery
+.then(function() {
+contactSubmitBtn.classList.remove('sending');
+contactSubmitBtn.classList.add('sent');
+contactSubmitBtn.innerHTML = '<span>¡Enviado!</span>';
+successMessage.style.display = 'flex';
+contactForm.reset();
+const flyingDrone = document.createElement('div');
+flyingDrone.className = 'flying-drone';
+document.body.appendChild(flyingDrone);
+setTimeout(() => {
+document.body.removeChild(flyingDrone);
+}, 5000);
+setTimeout(() => {
+contactSubmitBtn.classList.remove('sent');
+contactSubmitBtn.innerHTML = '<span>Enviar Mensaje</span>';
+}, 3000);
+})
+.catch(function(error) {
+contactSubmitBtn.classList.remove('sending');
+contactSubmitBtn.innerHTML = '<span>Enviar Mensaje</span>';
+alert("Error al enviar, intenta de nuevo");
+});
+});
+}
+const accordionItems = document.querySelectorAll('.accordion-item');
+if(accordionItems.length > 0) {
+const firstItem = accordionItems[0];
+const firstIcon = firstItem.querySelector('.accordion-icon');
+firstItem.classList.add('active');
+firstIcon.textContent = '−';
+}
+accordionItems.forEach(item => {
+const header = item.querySelector('.accordion-header');
+const icon = item.querySelector('.accordion-icon');
+header.addEventListener('click', () => {
+const isActive = item.classList.contains('active');
+accordionItems.forEach(otherItem => {
+if (otherItem !== item) {
+otherItem.classList.remove('active');
+const otherIcon = otherItem.querySelector('.accordion-icon');
+otherIcon.textContent = '+';
+}
+});
+if (isActive) {
+item.classList.remove('active');
+icon.textContent = '+';
+} else {
+item.classList.add('active');
+icon.textContent = '−';
+}
+if (!isActive) {
+setTimeout(() => {
+header.scrollIntoView({ behavior: 'smooth', block: 'center' });
+}, 300);
+}
+});
+});
+});
+;
+class VideoOptimizer {
+constructor() {
+this.isMobile = this.checkIfMobile();
+this.videoObserver = null;
+this.observedVideos = new Map();
+this.initObserver();
+}
+checkIfMobile() {
+const userAgent = navigator.userAgent.toLowerCase();
+return /android|webos|iphone|ipad|ipod|blackberry|iemobile|opera mini/i.test(userAgent);
+}
+initObserver() {
+if ('IntersectionObserver' in window) {
+this.videoObserver = new IntersectionObserver((entries) => {
+entries.forEach(entry => {
+const video = entry.target;
+if (entry.isIntersecting) {
+this.loadVideo(video);
+} else {
+this.unloadVideo(video);
+}
+});
+}, {
+threshold: 0.1,
+rootMargin: '100px'
+});
+}
+}
+registerVideos() {
+const videos = document.querySelectorAll('video');
+videos.forEach(video => {
+const isCarouselVideo = video.classList.contains('drone-video');
+const isHeroVideo = video.id === 'hero-background-video';
+const hasLazyloadDisabled = video.dataset.lazyload === 'false';
+if (!isCarouselVideo && !isHeroVideo && !hasLazyloadDisabled) {
+this.observedVideos.set(video, {
+loaded: false,
+originalSources: []
+});
+if (video.dataset.lazyload !== 'false') {
+video.querySelectorAll('source').forEach(source => {
+source.dataset.src = source.src;
+source.removeAttribute('src');
+});
+if (this.videoObserver) {
+this.videoObserver.observe(video);
+}
+}
+}
+});
+}
+loadVideo(video) {
+const videoData = this.observedVideos.get(video);
+if (videoData && !videoData.loaded) {
+const sources = video.querySelectorAll('source');
+sources.forEach(source => {
+if (source.dataset.src) {
+if (this.isMobile && source.dataset.mobileSrc) {
+source.src = source.dataset.mobileSrc;
+} else {
+source.src = source.dataset.src;
+}
+}
+});
+video.load();
+if (video.dataset.autoplay === 'true') {
+setTimeout(() => {
+video.play().catch(e => {
+console.warn(`VideoOptimizer: No se pudo reproducir automáticamente: ${e.message}`);
+});
+}, 100);
+}
+videoData.loaded = true;
+}
+}
+unloadVideo(video) {
+const videoData = this.observedVideos.get(video);
+if (videoData && videoData.loaded) {
+if (!video.paused) {
+video.pause();
+}
+}
+}
+optimizeForMobile(video) {
+if (this.isMobile) {
+video.setAttribute('preload', 'metadata');
+const mobileSource = video.querySelector('source[data-mobile-src]');
+if (mobileSource && mobileSource.dataset.mobileSrc) {
+mobileSource.src = mobileSource.dataset.mobileSrc;
+video.load();
+}
+}
+}
+cleanup(video) {
+if (this.videoObserver) {
+this.videoObserver.unobserve(video);
+}
+this.observedVideos.delete(video);
+}
+destroy() {
+if (this.videoObserver) {
+this.videoObserver.disconnect();
+}
+this.observedVideos.clear();
+}
+}
+document.addEventListener('DOMContentLoaded', function() {
+window.videoOptimizer = new VideoOptimizer();
+setTimeout(() => {
+window.videoOptimizer.registerVideos();
+}, 100);
+});
+if (typeof module !== 'undefined' && module.exports) {
+module.exports = VideoOptimizer;
+}
+;
+document.addEventListener('DOMContentLoaded', function() {
+const buttons = document.querySelectorAll('.btn-primary:not(:has(span)), .btn-submit:not(:has(span)), .btn-ver-mas:not(:has(span))');
+buttons.forEach(button => {
+if (!button.querySelector('span')) {
+const content = button.innerHTML;
+button.innerHTML = `<span>${content}</span>`;
+}
+});
+document.body.addEventListener('mousedown', handleButtonEffect);
+document.body.addEventListener('touchstart', handleButtonEffect, {passive: true});
+function handleButtonEffect(e) {
+let targetElement = e.target;
+let buttonElement = null;
+for (let i = 0; i < 3; i++) {
+if (!targetElement) break;
+if (targetElement.classList &&
+(targetElement.classList.contains('btn-primary') ||
+targetElement.classList.contains('btn-submit') ||
+targetElement.classList.contains('btn-ver-mas'))) {
+buttonElement = targetElement;
+break;
+}
+targetElement = targetElement.parentElement;
+}
+if (buttonElement) {
+let x, y;
+if (e.type === 'touchstart') {
+const touch = e.touches[0];
+x = touch.clientX - buttonElement.getBoundingClientRect().left;
+y = touch.clientY - buttonElement.getBoundingClientRect().top;
+} else {
+x = e.clientX - buttonElement.getBoundingClientRect().left;
+y = e.clientY - buttonElement.getBoundingClientRect().top;
+}
+buttonElement.style.setProperty('--click-x', `${x}px`);
+buttonElement.style.setProperty('--click-y', `${y}px`);
+buttonElement.classList.add('button-clicked');
+setTimeout(() => {
+buttonElement.classList.remove('button-clicked');
+}, 500);
+}
+}
+});
+;
+document.addEventListener('DOMContentLoaded', function() {
+setTimeout(() => {
+initializePropellerAnimations();
+}, 100);
+});
+function initializePropellerAnimations() {
+const allPropellers = document.querySelectorAll('.propeller-symbol');
+allPropellers.forEach(propeller => {
+propeller.classList.remove('propeller-spinning');
+propeller.classList.remove('propeller-spinning-slow');
+propeller.style.animation = 'none';
+propeller.offsetHeight;
+propeller.style.animation = null;
+});
+if (allPropellers.length === 0) {
+return;
+}
+function spinPropeller(propeller) {
+propeller.classList.remove('propeller-spinning');
+propeller.classList.remove('propeller-spinning-slow');
+propeller.style.animation = 'none';
+propeller.offsetHeight;
+propeller.style.animation = null;
+setTimeout(() => {
+if (Math.random() > 0.5) {
+propeller.classList.add('propeller-spinning');
+} else {
+propeller.classList.add('propeller-spinning-slow');
+}
+const duration = 1000 + Math.random() * 1000;
+setTimeout(() => {
+propeller.classList.remove('propeller-spinning');
+propeller.classList.remove('propeller-spinning-slow');
+}, duration);
+}, 10);
+}
+allPropellers.forEach(propeller => {
+propeller.addEventListener('click', function(e) {
+e.preventDefault();
+e.stopPropagation();
+spinPropeller(this);
+});
+propeller.addEventListener('mouseenter', function() {
+spinPropeller(this);
+});
+});
+}
+;
+document.addEventListener('DOMContentLoaded', function() {
+const slides = document.querySelectorAll('.carousel-slide');
+const videos = document.querySelectorAll('.drone-video');
+const nextBtn = document.querySelector('.carousel-nav-btn.next');
+const prevBtn = document.querySelector('.carousel-nav-btn.prev');
+const indicators = document.querySelectorAll('.indicator');
+let currentIndex = 0;
+let isTransitioning = false;
+function debug(msg) {
+}
+debug('Encontrados ' + slides.length + ' slides y ' + videos.length + ' videos');
+const isMobile = /android|webos|iphone|ipad|ipod|blackberry|iemobile|opera mini/i.test(navigator.userAgent);
+videos.forEach((video, index) => {
+video.preload = index === currentIndex ? 'auto' : 'metadata';
+video.setAttribute('playsinline', '');
+video.muted = true;
+const source = video.querySelector('source[data-mobile-src]');
+if (isMobile && source) {
+source.src = source.dataset.mobileSrc;
+}
+video.load();
+video.addEventListener('loadeddata', () => {
+debug(`Video ${index} cargado correctamente`);
+});
+video.addEventListener('error', (e) => {
+debug(`Error cargando video ${index}: ${e.message}`);
+});
+});
+function safePlayVideo(video, slideIndex) {
+if (!video) return;
+video.pause();
+video.currentTime = 0;
+const playPromise = video.play();
+if (playPromise !== undefined) {
+playPromise
+.then(() => {
+const spinner = slides[slideIndex]?.querySelector('.loading-spinner');
+const playBtn = slides[slideIndex]?.querySelector('.play-pause i');
+if (spinner) spinner.style.display = 'none';
+if (playBtn) playBtn.className = 'fas fa-pause';
+debug(`Video ${slideIndex} reproduciendo correctamente`);
+})
+.catch(err => {
+debug(`Error reproduciendo video ${slideIndex}: ${err.message}`);
+video.muted = true;
+setTimeout(() => {
+video.play().catch(e => debug(`Segundo intento fallido: ${e.message}`));
+}, 500);
+});
+}
+}
+setTimeout(() => {
+if (videos[0]) {
+safePlayVideo(videos[0], 0);
+}
+}, 200);
+videos.forEach((video, index) => {
+const playBtn = slides[index].querySelector('.play-pause');
+const restartBtn = slides[index].querySelector('.video-restart');
+if (playBtn) {
+playBtn.addEventListener('click', function() {
+if (video.paused) {
+safePlayVideo(video, index);
+} else {
+video.pause();
+this.querySelector('i').className = 'fas fa-play';
+}
+});
+}
+if (restartBtn) {
+restartBtn.addEventListener('click', function() {
+safePlayVideo(video, index);
+});
+}
+});
+function changeSlide(newIndex) {
+if (isTransitioning) return;
+debug('Intentando cambiar al slide ' + newIndex);
+if (newIndex < 0) newIndex = slides.length - 1;
+if (newIndex >= slides.length) newIndex = 0;
+if (newIndex === currentIndex) return;
+isTransitioning = true;
+debug('Cambiando de slide ' + currentIndex + ' a ' + newIndex);
+if (videos[currentIndex]) {
+videos[currentIndex].pause();
+const oldPlayBtn = slides[currentIndex].querySelector('.play-pause i');
+if (oldPlayBtn) oldPlayBtn.className = 'fas fa-play';
+}
+slides[currentIndex].classList.add('prev');
+slides.forEach(slide => slide.classList.remove('active'));
+indicators.forEach(indicator => indicator.classList.remove('active'));
+slides[newIndex].classList.add('active');
+if (indicators[newIndex]) {
+indicators[newIndex].classList.add('active');
+}
+currentIndex = newIndex;
+if (videos[newIndex]) {
+videos[newIndex].preload = 'auto';
+}
+setTimeout(() => {
+if (videos[newIndex]) {
+safePlayVideo(videos[newIndex], newIndex);
+}
+setTimeout(() => {
+slides.forEach(slide => slide.classList.remove('prev'));
+isTransitioning = false;
+}, 500);
+}, 100);
+debug('Slide cambiado a ' + newIndex);
+}
+if (nextBtn) {
+debug('Configurando botón siguiente');
+nextBtn.addEventListener('click', function() {
+changeSlide(currentIndex + 1);
+});
+}
+if (prevBtn) {
+debug('Configurando botón anterior');
+prevBtn.addEventListener('click', function() {
+changeSlide(currentIndex - 1);
+});
+}
+indicators.forEach((indicator, index) => {
+indicator.addEventListener('click', function() {
+changeSlide(index);
+});
+});
+document.addEventListener('keydown', function(e) {
+if (e.key === 'ArrowLeft') {
+changeSlide(currentIndex - 1);
+} else if (e.key === 'ArrowRight') {
+changeSlide(currentIndex + 1);
+}
+});
+debug('Carrusel inicializado correctamente');
+});
+;
\ No newline at end of file
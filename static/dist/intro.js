@@ -0,0 +1,116 @@
+class VideoOptimizer {
+constructor() {
+this.isMobile = this.checkIfMobile();
+this.videoObserver = null;
+this.observedVideos = new Map();
+this.initObserver();
+}
+checkIfMobile() {
+const userAgent = navigator.userAgent.toLowerCase();
+return /android|webos|iphone|ipad|ipod|blackberry|iemobile|opera mini/i.test(userAgent);
+}
+initObserver() {
+if ('IntersectionObserver' in window) {
+this.videoObserver = new IntersectionObserver((entries) => {
+entries.forEach(entry => {
+const video = entry.target;
+if (entry.isIntersecting) {
+this.loadVideo(video);
+} else {
+this.unloadVideo(video);
+}
+});
+}, {
+threshold: 0.1,
+rootMargin: '100px'
+});
+}
+}
+registerVideos() {
+const videos = document.querySelectorAll('video');
+videos.forEach(video => {
+const isCarouselVideo = video.classList.contains('drone-video');
+const isHeroVideo = video.id === 'hero-background-video';
+const hasLazyloadDisabled = video.dataset.lazyload === 'false';
+if (!isCarouselVideo && !isHeroVideo && !hasLazyloadDisabled) {
+this.observedVideos.set(video, {
+loaded: false,
+originalSources: []
+});
+if (video.dataset.lazyload !== 'false') {
+video.querySelectorAll('source').forEach(source => {
+source.dataset.src = source.src;
+source.removeAttribute('src');
+});
+if (this.videoObserver) {
+this.videoObserver.observe(video);
+}
+}
+}
+});
+}
+loadVideo(video) {
+const videoData = this.observedVideos.get(video);
+if (videoData && !videoData.loaded) {
+const sources = video.querySelectorAll('source');
+sources.forEach(source => {
+if (source.dataset.src) {
+if (this.isMobile && source.dataset.mobileSrc) {
+source.src = source.dataset.mobileSrc;
+} else {
+source.src = source.dataset.src;
+}
+}
+});
+video.load();
+if (video.dataset.autoplay === 'true') {
+setTimeout(() => {
+video.play().catch(e => {
+console.warn(`VideoOptimizer: No se pudo reproducir automáticamente: ${e.message}`);
+});
+}, 100);
+}
+videoData.loaded = true;
+}
+}
+unloadVideo(video) {
+const videoData = this.observedVideos.get(video);
+if (videoData && videoData.loaded) {
+if (!video.paused) {
+video.pause();
+}
+}
+}
+optimizeForMobile(video) {
+if (this.isMobile) {
+video.setAttribute('preload', 'metadata');
+const mobileSource = video.querySelector('source[data-mobile-src]');
+if (mobileSource && mobileSource.dataset.mobileSrc) {
+mobileSource.src = mobileSource.dataset.mobileSrc;
+video.load();
+}
+}
+}
+cleanup(video) {
+if (this.videoObserver) {
+this.videoObserver.unobserve(video);
+}
+this.observedVideos.delete(video);
+}
+destroy() {
+if (this.videoObserver) {
+this.videoObserver.disconnect();
+}
+this.observedVideos.clear();
+}
+}
+document.addEventListener('DOMContentLoaded', function() {
+window.videoOptimizer = new VideoOptimizer();
+setTimeout(() => {
+window.videoOptimizer.registerVideos();
+}, 100);
+});
+if (typeof module !== 'undefined' && module.exports) {
+module.exports = VideoOptimizer;
+}
+;
\ No newline at end of file
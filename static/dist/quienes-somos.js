@@ -0,0 +1,958 @@
+document.addEventListener('DOMContentLoaded', function() {
+if (typeof emailjs !== 'undefined') {
+if (typeof window._emailjsInit !== 'undefined') {
+} else {
+}
+const contactForm = document.getElementById('contact-form');
+if (contactForm) {
+}
+const servicioForm = document.getElementById('servicio-form');
+if (servicioForm) {
+}
+} else {
+}
+});
+;
+document.addEventListener('DOMContentLoaded', function() {
+});
+document.addEventListener('DOMContentLoaded', function() {
+const heroVideo = document.getElementById('hero-background-video');
+const preloadingContainer = document.getElementById('preloading-container');
+const gifSlides = document.querySelectorAll('.gif-slide');
+if (heroVideo && preloadingContainer && gifSlides.length > 0) {
+heroVideo.currentTime = 0;
+heroVideo.muted = true;
+let currentGifIndex = 0;
+let gifIntervalId;
+function showNextGif() {
+gifSlides[currentGifIndex].classList.remove('active');
+currentGifIndex = (currentGifIndex + 1) % gifSlides.length;
+gifSlides[currentGifIndex].classList.add('active');
+if (currentGifIndex === gifSlides.length - 1) {
+checkVideoReady();
+}
+}
+gifIntervalId = setInterval(showNextGif, 2000);
+function checkVideoReady() {
+if (heroVideo.readyState >= 3) {
+clearInterval(gifIntervalId);
+setTimeout(() => {
+heroVideo.play().then(() => {
+setTimeout(() => {
+preloadingContainer.classList.add('hidden');
+}, 500);
+}).catch(e => {
+console.error('Error al iniciar el video tras los GIFs:', e);
+});
+}, 1500);
+} else {
+}
+}
+heroVideo.addEventListener('loadeddata', function() {
+});
+heroVideo.addEventListener('loadedmetadata', function() {
+});
+heroVideo.addEventListener('canplay', function() {
+if (currentGifIndex === gifSlides.length - 1) {
+checkVideoReady();
+}
+});
+heroVideo.addEventListener('error', function(e) {
+console.error('Error al cargar el video de fondo:', e.target.error);
+});
+heroVideo.addEventListener('pause', function() {
+setTimeout(() => heroVideo.play().catch(e => void 0), 100);
+});
+heroVideo.addEventListener('playing', () => void 0);
+heroVideo.addEventListener('waiting', () => void 0);
+heroVideo.addEventListener('ended', () => void 0);
+try {
+heroVideo.load();
+} catch(e) {
+console.error('Error al forzar la carga del video de fondo:', e);
+}
+}
+});
+document.addEventListener('DOMContentLoaded', function() {
+const mobileMenu = document.getElementById('mobile-menu');
+const navMenu = document.querySelector('.nav-menu');
+if (mobileMenu) {
+mobileMenu.addEventListener('click', function() {
+mobileMenu.classList.toggle('active');
+navMenu.classList.toggle('active');
+const bars = mobileMenu.querySelectorAll('.bar');
+if (mobileMenu.classList.contains('active')) {
+bars[0].style.transform = 'rotate(-45deg) translate(-5px, 6px)';
+bars[1].style.opacity = '0';
+bars[2].style.transform = 'rotate(45deg) translate(-5px, -6px)';
+} else {
+bars[0].style.transform = 'none';
+bars[1].style.opacity = '1';
+bars[2].style.transform = 'none';
+}
+});
+}
+const navLinks = document.querySelectorAll('.nav-link');
+navLinks.forEach(link => {
+link.addEventListener('click', () => {
+if (navMenu.classList.contains('active')) {
+mobileMenu.click();
+}
+});
+});
+const animateElements = document.querySelectorAll('.animate-on-scroll');
+function checkScroll() {
+const triggerBottom = window.innerHeight * 0.8;
+animateElements.forEach(element => {
+const elementTop = element.getBoundingClientRect().top;
+if (elementTop < triggerBottom) {
+element.classList.add('show');
+}
+});
+}
+checkScroll();
+window.addEventListener('scroll', checkScroll);
+const modal = document.getElementById('servicio-modal');
+const modalButtons = document.querySelectorAll('.open-modal');
+const closeModal = document.querySelector('.close-modal');
+const successMessage = document.getElementById('success-message');
+const closeSuccessButton = document.querySelector('.btn-close');
+modalButtons.forEach(button => {
+button.addEventListener('click', function() {
+const serviceCard = this.closest('.service-card');
+const serviceType = serviceCard.dataset.service;
+const servicePrice = serviceCard.dataset.precio;
+document.getElementById('tipo-servicio').value = serviceType;
+document.getElementById('precio-base').value = servicePrice;
+modal.classList.add('show');
+document.body.style.overflow = 'hidden';
+});
+});
+if (closeModal) {
+closeModal.addEventListener('click', function() {
+modal.classList.remove('show');
+document.body.style.overflow = 'auto';
+});
+}
+window.addEventListener('click', function(event) {
+if (event.target === modal) {
+modal.classList.remove('show');
+document.body.style.overflow = 'auto';
+}
+});
+const servicioForm = document.getElementById('servicio-form');
+if (servicioForm) {
+servicioForm.addEventListener('submit', function(e) {
+e.preventDefault();
+const tipoServicio = document.getElementById('tipo-servicio').value;
+const precioBase = document.getElementById('precio-base').value;
+const ubicacion = document.getElementById('ubicacion').value;
+const duracion = document.getElementById('duracion').value;
+const nombre = document.getElementById('nombre').value;
+const email = document.getElementById('email').value;
+const telefono = document.getElementById('telefono').value;
+const mensaje = document.getElementById('mensaje').value;
+const templateParams = {
+from_name: nombre,
+tipo_servicio: tipoServicio,
+precio_base: precioBase,
+ubicacion: ubicacion,
+duracion: duracion,
+email: email,
+telefono: telefono,
+mensaje: mensaje
+};
+templateParams.to_email = 'carlosfreire777@gmail.com';
+templateParams.subject = 'Nuevo pedido de Freire FPV';
+templateParams.message = `
+Nuevo pedido de Freire FPV
+Tipo de servicio: ${tipoServicio}
+Precio base: ${precioBase}
+Ubicación: ${ubicacion}
+Duración aproximada: ${duracion}
+Nombre: ${nombre}
+Email: ${email}
+Teléfono: ${telefono}
+${mensaje ? 'Mensaje adicional: ' + mensaje : ''}
+`;
+const adminParams = {
+from_name: nombre,
+email: email,
+telefono: telefono,
+tipo_servicio: tipoServicio,
+precio_base: precioBase,
+ubicacion: ubicacion,
+duracion: duracion,
+mensaje: mensaje,
+to_email: 'carlosfreire777@gmail.com',
+subject: 'Nuevo pedido de Freire FPV',
+message: `
+Nuevo pedido de Freire FPV
+Tipo de servicio: ${tipoServicio}
+Precio base: ${precioBase}
+Ubicación: ${ubicacion}
+Duración aproximada: ${duracion}
+Nombre: ${nombre}
+Email: ${email}
+Teléfono: ${telefono}
+${mensaje ? 'Mensaje adicional: ' + mensaje : ''}
+`
+};
+const clientParams = {
+from_name: 'Freire FPV',
+to_email: email,
+subject: 'Confirmación de tu pedido - Freire FPV',
+message: `
+Hola ${nombre},
+¡Gracias por solicitar nuestros servicios de grabación con drones FPV!
+Hemos recibido tu pedido:
+- Servicio: ${tipoServicio}
+- Ubicación: ${ubicacion}
+- Duración: ${duracion}
+Te contactaremos en un plazo máximo de 24 horas para confirmar todos los detalles.
+Saludos,
+Carlos Freire
+Freire FPV
+`
+};
+const pedidoRequest = fetch('/api/pedidos', {
+method: 'POST',
+headers: { 'Content-Type': 'application/json' },
+keepalive: true,
+body: JSON.stringify({
+tipo_servicio: tipoServicio,
+precio_base: precioBase,
+ubicacion: ubicacion,
+duracion: duracion,
+nombre: nombre,
+email: email,
+telefono: telefono,
+mensaje: mensaje
+})
+}).then(response => {
+if (!response.ok) throw new Error('HTTP ' + response.status);
+return response;
+});
+let delivery;
+if (window.serverNotifications) {
+delivery = pedidoRequest;
+} else {
+pedidoRequest.catch(error => void 0);
+delivery = emailjs.send('service_k65jk6c', 'template_1exdmsp', adminParams)
+.then(function(response) {
+return emailjs.send('service_k65jk6c', 'template_tnzvsui', clientParams);
+});
+}
+delivery
+.then(function() {
+modal.classList.remove('show');
+successMessage.style.display = 'flex';
+servicioForm.reset();
+const flyingDrone = document.createElement('div');
+flyingDrone.className = 'flying-drone';
+document.body.appendChild(flyingDrone);
+setTimeout(() => {
+document.body.removeChild(flyingDrone);
+}, 5000);
+})
+.catch(function(error) {
+alert("Error al enviar, intenta de nuevo");
+});
+});
+}
+if (closeSuccessButton) {
+closeSuccessButton.addEventListener('click', function() {
+successMessage.style.display = 'none';
+document.body.style.overflow = 'auto';
+});
+}
+const contactForm = document.getElementById('contact-form');
+if (contactForm) {
+const contactSubmitBtn = document.getElementById('contacto-submit-btn');
+contactForm.addEventListener('submit', function(e) {
+e.preventDefault();
+contactSubmitBtn.classList.add('sending');
+contactSubmitBtn.innerHTML = '<span>Enviando...</span>';
+const nombre = document.getElementById('nombre-contacto').value;
+const email = document.getElementById('email-contacto').value;
+const telefono = document.getElementById('telefono-contacto').value;
+const asunto = document.getElementById('asunto').value;
+const mensaje = document.getElementById('mensaje-contacto').value;
+const adminContactParams = {
+from_name: nombre,
+email: email,
+telefono: telefono,
+asunto: asunto,
+mensaje: mensaje,
+to_email: 'carlosfreire777@gmail.com',
+subject: 'Consulta de contacto - Freire FPV',
+message: `
+Consulta de contacto - Freire FPV
+Asunto: ${asunto}
+Nombre: ${nombre}
+Email: ${email}
+Teléfono: ${telefono}
+Mensaje: ${mensaje}
+`
+};
+const clientContactParams = {
+from_name: 'Freire FPV',
+to_email: email,
+subject: 'Hemos recibido tu consulta - Freire FPV',
+message: `
+Hola ${nombre},
+¡Gracias por contactar con Freire FPV!
+Hemos recibido tu consulta sobre "${asunto}" y te responderemos a la mayor brevedad posible.
+Te contactaremos en un plazo máximo de 24 horas.
+Saludos,
+Carlos Freire
+Freire FPV
+`
+};
+const contactoRequest = fetch('/api/contacto', {
+method: 'POST',
+headers: { 'Content-Type': 'application/json' },
+keepalive: true,
+body: JSON.stringify({
+nombre: nombre,
+email: email,
+telefono: telefono,
+asunto: asunto,
+mensaje: mensaje
+})
+}).then(response => {
+if (!response.ok) throw new Error('HTTP ' + response.status);
+return response;
+});
+let delivery;
+if (window.serverNotifications) {
+delivery = contactoRequest;
+} else {
+contactoRequest.catch(error => void 0);
+delivery = emailjs.send('service_k65jk6c', 'template_1exdmsp', adminContactParams)
+.then(function(response) {
+return emailjs.send('service_k65jk6c', 'template_tnzvsui', clientContactParams);
+});
+}
+delivery
+.then(function() {
+contactSubmitBtn.classList.remove('sending');
+contactSubmitBtn.classList.add('sent');
+contactSubmitBtn.innerHTML = '<span>¡Enviado!</span>';
+successMessage.style.display = 'flex';
+contactForm.reset();
+const flyingDrone = document.createElement('div');
+flyingDrone.className = 'flying-drone';
+document.body.appendChild(flyingDrone);
+setTimeout(() => {
+document.body.removeChild(flyingDrone);
+}, 5000);
+setTimeout(() => {
+contactSubmitBtn.classList.remove('sent');
+contactSubmitBtn.innerHTML = '<span>Enviar Mensaje</span>';
+}, 3000);
+})
+.catch(function(error) {
+contactSubmitBtn.classList.remove('sending');
+contactSubmitBtn.innerHTML = '<span>Enviar Mensaje</span>';
+alert("Error al enviar, intenta de nuevo");
+});
+});
+}
+const accordionItems = document.querySelectorAll('.accordion-item');
+if(accordionItems.length > 0) {
+const firstItem = accordionItems[0];
+const firstIcon = firstItem.querySelector('.accordion-icon');
+firstItem.classList.add('active');
+firstIcon.textContent = '−';
+}
+accordionItems.forEach(item => {
+const header = item.querySelector('.accordion-header');
+const icon = item.querySelector('.accordion-icon');
+header.addEventListener('click', () => {
+const isActive = item.classList.contains('active');
+accordionItems.forEach(otherItem => {
+if (otherItem !== item) {
+otherItem.classList.remove('active');
+const otherIcon = otherItem.querySelector('.accordion-icon');
+otherIcon.textContent = '+';
+}
+});
+if (isActive) {
+item.classList.remove('active');
+icon.textContent = '+';
+} else {
+item.classList.add('active');
+icon.textContent = '−';
+}
+if (!isActive) {
+setTimeout(() => {
+header.scrollIntoView({ behavior: 'smooth', block: 'center' });
+}, 300);
+}
+});
+});
+});
+;
+class VideoOptimizer {
+constructor() {
+this.isMobile = this.checkIfMobile();
+this.videoObserver = null;
+this.observedVideos = new Map();
+this.initObserver();
+}
+checkIfMobile() {
+const userAgent = navigator.userAgent.toLowerCase();
+return /android|webos|iphone|ipad|ipod|blackberry|iemobile|opera mini/i.test(userAgent);
+}
+initObserver() {
+if ('IntersectionObserver' in window) {
+this.videoObserver = new IntersectionObserver((entries) => {
+entries.forEach(entry => {
+const video = entry.target;
+if (entry.isIntersecting) {
+this.loadVideo(video);
+} else {
+this.unloadVideo(video);
+}
+});
+}, {
+threshold: 0.1,
+rootMargin: '100px'
+});
+}
+}
+registerVideos() {
+const videos = document.querySelectorAll('video');
+videos.forEach(video => {
+const isCarouselVideo = video.classList.contains('drone-video');
+const isHeroVideo = video.id === 'hero-background-video';
+const hasLazyloadDisabled = video.dataset.lazyload === 'false';
+if (!isCarouselVideo && !isHeroVideo && !hasLazyloadDisabled) {
+this.observedVideos.set(video, {
+loaded: false,
+originalSources: []
+});
+if (video.dataset.lazyload !== 'false') {
+video.querySelectorAll('source').forEach(source => {
+source.dataset.src = source.src;
+source.removeAttribute('src');
+});
+if (this.videoObserver) {
+this.videoObserver.observe(video);
+}
+}
+}
+});
+}
+loadVideo(video) {
+const videoData = this.observedVideos.get(video);
+if (videoData && !videoData.loaded) {
+const sources = video.querySelectorAll('source');
+sources.forEach(source => {
+if (source.dataset.src) {
+if (this.isMobile && source.dataset.mobileSrc) {
+source.src = source.dataset.mobileSrc;
+} else {
+source.src = source.dataset.src;
+}
+}
+});
+video.load();
+if (video.dataset.autoplay === 'true') {
+setTimeout(() => {
+video.play().catch(e => {
+console.warn(`VideoOptimizer: No se pudo reproducir automáticamente: ${e.message}`);
+});
+}, 100);
+}
+videoData.loaded = true;
+}
+}
+unloadVideo(video) {
+const videoData = this.observedVideos.get(video);
+if (videoData && videoData.loaded) {
+if (!video.paused) {
+video.pause();
+}
+}
+}
+optimizeForMobile(video) {
+if (this.isMobile) {
+video.setAttribute('preload', 'metadata');
+const mobileSource = video.querySelector('source[data-mobile-src]');
+if (mobileSource && mobileSource.dataset.mobileSrc) {
+mobileSource.src = mobileSource.dataset.mobileSrc;
+video.load();
+}
+}
+}
+cleanup(video) {
+if (this.videoObserver) {
+this.videoObserver.unobserve(video);
+}
+this.observedVideos.delete(video);
+}
+destroy() {
+if (this.videoObserver) {
+this.videoObserver.disconnect();
+}
+this.observedVideos.clear();
+}
+}
+document.addEventListener('DOMContentLoaded', function() {
+window.videoOptimizer = new VideoOptimizer();
+setTimeout(() => {
+window.videoOptimizer.registerVideos();
+}, 100);
+});
+if (typeof module !== 'undefined' && module.exports) {
+module.exports = VideoOptimizer;
+}
+;
+document.addEventListener('DOMContentLoaded', function() {
+const buttons = document.querySelectorAll('.btn-primary:not(:has(span)), .btn-submit:not(:has(span)), .btn-ver-mas:not(:has(span))');
+buttons.forEach(button => {
+if (!button.querySelector('span')) {
+const content = button.innerHTML;
+button.innerHTML = `<span>${content}</span>`;
+}
+});
+document.body.addEventListener('mousedown', handleButtonEffect);
+document.body.addEventListener('touchstart', handleButtonEffect, {passive: true});
+function handleButtonEffect(e) {
+let targetElement = e.target;
+let buttonElement = null;
+for (let i = 0; i < 3; i++) {
+if (!targetElement) break;
+if (targetElement.classList &&
+(targetElement.classList.contains('btn-primary') ||
+targetElement.classList.contains('btn-submit') ||
+targetElement.classList.contains('btn-ver-mas'))) {
+buttonElement = targetElement;
+break;
+}
+targetElement = targetElement.parentElement;
+}
+if (buttonElement) {
+let x, y;
+if (e.type === 'touchstart') {
+const touch = e.touches[0];
+x = touch.clientX - buttonElement.getBoundingClientRect().left;
+y = touch.clientY - buttonElement.getBoundingClientRect().top;
+} else {
+x = e.clientX - buttonElement.getBoundingClientRect().left;
+y = e.clientY - buttonElement.getBoundingClientRect().top;
+}
+buttonElement.style.setProperty('--click-x', `${x}px`);
+buttonElement.style.setProperty('--click-y', `${y}px`);
+buttonElement.classList.add('button-clicked');
+setTimeout(() => {
+buttonElement.classList.remove('button-clicked');
+}, 500);
+}
+}
+});
+;
+document.addEventListener('DOMContentLoaded', function() {
+setTimeout(() => {
+initializePropellerAnimations();
+}, 100);
+});
+function initializePropellerAnimations() {
+const allPropellers = document.querySelectorAll('.propeller-symbol');
+allPropellers.forEach(propeller => {
+propeller.classList.remove('propeller-spinning');
+propeller.classList.remove('propeller-spinning-slow');
+propeller.style.animation = 'none';
+propeller.offsetHeight;
+propeller.style.animation = null;
+});
+if (allPropellers.length === 0) {
+return;
+}
+function spinPropeller(propeller) {
+propeller.classList.remove('propeller-spinning');
+propeller.classList.remove('propeller-spinning-slow');
+propeller.style.animation = 'none';
+propeller.offsetHeight;
+propeller.style.animation = null;
+setTimeout(() => {
+if (Math.random() > 0.5) {
+propeller.classList.add('propeller-spinning');
+} else {
+propeller.classList.add('propeller-spinning-slow');
+}
+const duration = 1000 + Math.random() * 1000;
+setTimeout(() => {
+propeller.classList.remove('propeller-spinning');
+propeller.classList.remove('propeller-spinning-slow');
+}, duration);
+}, 10);
+}
+allPropellers.forEach(propeller => {
+propeller.addEventListener('click', function(e) {
+e.preventDefault();
+e.stopPropagation();
+spinPropeller(this);
+});
+propeller.addEventListener('mouseenter', function() {
+spinPropeller(this);
+});
+});
+}
+;
+document.addEventListener('DOMContentLoaded', function() {
+const testimonialContainer = document.querySelector('.testimonial-slider');
+const dotsContainer = document.querySelector('.testimonial-dots');
+const testimonialToggle = document.getElementById('testimonial-toggle');
+const formContainer = document.getElementById('testimonial-form-container');
+const addButton = document.getElementById('add-testimonial-btn');
+const closeButton = document.getElementById('close-form-btn');
+const testimonialForm = document.getElementById('testimonial-form');
+if (!testimonialContainer || !dotsContainer) {
+return;
+}
+let slides = Array.from(document.querySelectorAll('.testimonial-slide'));
+let dots = Array.from(document.querySelectorAll('.dot'));
+let currentSlide = 0;
+let touchStartX = 0;
+let touchEndX = 0;
+let autoPlayInterval = null;
+let isPlaying = true;
+let canAddTestimonial = true;
+function showMessage(message, isError = false) {
+const prevMessage = document.getElementById('message-container');
+if (prevMessage) {
+prevMessage.remove();
+}
+const messageContainer = document.createElement('div');
+messageContainer.id = 'message-container';
+messageContainer.style.cssText = `
+position: fixed;
+top: 20px;
+left: 50%;
+transform: translateX(-50%);
+padding: 12px 24px;
+background-color: ${isError ? '#d32f2f' : '#4caf50'};
+color: white;
+border-radius: 5px;
+box-shadow: 0 3px 10px rgba(0, 0, 0, 0.2);
+z-index: 1000;
+font-weight: 500;
+text-align: center;
+max-width: 80%;
+`;
+messageContainer.textContent = message;
+document.body.appendChild(messageContainer);
+setTimeout(() => {
+messageContainer.style.opacity = '0';
+messageContainer.style.transition = 'opacity 0.5s ease';
+setTimeout(() => {
+if (messageContainer.parentNode) {
+messageContainer.parentNode.removeChild(messageContainer);
+}
+}, 500);
+}, 4000);
+}
+function showSlide(index) {
+if (index < 0) {
+index = slides.length - 1;
+} else if (index >= slides.length) {
+index = 0;
+}
+currentSlide = index;
+slides.forEach((slide, i) => {
+slide.style.display = i === index ? 'block' : 'none';
+});
+dots.forEach((dot, i) => {
+if (i === index) {
+dot.classList.add('active');
+dot.style.backgroundColor = 'var(--color-primary)';
+dot.style.transform = 'scale(1.2)';
+} else {
+dot.classList.remove('active');
+dot.style.backgroundColor = 'rgba(255, 255, 255, 0.3)';
+dot.style.transform = 'scale(1)';
+}
+});
+}
+function nextSlide() {
+showSlide(currentSlide + 1);
+}
+function prevSlide() {
+showSlide(currentSlide - 1);
+}
+function toggleAutoPlay() {
+if (isPlaying) {
+clearInterval(autoPlayInterval);
+isPlaying = false;
+} else {
+autoPlayInterval = setInterval(nextSlide, 5000);
+isPlaying = true;
+}
+}
+function deleteTestimonial(id, token) {
+if (!token) {
+showMessage('No se puede eliminar este testimonio', true);
+return;
+}
+if (token === 'system') {
+showMessage('Solo puedes eliminar testimonios que tú has creado', true);
+return;
+}
+const myToken = localStorage.getItem('myTestimonialToken');
+if (myToken !== token) {
+showMessage('Solo puedes eliminar testimonios que tú has creado', true);
+return;
+}
+if (!confirm('¿Estás seguro de que deseas eliminar este testimonio?')) {
+return;
+}
+fetch(`/api/testimonios/${token}`, {
+method: 'DELETE'
+})
+.then(response => response.json())
+.then(data => {
+if (data.success) {
+const testimonialElement = document.getElementById(id);
+if (testimonialElement) {
+const index = slides.indexOf(testimonialElement);
+testimonialElement.remove();
+if (index !== -1 && index < dots.length) {
+dots[index].remove();
+}
+slides = Array.from(document.querySelectorAll('.testimonial-slide'));
+dots = Array.from(document.querySelectorAll('.dot'));
+if (slides.length > 0) {
+showSlide(Math.min(currentSlide, slides.length - 1));
+}
+showMessage('Testimonio eliminado correctamente');
+localStorage.removeItem('lastTestimonialTime');
+localStorage.removeItem('myTestimonialToken');
+localStorage.removeItem('myTestimonialId');
+canAddTestimonial = true;
+}
+} else {
+showMessage(data.error || 'Error al eliminar el testimonio', true);
+}
+})
+.catch(error => {
+console.error('Error:', error);
+showMessage('Ha ocurrido un error al eliminar el testimonio', true);
+});
+}
+function checkIfUserCanAddTestimonial() {
+const lastTestimonialTime = localStorage.getItem('lastTestimonialTime');
+if (lastTestimonialTime) {
+const lastTime = parseInt(lastTestimonialTime);
+const currentTime = Date.now();
+const daysPassed = (currentTime - lastTime) / (1000 * 60 * 60 * 24);
+if (daysPassed < 7) {
+const daysRemaining = Math.ceil(7 - daysPassed);
+const message = `Solo puedes añadir un testimonio cada 7 días. Debes esperar ${daysRemaining} día${daysRemaining !== 1 ? 's' : ''} más.`;
+canAddTestimonial = false;
+if (addButton) {
+const tooltipSpan = document.querySelector('#testimonial-toggle span');
+if (tooltipSpan) {
+tooltipSpan.textContent = 'Espera ' + daysRemaining + ' día' + (daysRemaining !== 1 ? 's' : '') + ' más';
+}
+addButton.style.backgroundColor = '#ccc';
+addButton.style.cursor = 'not-allowed';
+addButton.addEventListener('click', function(e) {
+if (!canAddTestimonial) {
+e.preventDefault();
+showMessage(message, true);
+}
+});
+}
+return false;
+}
+}
+return true;
+}
+autoPlayInterval = setInterval(nextSlide, 5000);
+if (slides.length > 0) {
+showSlide(0);
+}
+dots.forEach((dot, index) => {
+dot.addEventListener('click', () => {
+showSlide(index);
+if (isPlaying) {
+clearInterval(autoPlayInterval);
+autoPlayInterval = setInterval(nextSlide, 5000);
+}
+});
+});
+if (addButton) {
+addButton.addEventListener('click', function() {
+if (canAddTestimonial) {
+testimonialToggle.style.display = 'none';
+formContainer.style.display = 'block';
+} else {
+checkIfUserCanAddTestimonial();
+}
+});
+}
+if (closeButton) {
+closeButton.addEventListener('click', function() {
+formContainer.style.display = 'none';
+testimonialToggle.style.display = 'block';
+});
+}
+if (testimonialForm) {
+testimonialForm.addEventListener('submit', function(e) {
+e.preventDefault();
+if (!canAddTestimonial) {
+showMessage('Solo puedes añadir un testimonio cada 7 días', true);
+return;
+}
+const name = document.getElementById('testimonial-name').value;
+const role = document.getElementById('testimonial-role').value;
+const text = document.getElementById('testimonial-text').value;
+if (!name || !role || !text) {
+showMessage('Por favor, completa todos los campos', true);
+return;
+}
+const submitButton = document.getElementById('submit-testimonial');
+const loadingIndicator = document.createElement('div');
+loadingIndicator.style.cssText = `
+position: absolute;
+top: 0;
+left: 0;
+width: 100%;
+height: 100%;
+display: flex;
+align-items: center;
+justify-content: center;
+background-color: rgba(255, 125, 0, 0.8);
+color: white;
+font-weight: bold;
+border-radius: 5px;
+z-index: 1;
+`;
+loadingIndicator.textContent = 'Publicando...';
+if (submitButton) {
+submitButton.parentNode.appendChild(loadingIndicator);
+submitButton.disabled = true;
+}
+fetch('/api/testimonios', {
+method: 'POST',
+headers: {
+'Content-Type': 'application/json',
+},
+body: JSON.stringify({
+nombre: name,
+ocupacion: role,
+texto: text
+})
+})
+.then(response => response.json())
+.then(data => {
+if (data.success) {
+const newTestimonial = data.testimonio;
+const testimonialId = `testimonio-${newTestimonial.id}`;
+const token = data.token;
+const newElement = document.createElement('div');
+newElement.className = 'testimonial-slide';
+newElement.id = testimonialId;
+newElement.setAttribute('data-token', token);
+newElement.innerHTML = `
+<div class="testimonial-content" style="background-color: rgba(255, 255, 255, 0.1); border-radius: 10px; padding: 1.5rem; margin: 0 auto; max-width: 800px; box-shadow: 0 10px 20px rgba(0, 0, 0, 0.2); position: relative; border-left: 4px solid var(--color-primary);">
+<button class="delete-testimonial" style="position: absolute; top: 10px; right: 10px; background: none; border: none; color: var(--color-primary); font-size: 18px; cursor: pointer; opacity: 0.7; transition: all 0.3s ease;">&times;</button>
+<p style="font-size: 1rem; line-height: 1.6; font-weight: 400; color: #fff; margin-bottom: 1rem; text-align: center; font-style: italic;">"${newTestimonial.texto}"</p>
+<div class="client-info" style="text-align: center; margin-top: 1rem;">
+<span class="client-name">${newTestimonial.nombre}</span>
+<span class="client-role" style="display: block; color: rgba(255, 255, 255, 0.8); font-size: 0.9rem;">${newTestimonial.ocupacion}</span>
+<span class="testimonial-date" style="display: block; color: rgba(255, 255, 255, 0.6); font-size: 0.8rem; margin-top: 0.5rem;">${new Date(newTestimonial.fecha_creacion).toLocaleDateString('es-ES', {
+day: 'numeric',
+month: 'long',
+year: 'numeric'
+})}</span>
+</div>
+</div>
+`;
+testimonialContainer.appendChild(newElement);
+const newDot = document.createElement('span');
+newDot.className = 'dot';
+newDot.setAttribute('data-token', token);
+newDot.style.cssText = 'width: 12px; height: 12px; border-radius: 50%; background-color: rgba(255, 255, 255, 0.3); margin: 0 6px; cursor: pointer; transition: background-color 0.3s ease, transform 0.3s ease;';
+dotsContainer.appendChild(newDot);
+slides = Array.from(document.querySelectorAll('.testimonial-slide'));
+dots = Array.from(document.querySelectorAll('.dot'));
+newDot.addEventListener('click', function() {
+showSlide(dots.indexOf(this));
+});
+setTimeout(() => {
+showSlide(slides.length - 1);
+localStorage.setItem('lastTestimonialTime', Date.now());
+localStorage.setItem('myTestimonialToken', token);
+localStorage.setItem('myTestimonialId', newTestimonial.id);
+canAddTestimonial = false;
+showMessage('Tu testimonio ha sido añadido con éxito. ¡Gracias!');
+const deleteButton = newElement.querySelector('.delete-testimonial');
+if (deleteButton) {
+deleteButton.addEventListener('click', function() {
+deleteTestimonial(testimonialId, token);
+});
+}
+}, 300);
+} else {
+showMessage(data.error || 'Error al añadir el testimonio', true);
+}
+})
+.catch(error => {
+console.error('Error:', error);
+showMessage('Ha ocurrido un error al procesar tu solicitud. Inténtalo de nuevo.', true);
+})
+.finally(() => {
+if (loadingIndicator && loadingIndicator.parentNode) {
+loadingIndicator.parentNode.removeChild(loadingIndicator);
+}
+if (submitButton) {
+submitButton.disabled = false;
+}
+formContainer.style.display = 'none';
+testimonialToggle.style.display = 'block';
+testimonialForm.reset();
+});
+});
+}
+document.querySelectorAll('.delete-testimonial').forEach(button => {
+const testimonialSlide = button.closest('.testimonial-slide');
+if (testimonialSlide) {
+const testimonialId = testimonialSlide.id;
+const isMine = testimonialId === 'testimonio-' + localStorage.getItem('myTestimonialId');
+const token = isMine ? localStorage.getItem('myTestimonialToken') : testimonialSlide.getAttribute('data-token');
+button.addEventListener('click', function() {
+deleteTestimonial(testimonialId, token);
+});
+}
+});
+if (!checkIfUserCanAddTestimonial()) {
+}
+testimonialContainer.addEventListener('touchstart', function(e) {
+touchStartX = e.changedTouches[0].screenX;
+}, false);
+testimonialContainer.addEventListener('touchend', function(e) {
+touchEndX = e.changedTouches[0].screenX;
+handleSwipe();
+}, false);
+function handleSwipe() {
+if (touchEndX < touchStartX - 50) {
+nextSlide();
+if (isPlaying) {
+clearInterval(autoPlayInterval);
+autoPlayInterval = setInterval(nextSlide, 5000);
+}
+}
+if (touchEndX > touchStartX + 50) {
+prevSlide();
+if (isPlaying) {
+clearInterval(autoPlayInterval);
+autoPlayInterval = setInterval(nextSlide, 5000);
+}
+}
+}
+});
+;
\ No newline at end of file
@@ -25,12 +25,21 @@ document.addEventListener('DOMContentLoaded', function() {
     
     debug('Encontrados ' + slides.length + ' slides y ' + videos.length + ' videos');
     
-    // Preparar videos para carga inmediata
+    // En móvil se usa la versión ligera del vídeo si el servidor la ofrece
+    const isMobile = /android|webos|iphone|ipad|ipod|blackberry|iemobile|opera mini/i.test(navigator.userAgent);
+    
+    // Preparar videos: solo el slide visible se descarga entero; del resto
+    // basta con los metadatos (el servidor atiende peticiones Range)
     videos.forEach((video, index) => {
-        video.preload = 'auto';
+        video.preload = index === currentIndex ? 'auto' : 'metadata';
         video.setAttribute('playsinline', '');
         video.muted = true; // Asegurar que esté silenciado para autoplay
         
+        const source = video.querySelector('source[data-mobile-src]');
+        if (isMobile && source) {
+            source.src = source.dataset.mobileSrc;
+        }
+        
         // Cargar el video
         video.load();
         
@@ -145,6 +154,9 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Actualizar índice
         currentIndex = newIndex;
+        if (videos[newIndex]) {
+            videos[newIndex].preload = 'auto';
+        }
         
         // Reproducir nuevo video después de un pequeño delay
         setTimeout(() => {
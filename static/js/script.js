@@ -338,19 +338,49 @@ Freire FPV
             // Mostrar en la consola los parámetros que se envían
             console.log('Enviando email con parámetros:', adminParams);
             
-            // Primero enviar email a Carlos (admin) usando template_1exdmsp
-            emailjs.send('service_k65jk6c', 'template_1exdmsp', adminParams)
-                .then(function(response) {
-                    console.log('Email al admin enviado correctamente:', response.status, response.text);
-                    
-                    // Mostrar en la consola los parámetros del cliente
-                    console.log('Enviando email al cliente con parámetros:', clientParams);
-                    
-                    // Luego enviar email al cliente usando template_tnzvsui
-                    return emailjs.send('service_k65jk6c', 'template_tnzvsui', clientParams);
+            // Registrar el pedido en el servidor
+            const pedidoRequest = fetch('/api/pedidos', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                keepalive: true,
+                body: JSON.stringify({
+                    tipo_servicio: tipoServicio,
+                    precio_base: precioBase,
+                    ubicacion: ubicacion,
+                    duracion: duracion,
+                    nombre: nombre,
+                    email: email,
+                    telefono: telefono,
+                    mensaje: mensaje
                 })
-                .then(function(response) {
-                    console.log('Email al cliente enviado correctamente:', response.status, response.text);
+            }).then(response => {
+                if (!response.ok) throw new Error('HTTP ' + response.status);
+                return response;
+            });
+            
+            let delivery;
+            if (window.serverNotifications) {
+                // El servidor guarda el pedido y envía los correos en segundo plano
+                delivery = pedidoRequest;
+            } else {
+                pedidoRequest.catch(error => console.log('No se pudo registrar el pedido:', error));
+                
+                // Primero enviar email a Carlos (admin) usando template_1exdmsp
+                delivery = emailjs.send('service_k65jk6c', 'template_1exdmsp', adminParams)
+                    .then(function(response) {
+                        console.log('Email al admin enviado correctamente:', response.status, response.text);
+                        
+                        // Mostrar en la consola los parámetros del cliente
+                        console.log('Enviando email al cliente con parámetros:', clientParams);
+                        
+                        // Luego enviar email al cliente usando template_tnzvsui
+                        return emailjs.send('service_k65jk6c', 'template_tnzvsui', clientParams);
+                    });
+            }
+            
+            delivery
+                .then(function() {
+                    console.log('Notificaciones enviadas correctamente');
                     
                     // Hide modal and show success message
                     modal.classList.remove('show');
@@ -454,19 +484,46 @@ Freire FPV
             // Mostrar en la consola los parámetros que se envían
             console.log('Enviando email de contacto con parámetros:', adminContactParams);
             
-            // Primero enviar email a Carlos (admin) usando template_1exdmsp
-            emailjs.send('service_k65jk6c', 'template_1exdmsp', adminContactParams)
-                .then(function(response) {
-                    console.log('Email al admin enviado correctamente:', response.status, response.text);
-                    
-                    // Mostrar en la consola los parámetros del cliente
-                    console.log('Enviando email al cliente con parámetros:', clientContactParams);
-                    
-                    // Luego enviar email al cliente usando template_tnzvsui
-                    return emailjs.send('service_k65jk6c', 'template_tnzvsui', clientContactParams);
+            // Registrar el mensaje en el servidor
+            const contactoRequest = fetch('/api/contacto', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                keepalive: true,
+                body: JSON.stringify({
+                    nombre: nombre,
+                    email: email,
+                    telefono: telefono,
+                    asunto: asunto,
+                    mensaje: mensaje
                 })
-                .then(function(response) {
-                    console.log('Email al cliente enviado correctamente:', response.status, response.text);
+            }).then(response => {
+                if (!response.ok) throw new Error('HTTP ' + response.status);
+                return response;
+            });
+            
+            let delivery;
+            if (window.serverNotifications) {
+                // El servidor guarda el mensaje y envía los correos en segundo plano
+                delivery = contactoRequest;
+            } else {
+                contactoRequest.catch(error => console.log('No se pudo registrar el mensaje:', error));
+                
+                // Primero enviar email a Carlos (admin) usando template_1exdmsp
+                delivery = emailjs.send('service_k65jk6c', 'template_1exdmsp', adminContactParams)
+                    .then(function(response) {
+                        console.log('Email al admin enviado correctamente:', response.status, response.text);
+                        
+                        // Mostrar en la consola los parámetros del cliente
+                        console.log('Enviando email al cliente con parámetros:', clientContactParams);
+                        
+                        // Luego enviar email al cliente usando template_tnzvsui
+                        return emailjs.send('service_k65jk6c', 'template_tnzvsui', clientContactParams);
+                    });
+            }
+            
+            delivery
+                .then(function() {
+                    console.log('Notificaciones enviadas correctamente');
                     
                     // Cambiar animación del botón a "enviado"
                     contactSubmitBtn.classList.remove('sending');
@@ -186,6 +186,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     // Permitir añadir un nuevo testimonio
                     localStorage.removeItem('lastTestimonialTime');
                     localStorage.removeItem('myTestimonialToken');
+                    localStorage.removeItem('myTestimonialId');
                     canAddTestimonial = true;
                 }
             } else {
@@ -393,6 +394,7 @@ document.addEventListener('DOMContentLoaded', function() {
                         // Guardar timestamp para control de frecuencia y token para identificación
                         localStorage.setItem('lastTestimonialTime', Date.now());
                         localStorage.setItem('myTestimonialToken', token);
+                        localStorage.setItem('myTestimonialId', newTestimonial.id);
                         
                         // Configurar estado
                         canAddTestimonial = false;
@@ -441,7 +443,9 @@ document.addEventListener('DOMContentLoaded', function() {
         const testimonialSlide = button.closest('.testimonial-slide');
         if (testimonialSlide) {
             const testimonialId = testimonialSlide.id;
-            const token = testimonialSlide.getAttribute('data-token');
+            // El servidor no publica los tokens: el testimonio propio se reconoce por su id
+            const isMine = testimonialId === 'testimonio-' + localStorage.getItem('myTestimonialId');
+            const token = isMine ? localStorage.getItem('myTestimonialToken') : testimonialSlide.getAttribute('data-token');
             
             button.addEventListener('click', function() {
                 deleteTestimonial(testimonialId, token);
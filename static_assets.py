@@ -0,0 +1,151 @@
+"""Huella por contenido de los ficheros de ``static/`` y caché inmutable.
+
+Cada fichero recibe un nombre con el hash de su contenido
+(``css/styles.css`` -> ``css/styles.3f2a9c1b7d0e.css``). Las plantillas usan
+``asset_url('css/styles.css')`` para obtener la URL con hash, y esas URLs se
+sirven con ``Cache-Control: public, max-age=31536000, immutable``: si el fichero
+cambia, cambia su URL, así que el navegador nunca necesita revalidar.
+
+El manifiesto se carga del JSON que se sube con el código (``STATIC_MANIFEST``,
+regenerado por ``asset_bundler.py``) o, si no existe, se calcula al arrancar.
+Calcularlo obliga a leer todo ``static/``, vídeos incluidos (cientos de MB), así
+que en Vercel cada arranque en frío debe usar el JSON:
+
+    python static_assets.py --output static-manifest.json
+
+Si ``static/`` está en un checkout con los vídeos como punteros de Git LFS, el
+hash es el del puntero, que también cambia cuando cambia el vídeo.
+"""
+import argparse
+import hashlib
+import json
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory, url_for
+
+HASH_LENGTH = 12
+IMMUTABLE_MAX_AGE = 31536000  # un año
+
+# Manifiesto que se sube con el código (el mismo nombre que STATIC_MANIFEST en vercel.json)
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static-manifest.json')
+
+# Ficheros que no tiene sentido versionar
+IGNORED_FILES = {'.gitkeep', '.DS_Store'}
+
+# Variantes precomprimidas que pueden acompañar a un fichero (p. ej. los bundles)
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(filename, digest):
+    root, ext = os.path.splitext(filename)
+    return f"{root}.{digest}{ext}"
+
+
+def build_manifest(static_folder):
+    """Recorre ``static_folder`` y devuelve ``{ruta original: ruta con hash}``."""
+    manifest = {}
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if name in IGNORED_FILES:
+                continue
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            manifest[filename] = hashed_name(filename, file_hash(path))
+    return dict(sorted(manifest.items()))
+
+
+def write_manifest(static_folder, output):
+    """Calcula el manifiesto de ``static_folder`` y lo guarda en ``output``; devuelve el manifiesto."""
+    manifest = build_manifest(static_folder)
+    with open(output, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2)
+        fh.write('\n')
+    return manifest
+
+
+class StaticAssets:
+    """Extensión de Flask que resuelve y sirve los ficheros estáticos con hash."""
+
+    def __init__(self, app=None, manifest_path=None):
+        self.manifest_path = manifest_path
+        self.manifest = {}
+        self._originals = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.reload()
+        app.jinja_env.globals['asset_url'] = self.asset_url
+
+        # Sustituimos la vista de /static para reconocer los nombres con hash
+        static_view = app.view_functions['static']
+
+        def static(filename):
+            original = self._originals.get(filename)
+            if original is None:
+                return static_view(filename=filename)
+
+            encoding, path = self._negotiate(original)
+            response = send_from_directory(app.static_folder, path, max_age=IMMUTABLE_MAX_AGE,
+                                           mimetype=mimetypes.guess_type(original)[0])
+            if encoding:
+                response.content_encoding = encoding
+            if self._has_variants(original):
+                response.vary.add('Accept-Encoding')
+            response.cache_control.immutable = True
+            return response
+
+        app.view_functions['static'] = static
+
+    def reload(self):
+        """Vuelve a cargar (o calcular) el manifiesto, p. ej. tras generar nuevos ficheros."""
+        if self.manifest_path and os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as fh:
+                self.manifest = json.load(fh)
+        else:
+            self.manifest = build_manifest(self.app.static_folder)
+        self._originals = {hashed: original for original, hashed in self.manifest.items()}
+
+    def _has_variants(self, filename):
+        return any(filename + suffix in self.manifest for _, suffix in PRECOMPRESSED)
+
+    def _negotiate(self, filename):
+        """Elige la variante .br/.gz precomprimida que acepte el cliente, si existe."""
+        accepted = request.accept_encodings
+        for encoding, suffix in PRECOMPRESSED:
+            if filename + suffix in self.manifest and accepted[encoding]:
+                return encoding, filename + suffix
+        return None, filename
+
+    def asset_url(self, filename, **kwargs):
+        """URL con hash de un fichero estático (la normal si no está en el manifiesto).
+
+        En modo debug se usa la URL sin hash para que los cambios se vean al momento.
+        """
+        if not current_app.debug:
+            filename = self.manifest.get(filename, filename)
+        return url_for('static', filename=filename, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera el manifiesto de ficheros estáticos con hash")
+    parser.add_argument("--static", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
+    parser.add_argument("--output", default=MANIFEST_PATH)
+    args = parser.parse_args()
+
+    manifest = write_manifest(args.static, args.output)
+    print(f"{len(manifest)} ficheros en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Caché de bytecode de las plantillas Jinja, generada antes de desplegar.
+
+Jinja compila cada plantilla a Python la primera vez que se renderiza; en un
+arranque en frío (cada instancia nueva de Vercel) ese coste se suma a la primera
+petición. ``python template_cache.py`` compila todas las plantillas y guarda el
+bytecode en ``jinja_bytecode/``, que se sube con el despliegue igual que
+``static/dist``. En ejecución, cargar una plantilla solo lee su bytecode.
+
+Cada entrada guarda el hash del código fuente: si una plantilla cambia y no se
+regenera la caché, Jinja la vuelve a compilar sin más, así que nunca se sirve
+una versión antigua. La clave es el nombre de la plantilla y no su ruta
+absoluta, que cambia entre la máquina donde se genera y el servidor.
+
+Uso (antes de desplegar, y tras editar cualquier plantilla):
+    python template_cache.py
+"""
+import argparse
+import logging
+import os
+import time
+from hashlib import sha1
+
+from jinja2 import FileSystemBytecodeCache, TemplateSyntaxError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jinja_bytecode')
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """``FileSystemBytecodeCache`` portable entre máquinas y tolerante a discos de solo lectura."""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        super().__init__(directory, pattern='%s.cache')
+
+    def get_cache_key(self, name, filename=None):
+        return sha1(name.encode('utf-8')).hexdigest()
+
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            # En Vercel el código es de solo lectura: la plantilla se compila en memoria
+            pass
+
+
+class TemplateCache:
+    """Activa la caché de bytecode en el entorno Jinja de la app."""
+
+    def __init__(self, app=None, directory=DEFAULT_DIRECTORY, enabled=True):
+        self.directory = directory
+        self.enabled = enabled
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if self.enabled and os.path.isdir(self.directory):
+            app.jinja_env.bytecode_cache = TemplateBytecodeCache(self.directory)
+
+    def build(self, app):
+        """Compila todas las plantillas y devuelve ``(plantillas, segundos)``."""
+        os.makedirs(self.directory, exist_ok=True)
+        cache = TemplateBytecodeCache(self.directory)
+        # Las entradas de plantillas borradas o renombradas no deben quedarse
+        cache.clear()
+        env = app.jinja_env.overlay(bytecode_cache=cache, cache_size=0)
+        names = []
+        start = time.perf_counter()
+        for name in env.list_templates(extensions=['html']):
+            try:
+                env.get_template(name)
+            except TemplateSyntaxError as e:
+                # No se puede cachear; al renderizarla fallará igual que sin caché
+                logger.warning(f"{name} no compila (línea {e.lineno}): {e.message}")
+                continue
+            names.append(name)
+        return names, time.perf_counter() - start
+
+
+def print_report(app, cache):
+    names, compile_time = cache.build(app)
+    env = app.jinja_env.overlay(bytecode_cache=TemplateBytecodeCache(cache.directory), cache_size=0)
+    start = time.perf_counter()
+    for name in names:
+        env.get_template(name)
+    load_time = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(cache.directory, f)) for f in os.listdir(cache.directory))
+    print(f"{len(names)} plantillas en {cache.directory} ({size / 1024:.0f} KiB)")
+    print(f"Compilar: {compile_time * 1000:.1f} ms; cargar desde la caché: {load_time * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompila las plantillas Jinja a bytecode")
+    parser.add_argument("--directory", default=DEFAULT_DIRECTORY)
+    args = parser.parse_args()
+    # Se usa el entorno de la app: sus filtros y opciones afectan a la compilación
+    from app import app
+    print_report(app, TemplateCache(directory=args.directory))
+
+
+if __name__ == "__main__":
+    main()
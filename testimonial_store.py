@@ -0,0 +1,266 @@
+"""Testimonios en base de datos con paginación por cursor y páginas cacheadas.
+
+El listado público recorre los testimonios aprobados del más reciente al más
+antiguo ordenando por ``(fecha_creacion, id)``. En vez de ``OFFSET`` cada
+página devuelve un cursor opaco con la clave de su último elemento, y la
+siguiente consulta empieza justo ahí: el índice ``(aprobado, fecha_creacion)``
+resuelve cualquier página en tiempo constante.
+
+Las páginas ya serializadas se guardan en memoria junto con el rango de claves
+que cubren. Al crear o borrar un testimonio solo se invalidan las páginas cuyo
+rango contiene su clave, así que la mayoría de lecturas no llegan a la base de
+datos. Para que los demás workers de gunicorn se enteren, cada escritura
+incrementa el contador del fichero de versión; un worker que ve una versión
+que no es la suya vacía su caché.
+
+Cada página guarda también su respuesta HTTP (``encoded``): ETag del contenido
+y gzip si es grande, para que ``GET /api/testimonios`` conteste con 304 sin
+volver a serializar nada.
+"""
+import base64
+import binascii
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from functools import cached_property
+
+from sqlalchemy import and_, or_
+
+from metrics import cache_event
+from models import Testimonio, db
+from page_cache import COMPRESS_MIN_BYTES, CachedPage
+from serving import lock_exclusive
+
+logger = logging.getLogger(__name__)
+
+# Longitudes máximas aceptadas desde el formulario
+MAX_LENGTHS = {'nombre': 150, 'ocupacion': 150, 'texto': 1000}
+
+# Testimonios que mostraba la web antes de guardarlos en base de datos; ``seed``
+# los carga al crear la tabla para que el carrusel no empiece en blanco
+SEED_TESTIMONIOS = [
+    {'nombre': 'Carlos Mendoza', 'ocupacion': 'Director de Eventos',
+     'texto': 'Increíble trabajo de Freire FPV. Las tomas aéreas de nuestro evento corporativo fueron espectaculares.',
+     'fecha_creacion': datetime(2024, 1, 15)},
+    {'nombre': 'Ana García', 'ocupacion': 'Organizadora de Bodas',
+     'texto': 'Profesionalismo y calidad excepcional. Recomiendo totalmente sus servicios para cualquier celebración.',
+     'fecha_creacion': datetime(2024, 1, 10)},
+    {'nombre': 'Miguel Torres', 'ocupacion': 'Arquitecto',
+     'texto': 'Las grabaciones de nuestros proyectos inmobiliarios han sido fundamentales para nuestras presentaciones.',
+     'fecha_creacion': datetime(2024, 1, 5)},
+]
+
+
+class TestimonialError(ValueError):
+    """Datos de entrada no válidos (cursor, límite o campos del formulario)."""
+
+
+def encode_cursor(key):
+    fecha, testimonio_id = key
+    raw = json.dumps([fecha.isoformat(), testimonio_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        fecha, testimonio_id = json.loads(raw)
+        return datetime.fromisoformat(fecha), int(testimonio_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise TestimonialError("Cursor no válido")
+
+
+def _key(testimonio):
+    return testimonio.fecha_creacion, testimonio.id
+
+
+class TestimonialPage:
+    """Una página serializada y el rango de claves ``[lower, upper)`` que cubre.
+
+    ``upper`` es la clave del cursor de entrada (``None`` en la primera página) y
+    ``lower`` la del último testimonio (``None`` si es la última página).
+    """
+
+    def __init__(self, testimonios, next_cursor, upper, lower):
+        self.testimonios = testimonios
+        self.next_cursor = next_cursor
+        self.upper = upper
+        self.lower = lower
+        self.body = json.dumps({
+            'success': True,
+            'testimonios': testimonios,
+            'next_cursor': next_cursor,
+        }, ensure_ascii=False).encode('utf-8')
+
+    @cached_property
+    def encoded(self):
+        """El cuerpo con su ETag y variantes comprimidas, para ``PageCache.serve``."""
+        return CachedPage(self.body, min_compress=COMPRESS_MIN_BYTES)
+
+    def covers(self, key):
+        return (self.upper is None or key < self.upper) and (self.lower is None or key >= self.lower)
+
+
+class TestimonialStore:
+    """Acceso a los testimonios con caché de páginas e invalidación precisa."""
+
+    def __init__(self, version_path, default_limit=10, max_limit=50, max_pages=128):
+        self.version_path = version_path
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = self._read_version()
+
+    def page(self, cursor=None, limit=None):
+        """Página de testimonios aprobados a partir de ``cursor`` (``TestimonialPage``)."""
+        limit = self.default_limit if limit is None else limit
+        if not 1 <= limit <= self.max_limit:
+            raise TestimonialError(f"limit debe estar entre 1 y {self.max_limit}")
+        upper = decode_cursor(cursor) if cursor else None
+
+        self._check_version()
+        cache_key = (upper, limit)
+        with self._lock:
+            page = self._pages.get(cache_key)
+            if page is not None:
+                self._pages.move_to_end(cache_key)
+        if page is not None:
+            cache_event('testimonios', 'hit')
+            return page
+
+        cache_event('testimonios', 'miss')
+        page = self._load(upper, limit)
+        with self._lock:
+            self._pages[cache_key] = page
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return page
+
+    def _load(self, upper, limit):
+        query = Testimonio.query.filter(Testimonio.aprobado.is_(True))
+        if upper is not None:
+            fecha, testimonio_id = upper
+            query = query.filter(or_(
+                Testimonio.fecha_creacion < fecha,
+                and_(Testimonio.fecha_creacion == fecha, Testimonio.id < testimonio_id),
+            ))
+        rows = (query.order_by(Testimonio.fecha_creacion.desc(), Testimonio.id.desc())
+                .limit(limit + 1).all())
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        lower = _key(rows[-1]) if has_more else None
+        return TestimonialPage(
+            [row.to_dict() for row in rows],
+            encode_cursor(lower) if has_more else None,
+            upper,
+            lower,
+        )
+
+    def create(self, data, ip_address=None):
+        """Valida y guarda un testimonio; devuelve ``(testimonio, token)``."""
+        if not isinstance(data, dict):
+            raise TestimonialError("Envía un objeto JSON")
+        fields = {}
+        for field, max_length in MAX_LENGTHS.items():
+            value = str(data.get(field) or '').strip()
+            if not value:
+                raise TestimonialError("Por favor, completa todos los campos")
+            if len(value) > max_length:
+                raise TestimonialError(f"El campo {field} admite como máximo {max_length} caracteres")
+            fields[field] = value
+
+        token = uuid.uuid4().hex
+        testimonio = Testimonio(**fields, token=token, ip_address=ip_address)
+        db.session.add(testimonio)
+        db.session.commit()
+        if testimonio.aprobado:
+            self._invalidate(_key(testimonio))
+        return testimonio, token
+
+    def delete(self, token):
+        """Borra el testimonio del token; ``False`` si no existe."""
+        testimonio = Testimonio.query.filter_by(token=token).first()
+        if testimonio is None:
+            return False
+        key, aprobado = _key(testimonio), testimonio.aprobado
+        db.session.delete(testimonio)
+        db.session.commit()
+        if aprobado:
+            self._invalidate(key)
+        return True
+
+    def seed(self):
+        """Carga ``SEED_TESTIMONIOS`` en la tabla recién creada; devuelve cuántos ha añadido.
+
+        Solo se llama cuando se crea la tabla. La comprobación de que está vacía
+        cubre a los workers que la crean a la vez.
+        """
+        # Los workers que arrancan a la vez no deben sembrar dos veces
+        with open(self.version_path + '.lock', 'a') as lock:
+            lock_exclusive(lock)
+            if Testimonio.query.first() is not None:
+                return 0
+            db.session.add_all(Testimonio(**fields) for fields in SEED_TESTIMONIOS)
+            db.session.commit()
+        self.clear()
+        self._bump_version()
+        return len(SEED_TESTIMONIOS)
+
+    def _invalidate(self, key):
+        with self._lock:
+            for cache_key in [k for k, page in self._pages.items() if page.covers(key)]:
+                del self._pages[cache_key]
+        self._bump_version()
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    # Versión compartida entre procesos ----------------------------------------
+
+    def _read_version(self):
+        try:
+            with open(self.version_path, encoding='ascii') as fh:
+                return fh.read().strip() or None
+        except OSError:
+            return None
+
+    def _bump_version(self):
+        """Incrementa el contador del fichero de versión.
+
+        Solo se adopta el valor nuevo si el anterior era el que ya conocía este
+        worker: si otro escribió entre medias, la versión local se queda atrás y
+        ``_check_version`` vacía la caché en la siguiente lectura.
+        """
+        try:
+            fd = os.open(self.version_path, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, 'r+', encoding='ascii') as fh:
+                lock_exclusive(fh)
+                previous = fh.read().strip() or None
+                try:
+                    current = str(int(previous or 0) + 1)
+                except ValueError:
+                    current = '1'
+                # El contador nunca se acorta: quien lee sin bloqueo ve el valor viejo o el nuevo
+                fh.seek(0)
+                fh.write(current)
+                fh.truncate()
+        except OSError as e:
+            logger.warning(f"No se pudo actualizar {self.version_path}: {e}")
+            return
+        if previous == self._version:
+            self._version = current
+
+    def _check_version(self):
+        version = self._read_version()
+        if version != self._version:
+            # Otro worker ha escrito: no sabemos qué páginas cambiaron
+            self.clear()
+            self._version = version
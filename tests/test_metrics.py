@@ -0,0 +1,84 @@
+"""Pruebas de la agregación de métricas entre workers de ``Instrumentation``."""
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+
+import pytest
+from flask import Flask
+
+import metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Un worker que cuenta, vuelca sus métricas y se queda vivo hasta que lo matan
+WORKER = """
+import sys
+from flask import Flask
+import metrics
+instrumentation = metrics.Instrumentation(Flask('worker'), directory=sys.argv[1])
+for _ in range(int(sys.argv[2])):
+    metrics.CACHE_REQUESTS.inc('prueba', 'hit')
+    metrics.REQUEST_LATENCY.observe(0.01, '/prueba', 'GET', '200')
+instrumentation.dump()
+print('listo', flush=True)
+sys.stdin.read()
+"""
+
+
+@pytest.fixture
+def instrumentation(tmp_path):
+    return metrics.Instrumentation(Flask(__name__), directory=str(tmp_path))
+
+
+def start_worker(directory, count):
+    worker = subprocess.Popen([sys.executable, '-c', WORKER, directory, str(count)], cwd=ROOT,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    assert worker.stdout.readline().strip() == 'listo'
+    return worker
+
+
+def kill(worker):
+    worker.send_signal(signal.SIGKILL)
+    worker.wait()
+
+
+def totals(text):
+    hits = re.search(r'^freirefpv_cache_requests_total\{cache="prueba",result="hit"\} (\d+)$', text, re.M)
+    count = re.search(r'^freirefpv_http_request_duration_seconds_count\{route="/prueba",method="GET",'
+                      r'status="200"\} (\d+)$', text, re.M)
+    return int(hits.group(1)) if hits else 0, int(count.group(1)) if count else 0
+
+
+def test_los_totales_no_bajan_al_morir_un_worker(instrumentation, tmp_path):
+    directory = str(tmp_path)
+    seen = []
+    worker_a = start_worker(directory, 3)
+    worker_b = start_worker(directory, 2)
+    seen.append(totals(instrumentation.render()))
+
+    kill(worker_a)
+    seen.append(totals(instrumentation.render()))
+    # El volcado del muerto ya está en el archivo y no se vuelve a sumar
+    seen.append(totals(instrumentation.render()))
+
+    worker_c = start_worker(directory, 4)
+    seen.append(totals(instrumentation.render()))
+    kill(worker_b)
+    kill(worker_c)
+    seen.append(totals(instrumentation.render()))
+
+    assert seen == [(5, 5), (5, 5), (5, 5), (9, 9), (9, 9)]
+    assert sorted(os.listdir(directory)) == [f'{os.getpid()}.json', 'archive.json', 'archive.json.lock']
+
+
+def test_archiva_el_volcado_de_un_worker_anterior_con_el_mismo_pid(instrumentation, tmp_path):
+    # Un worker muerto cuyo PID ha reutilizado este proceso: el primer volcado no debe pisarlo
+    previous = {'freirefpv_cache_requests_total': [[['prueba', 'hit'], 7]]}
+    (tmp_path / f'{os.getpid()}.json').write_text(json.dumps(previous), encoding='utf-8')
+
+    assert totals(instrumentation.render()) == (7, 0)
+    archive = json.loads((tmp_path / 'archive.json').read_text(encoding='utf-8'))
+    assert archive['freirefpv_cache_requests_total'] == [[['prueba', 'hit'], 7]]
@@ -0,0 +1,57 @@
+"""Pruebas de la recuperación del fichero de pedidos pendientes de ``OrderWriter``."""
+import json
+
+import pytest
+from flask import Flask
+
+from models import Pedido, db
+from order_queue import OrderWriter
+
+
+def make_order(nombre):
+    return {
+        'tipo_servicio': 'Bodas', 'precio_base': 'Desde 250€', 'ubicacion': 'Marbella',
+        'duracion': '2 horas', 'nombre': nombre, 'email': f'{nombre}@example.com',
+        'telefono': '600000000', 'mensaje': None, 'fecha_solicitud': '2026-10-18T10:00:00',
+    }
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'pedidos.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_recupera_los_pedidos_y_aparta_las_lineas_corruptas(app, tmp_path):
+    spill = tmp_path / 'pedidos-pendientes.jsonl'
+    good = [make_order('ana'), make_order('luis')]
+    spill.write_text(
+        json.dumps(good[0]) + '\n'
+        # Línea cortada por un SIGKILL a mitad de escritura
+        + json.dumps(make_order('rota'))[:40] + '\n'
+        + '[1, 2]\n'
+        + json.dumps(good[1]) + '\n',
+        encoding='utf-8')
+    writer = OrderWriter(app, str(spill), enabled=False)
+
+    assert writer.recover() == 2
+
+    with app.app_context():
+        assert sorted(p.nombre for p in Pedido.query.all()) == ['ana', 'luis']
+    assert spill.read_text(encoding='utf-8') == ''
+    corrupt = (tmp_path / 'pedidos-pendientes.jsonl.corrupt').read_text(encoding='utf-8').splitlines()
+    assert corrupt == [json.dumps(make_order('rota'))[:40], '[1, 2]']
+
+
+def test_un_fichero_solo_con_lineas_corruptas_no_falla(app, tmp_path):
+    spill = tmp_path / 'pedidos-pendientes.jsonl'
+    spill.write_text('{"nombre": "a', encoding='utf-8')
+    writer = OrderWriter(app, str(spill), enabled=False)
+
+    assert writer.recover() == 0
+    assert spill.read_text(encoding='utf-8') == ''
+    assert (tmp_path / 'pedidos-pendientes.jsonl.corrupt').read_text(encoding='utf-8') == '{"nombre": "a\n'
@@ -0,0 +1,58 @@
+"""Pruebas de la caché de páginas de testimonios compartida entre workers."""
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+import models
+import testimonial_store
+from models import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'testimonios.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        for day in range(1, 6):
+            db.session.add(models.Testimonio(nombre=f"t{day}", ocupacion="o", texto="texto", token=f"token-{day}",
+                                      fecha_creacion=datetime(2026, 1, day)))
+        db.session.commit()
+        yield app
+
+
+def names(page):
+    return [t['nombre'] for t in page.testimonios]
+
+
+def test_ve_las_escrituras_de_otro_worker_aunque_escriba_despues(app, tmp_path):
+    version_path = str(tmp_path / 'testimonios.version')
+    worker_a = testimonial_store.TestimonialStore(version_path, default_limit=2)
+    worker_b = testimonial_store.TestimonialStore(version_path, default_limit=2)
+
+    first = worker_a.page()
+    second = worker_a.page(cursor=first.next_cursor)
+    assert names(second) == ['t3', 't2']
+
+    # B borra un testimonio de la segunda página y A escribe antes de volver a leer
+    assert worker_b.delete('token-2')
+    assert worker_a.delete('token-5')
+
+    # El borrado de A solo invalida su primera página; el de B tiene que
+    # detectarse igualmente por la versión compartida
+    assert names(worker_a.page()) == ['t4', 't3']
+    assert names(worker_a.page(cursor=first.next_cursor)) == ['t3', 't1']
+
+
+def test_las_escrituras_propias_no_vacian_toda_la_cache(app, tmp_path):
+    store = testimonial_store.TestimonialStore(str(tmp_path / 'testimonios.version'), default_limit=2)
+    first = store.page()
+    second = store.page(cursor=first.next_cursor)
+
+    assert store.delete('token-4')
+
+    # Solo se invalida la primera página; la segunda sigue en caché porque la versión nueva es la propia
+    assert names(store.page()) == ['t5', 't3']
+    assert store.page(cursor=first.next_cursor) is second
@@ -0,0 +1,204 @@
+"""Pruebas del cliente de OpenWeather contra el stub local (``benchmarks/openweather_stub.py``).
+
+Cada prueba arranca su propio stub en un puerto libre y configura los fallos
+que necesita: respuestas colgadas, códigos 429/5xx o errores permanentes.
+"""
+import time
+
+import pytest
+
+from openweather_stub import start_stub
+from weather_client import CircuitBreaker, CircuitOpenError, OpenWeatherClient, OpenWeatherError
+
+
+@pytest.fixture
+def stub():
+    server, config = start_stub()
+    yield f"http://127.0.0.1:{server.server_port}", config
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(base_url, **options):
+    options = {'connect_timeout': 1, 'read_timeout': 1, 'retries': 0, 'backoff': 0.05,
+               'breaker': CircuitBreaker(failure_threshold=100), **options}
+    return OpenWeatherClient("test-key", base_url=base_url, **options)
+
+
+def test_devuelve_el_json_de_onecall(stub):
+    base_url, config = stub
+    data = make_client(base_url).onecall(36.72, -4.42, exclude="minutely")
+    assert data['lat'] == 36.72 and 'hourly' in data and 'minutely' not in data
+    assert config.calls == 1
+
+
+def test_timeout_de_lectura_con_la_respuesta_colgada(stub):
+    base_url, config = stub
+    config.update({'hang_rate': 1.0, 'hang_seconds': 5})
+    client = make_client(base_url, read_timeout=0.3)
+
+    start = time.monotonic()
+    with pytest.raises(OpenWeatherError, match="conexión"):
+        client.onecall(36.72, -4.42)
+    assert time.monotonic() - start < 2
+
+
+def test_timeout_en_cada_reintento(stub):
+    base_url, config = stub
+    config.update({'hang_rate': 1.0, 'hang_seconds': 5})
+    client = make_client(base_url, read_timeout=0.2, retries=2, backoff=0.01)
+
+    start = time.monotonic()
+    with pytest.raises(OpenWeatherError):
+        client.onecall(36.72, -4.42)
+    assert config.calls == 3
+    assert time.monotonic() - start < 2
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_reintenta_429_y_5xx_con_backoff(stub, monkeypatch, status):
+    base_url, config = stub
+    config.update({'status': status})
+    client = make_client(base_url, retries=3, backoff=0.1)
+
+    delays = []
+
+    def fake_sleep(seconds):
+        delays.append(seconds)
+        if len(delays) == 2:
+            # El upstream se recupera antes del tercer intento
+            config.update({'status': None})
+
+    monkeypatch.setattr("weather_client.time.sleep", fake_sleep)
+    data = client.onecall(36.72, -4.42)
+
+    assert 'current' in data
+    assert config.calls == 3
+    # Backoff exponencial con jitter de ±50 %: 0.1 s y luego 0.2 s
+    assert 0.05 <= delays[0] <= 0.15
+    assert 0.1 <= delays[1] <= 0.3
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_agota_los_reintentos_y_lanza_el_ultimo_error(stub, monkeypatch):
+    base_url, config = stub
+    config.update({'status': 503})
+    monkeypatch.setattr("weather_client.time.sleep", lambda seconds: None)
+    client = make_client(base_url, retries=2)
+
+    with pytest.raises(OpenWeatherError, match="503"):
+        client.onecall(36.72, -4.42)
+    assert config.calls == 3
+
+
+def test_no_reintenta_errores_de_cliente(stub):
+    base_url, config = stub
+    config.update({'status': 401})
+    client = make_client(base_url, retries=3)
+
+    with pytest.raises(OpenWeatherError, match="401"):
+        client.onecall(36.72, -4.42)
+    assert config.calls == 1
+
+
+def test_circuit_breaker_closed_open_half_open_closed(stub):
+    base_url, config = stub
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    client = make_client(base_url, breaker=breaker)
+    config.update({'status': 503})
+
+    # closed -> open tras dos fallos seguidos
+    for _ in range(2):
+        assert breaker.state == CircuitBreaker.CLOSED
+        with pytest.raises(OpenWeatherError):
+            client.onecall(36.72, -4.42)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Abierto: falla al instante sin llamar a la API
+    with pytest.raises(CircuitOpenError):
+        client.onecall(36.72, -4.42)
+    assert config.calls == 2
+
+    # Pasado reset_timeout deja pasar una petición de prueba en half-open
+    states = []
+    session_get = client.session.get
+
+    def get(*args, **kwargs):
+        states.append(breaker.state)
+        return session_get(*args, **kwargs)
+
+    client.session.get = get
+    time.sleep(0.25)
+    with pytest.raises(OpenWeatherError):
+        client.onecall(36.72, -4.42)
+    # La prueba falla: vuelve a abrirse
+    assert states == [CircuitBreaker.HALF_OPEN]
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Otra prueba, ahora con el upstream recuperado: se cierra
+    config.update({'status': None})
+    time.sleep(0.25)
+    assert 'current' in client.onecall(36.72, -4.42)
+    assert states == [CircuitBreaker.HALF_OPEN, CircuitBreaker.HALF_OPEN]
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_reutiliza_la_sesion_y_la_conexion(stub):
+    base_url, config = stub
+    client = make_client(base_url)
+
+    session = client.session
+    for _ in range(5):
+        client.onecall(36.72, -4.42)
+    assert client.session is session
+    assert config.calls == 5
+
+    # Las cinco peticiones han ido por la misma conexión keep-alive del pool
+    poolmanager = session.get_adapter(base_url).poolmanager
+    pools = [poolmanager.pools[key] for key in poolmanager.pools.keys()]
+    assert [(pool.num_connections, pool.num_requests) for pool in pools] == [(1, 5)]
+
+
+@pytest.mark.parametrize("base_url", ["http://127.0.0.1:9", None])
+def test_la_api_key_no_aparece_en_los_errores(stub, base_url):
+    # Conexión rechazada (puerto cerrado) o timeout de lectura con el stub colgado
+    stub_url, config = stub
+    config.update({'hang_rate': 1.0, 'hang_seconds': 5})
+    client = OpenWeatherClient("secret-api-key-123", base_url=base_url or stub_url,
+                               connect_timeout=0.5, read_timeout=0.2, retries=0)
+
+    with pytest.raises(OpenWeatherError) as excinfo:
+        client.onecall(36.72, -4.42)
+    assert "secret-api-key-123" not in str(excinfo.value)
+
+
+def test_una_prueba_con_un_error_inesperado_vuelve_a_abrir_el_breaker(stub):
+    base_url, config = stub
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.2)
+    client = make_client(base_url, breaker=breaker)
+    config.update({'status': 503})
+    with pytest.raises(OpenWeatherError):
+        client.onecall(36.72, -4.42)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # La petición de prueba lanza algo que no es un error de requests (p. ej. un Timeout de gevent)
+    class Timeout(BaseException):
+        pass
+
+    def get(*args, **kwargs):
+        raise Timeout()
+
+    session_get = client.session.get
+    client.session.get = get
+    time.sleep(0.25)
+    with pytest.raises(Timeout):
+        client.onecall(36.72, -4.42)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Y no se queda en half-open: la siguiente prueba llega a la API y lo cierra
+    client.session.get = session_get
+    config.update({'status': None})
+    time.sleep(0.25)
+    assert 'current' in client.onecall(36.72, -4.42)
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,293 @@
+"""Servicio de los vídeos del sitio con soporte de Range e índice de metadatos.
+
+Al arrancar se recorre ``static/video`` y ``static/videos`` y se guarda, para
+cada MP4, su tamaño, duración y resolución (leídas de las cajas ``mvhd`` y
+``tkhd`` sin decodificar el vídeo), el póster y la versión ligera para móvil si
+existen. El índice se expone en JSON y las plantillas lo consultan con
+``video_info()``, de modo que el front-end no tiene que sondear cada fichero.
+
+Los vídeos se sirven con ``Range``/206: bajo gunicorn el fichero se entrega con
+``wsgi.file_wrapper``, que usa ``sendfile`` desde la posición pedida (copia
+cero); gunicorn además corta la respuesta en el ``Content-Length``.
+
+Convenciones:
+    video/Nombre.mp4          vídeo original
+    video/Nombre_mobile.mp4   versión ligera para móvil (opcional)
+    video/posters/Nombre.jpg  fotograma de póster (python video_library.py --posters)
+"""
+import argparse
+import hashlib
+import logging
+import os
+import shutil
+import struct
+import subprocess
+
+from flask import Response, abort, request, url_for
+
+logger = logging.getLogger(__name__)
+
+VIDEO_DIRS = ('video', 'videos')
+MOBILE_SUFFIX = '_mobile'
+POSTER_DIR = 'posters'
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 31536000
+
+
+# Lectura de cabeceras MP4 -----------------------------------------------------
+
+def _iter_boxes(fh, start, end):
+    """Itera ``(tipo, inicio_datos, fin)`` de las cajas MP4 entre ``start`` y ``end``."""
+    offset = start
+    while offset + 8 <= end:
+        fh.seek(offset)
+        header = fh.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        data_start = offset + 8
+        if size == 1:
+            size = struct.unpack('>Q', fh.read(8))[0]
+            data_start += 8
+        elif size == 0:
+            size = end - offset
+        if size < 8:
+            return
+        yield box_type.decode('latin-1'), data_start, offset + size
+        offset += size
+
+
+def read_mp4_info(path):
+    """Duración (s) y resolución de un MP4, o ``None`` en cada campo si no se puede leer."""
+    info = {'duration': None, 'width': None, 'height': None}
+    try:
+        with open(path, 'rb') as fh:
+            size = os.fstat(fh.fileno()).st_size
+            for box_type, data_start, box_end in _iter_boxes(fh, 0, size):
+                if box_type != 'moov':
+                    continue
+                for child, child_start, child_end in _iter_boxes(fh, data_start, box_end):
+                    if child == 'mvhd':
+                        fh.seek(child_start)
+                        version = fh.read(1)[0]
+                        if version == 1:
+                            fh.seek(child_start + 20)
+                            timescale, duration = struct.unpack('>IQ', fh.read(12))
+                        else:
+                            fh.seek(child_start + 12)
+                            timescale, duration = struct.unpack('>II', fh.read(8))
+                        if timescale:
+                            info['duration'] = round(duration / timescale, 3)
+                    elif child == 'trak' and info['width'] is None:
+                        for grandchild, gc_start, gc_end in _iter_boxes(fh, child_start, child_end):
+                            if grandchild == 'tkhd':
+                                # Ancho y alto en punto fijo 16.16 al final de tkhd
+                                fh.seek(gc_end - 8)
+                                width, height = struct.unpack('>II', fh.read(8))
+                                if width and height:
+                                    info['width'] = width >> 16
+                                    info['height'] = height >> 16
+                break
+    except (OSError, struct.error, IndexError) as e:
+        logger.warning(f"No se pudieron leer los metadatos de {path}: {e}")
+    return info
+
+
+# Índice -----------------------------------------------------------------------
+
+def build_index(static_folder):
+    """Índice ``{ruta relativa: metadatos}`` de todos los vídeos originales."""
+    index = {}
+    for directory in VIDEO_DIRS:
+        base = os.path.join(static_folder, directory)
+        if not os.path.isdir(base):
+            continue
+        for name in sorted(os.listdir(base)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() != '.mp4' or stem.endswith(MOBILE_SUFFIX):
+                continue
+            path = os.path.join(base, name)
+            stat = os.stat(path)
+            entry = {
+                'name': f"{directory}/{name}",
+                'size': stat.st_size,
+                'etag': hashlib.sha1(f"{name}-{stat.st_size}-{stat.st_mtime_ns}".encode()).hexdigest()[:16],
+                **read_mp4_info(path),
+                'mobile': None,
+                'poster': None,
+            }
+            mobile_name = f"{stem}{MOBILE_SUFFIX}{ext}"
+            if os.path.exists(os.path.join(base, mobile_name)):
+                mobile_stat = os.stat(os.path.join(base, mobile_name))
+                entry['mobile'] = {'name': f"{directory}/{mobile_name}", 'size': mobile_stat.st_size}
+            poster_name = f"{POSTER_DIR}/{stem}.jpg"
+            if os.path.exists(os.path.join(base, poster_name)):
+                entry['poster'] = f"{directory}/{poster_name}"
+            index[entry['name']] = entry
+    return index
+
+
+class VideoLibrary:
+    """Índice de vídeos en memoria y respuesta con soporte de Range."""
+
+    def __init__(self, app=None, static_assets=None):
+        self.index = {}
+        self._files = {}
+        if app is not None:
+            self.init_app(app, static_assets)
+
+    def init_app(self, app, static_assets):
+        self.app = app
+        self.static_assets = static_assets
+        self.reload()
+        app.jinja_env.globals['video_info'] = self.video_info
+
+    def reload(self):
+        self.index = build_index(self.app.static_folder)
+        # Ficheros servibles (originales y versiones móviles) -> etag
+        self._files = {}
+        for name, entry in self.index.items():
+            self._files[name] = entry['etag']
+            if entry['mobile']:
+                self._files[entry['mobile']['name']] = entry['etag'] + '-m'
+
+    def media_url(self, filename):
+        return url_for('stream_video', filename=filename, v=self._files[filename])
+
+    def video_info(self, filename):
+        """Metadatos públicos de un vídeo con sus URLs (``{}`` si no está en el índice)."""
+        entry = self.index.get(filename)
+        if entry is None:
+            return {}
+        return {
+            'name': entry['name'],
+            'url': self.media_url(entry['name']),
+            'size': entry['size'],
+            'duration': entry['duration'],
+            'width': entry['width'],
+            'height': entry['height'],
+            'mobile_url': self.media_url(entry['mobile']['name']) if entry['mobile'] else None,
+            'mobile_size': entry['mobile']['size'] if entry['mobile'] else None,
+            'poster': self.static_assets.asset_url(entry['poster']) if entry['poster'] else None,
+        }
+
+    def catalog(self):
+        return [self.video_info(name) for name in self.index]
+
+    def stream(self, filename):
+        """Respuesta 200/206/304/416 para un vídeo del índice."""
+        etag = self._files.get(filename)
+        if etag is None:
+            abort(404)
+        path = os.path.join(self.app.static_folder, filename)
+        size = os.path.getsize(path)
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            self._set_cache_headers(response, etag)
+            return response
+
+        start, stop, status = 0, size, 200
+        byte_range = request.range
+        if byte_range is not None and self._if_range_matches(etag):
+            if byte_range.units != 'bytes' or len(byte_range.ranges) != 1:
+                pass  # Varios rangos: se sirve el fichero completo, como permite la RFC 9110
+            else:
+                satisfiable = byte_range.range_for_length(size)
+                if satisfiable is None:
+                    response = Response(status=416)
+                    response.headers['Content-Range'] = f"bytes */{size}"
+                    return response
+                start, stop = satisfiable
+                status = 206
+
+        length = stop - start
+        fh = open(path, 'rb')
+        fh.seek(start)
+        file_wrapper = request.environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None and 'gunicorn' in request.environ.get('SERVER_SOFTWARE', ''):
+            # gunicorn usa sendfile desde la posición actual y respeta el Content-Length
+            body = file_wrapper(fh, CHUNK_SIZE)
+        else:
+            body = _read_range(fh, length)
+
+        response = Response(body, status=status, mimetype='video/mp4', direct_passthrough=True)
+        response.content_length = length
+        response.accept_ranges = 'bytes'
+        if status == 206:
+            response.headers['Content-Range'] = f"bytes {start}-{stop - 1}/{size}"
+        self._set_cache_headers(response, etag)
+        return response
+
+    def _if_range_matches(self, etag):
+        if_range = request.if_range
+        if if_range.etag is not None:
+            return if_range.etag == etag
+        return if_range.date is None
+
+    def _set_cache_headers(self, response, etag):
+        response.set_etag(etag)
+        response.cache_control.public = True
+        if request.args.get('v') == etag:
+            # URL versionada: si el vídeo cambia, cambia la URL
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+
+
+def _read_range(fh, length):
+    """Lee ``length`` bytes por bloques (servidores sin ``wsgi.file_wrapper``)."""
+    try:
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def generate_posters(static_folder, at_second=1.0, force=False):
+    """Extrae un fotograma de cada vídeo con ffmpeg (si está instalado)."""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        print("ffmpeg no está instalado: no se generan pósters")
+        return
+    for name, entry in build_index(static_folder).items():
+        directory, filename = name.split('/', 1)
+        poster = os.path.join(static_folder, directory, POSTER_DIR,
+                              os.path.splitext(filename)[0] + '.jpg')
+        if os.path.exists(poster) and not force:
+            continue
+        os.makedirs(os.path.dirname(poster), exist_ok=True)
+        seek = min(at_second, (entry['duration'] or at_second) / 2)
+        result = subprocess.run(
+            [ffmpeg, '-y', '-loglevel', 'error', '-ss', str(seek), '-i',
+             os.path.join(static_folder, name), '-frames:v', '1', '-q:v', '4', poster],
+            capture_output=True, text=True)
+        if result.returncode == 0:
+            print(f"Póster generado: {poster}")
+        else:
+            print(f"No se pudo generar el póster de {name}: {result.stderr.strip()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice de vídeos y generación de pósters")
+    parser.add_argument("--static", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
+    parser.add_argument("--posters", action="store_true", help="generar pósters con ffmpeg")
+    parser.add_argument("--force", action="store_true", help="regenerar pósters existentes")
+    args = parser.parse_args()
+
+    if args.posters:
+        generate_posters(args.static, force=args.force)
+    for name, entry in build_index(args.static).items():
+        duration = f"{entry['duration']:.1f}s" if entry['duration'] else "?"
+        size = f"{entry['width']}x{entry['height']}" if entry['width'] else "?"
+        print(f"{name:<32}{entry['size']:>12} bytes  {duration:>8}  {size:>10}"
+              f"  móvil: {'sí' if entry['mobile'] else 'no'}  póster: {'sí' if entry['poster'] else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
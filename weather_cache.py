@@ -0,0 +1,161 @@
+"""Caché compartida de la instantánea del tiempo con TTL y stale-while-revalidate.
+
+La instantánea procesada se guarda en un fichero JSON local para que todos los
+workers de gunicorn de la misma máquina la compartan. Un fichero de bloqueo
+(flock) garantiza que, en toda la máquina, solo un proceso consulte OpenWeather
+por ventana de TTL; el resto sigue sirviendo la copia existente mientras tanto.
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+
+from metrics import cache_event
+from serving import lock_exclusive
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherCache:
+    """Caché de fichero con TTL, refresco en segundo plano y single-flight.
+
+    - Dentro del TTL se devuelve la copia sin tocar la red.
+    - Pasado el TTL (pero dentro de ``stale_ttl``) se devuelve la copia antigua
+      y se lanza un único refresco en segundo plano.
+    - Sin copia utilizable se refresca de forma síncrona, pero un solo proceso
+      llama a la API; los demás esperan el bloqueo y leen su resultado.
+    """
+
+    def __init__(self, path, fetch, ttl=600, stale_ttl=3600, retry_interval=60, name='weather',
+                 on_fetch=None):
+        self.path = path
+        self.name = name
+        self.lock_path = f"{path}.lock"
+        self.fetch = fetch
+        # Se llama con (datos, instante) tras cada consulta correcta, una sola vez en toda la máquina
+        self.on_fetch = on_fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.retry_interval = retry_interval
+
+        self._local_lock = threading.Lock()
+        self._snapshot = None
+        self._snapshot_mtime = None
+
+    # Lectura -----------------------------------------------------------------
+
+    def read_snapshot(self):
+        """Devuelve la última instantánea publicada (o None) sin tocar la red.
+
+        Solo se vuelve a leer el fichero cuando cambia su ``mtime``, así que en
+        el caso habitual cuesta un ``stat``.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        if mtime != self._snapshot_mtime:
+            try:
+                with open(self.path, "r", encoding="utf-8") as fh:
+                    snapshot = json.load(fh)
+            except (OSError, ValueError) as e:
+                logger.warning(f"No se pudo leer la caché del tiempo: {e}")
+                return self._snapshot
+            self._snapshot = snapshot
+            self._snapshot_mtime = mtime
+        return self._snapshot
+
+    def get(self):
+        """Devuelve los datos del tiempo aplicando TTL y stale-while-revalidate."""
+        now = time.time()
+        snapshot = self.read_snapshot()
+
+        if snapshot and snapshot.get("data") is not None:
+            age = now - snapshot["fetched_at"]
+            if age < self.ttl:
+                cache_event(self.name, 'hit')
+                return snapshot["data"]
+            if age < self.ttl + self.stale_ttl:
+                cache_event(self.name, 'stale')
+                if self._should_attempt(snapshot, now):
+                    self.refresh_async()
+                return snapshot["data"]
+
+        # No hay datos o son demasiado antiguos: refresco síncrono
+        if snapshot and not self._should_attempt(snapshot, now):
+            cache_event(self.name, 'unavailable')
+            return None
+        cache_event(self.name, 'miss')
+        snapshot = self.refresh(blocking=True)
+        return snapshot.get("data") if snapshot else None
+
+    def _should_attempt(self, snapshot, now):
+        """Tras un fallo, no reintenta contra la API hasta pasado ``retry_interval``."""
+        return now - snapshot.get("failed_at", 0) >= self.retry_interval
+
+    # Escritura ---------------------------------------------------------------
+
+    def refresh_async(self):
+        """Lanza un refresco en segundo plano si no hay otro en curso."""
+        if self._local_lock.locked():
+            return
+        thread = threading.Thread(target=self.refresh, kwargs={"blocking": False},
+                                  name="weather-cache-refresh", daemon=True)
+        thread.start()
+
+    def refresh(self, blocking=True, force=False):
+        """Consulta la API y publica la instantánea, con single-flight entre procesos.
+
+        Con ``blocking=False`` se abandona si otro hilo o proceso ya está
+        refrescando. Con ``blocking=True`` se espera al bloqueo y, si mientras
+        tanto otro proceso publicó datos frescos, se reutilizan sin llamar a la
+        API. ``force`` ignora el TTL (pero no el single-flight).
+        """
+        if not self._local_lock.acquire(blocking=blocking):
+            return self.read_snapshot()
+        try:
+            with open(self.lock_path, "a") as lock_file:
+                try:
+                    lock_exclusive(lock_file, blocking)
+                except BlockingIOError:
+                    return self.read_snapshot()
+
+                try:
+                    # Comprobación doble: otro proceso pudo refrescar mientras esperábamos
+                    now = time.time()
+                    snapshot = self.read_snapshot()
+                    if snapshot and not force:
+                        fresh = (snapshot.get("data") is not None
+                                 and now - snapshot["fetched_at"] < self.ttl)
+                        if fresh or not self._should_attempt(snapshot, now):
+                            return snapshot
+
+                    data = self.fetch()
+                    if data is not None:
+                        snapshot = {"fetched_at": now, "data": data}
+                        if self.on_fetch:
+                            self.on_fetch(data, now)
+                    elif snapshot:
+                        # Conservamos los datos anteriores y anotamos el fallo
+                        snapshot = dict(snapshot, failed_at=now,
+                                        failures=snapshot.get("failures", 0) + 1)
+                    else:
+                        snapshot = {"fetched_at": 0, "failed_at": now, "failures": 1, "data": None}
+                    self._write(snapshot)
+                    return snapshot
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            self._local_lock.release()
+
+    def _write(self, snapshot):
+        """Escritura atómica: fichero temporal + ``os.replace``."""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(snapshot, fh, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._snapshot = snapshot
+        self._snapshot_mtime = os.stat(self.path).st_mtime_ns
@@ -0,0 +1,181 @@
+"""Cliente de OpenWeather con conexiones reutilizables y tiempos acotados.
+
+Todas las llamadas comparten una ``requests.Session`` con pool keep-alive,
+timeouts de conexión y lectura, reintentos limitados con backoff y un circuit
+breaker: tras varios fallos seguidos se deja de llamar a la API durante un
+tiempo y se falla al instante, de modo que un OpenWeather degradado no deja a
+los workers bloqueados. Quien llama sigue sirviendo los últimos datos buenos
+(la ``WeatherCache`` conserva la instantánea anterior cuando la consulta falla).
+
+``requests`` se importa al hacer la primera consulta y no al cargar el módulo:
+en Vercel la mayoría de arranques en frío sirven páginas que leen la caché y no
+llegan a necesitarlo.
+"""
+import logging
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openweathermap.org"
+
+# Respuestas que merece la pena reintentar (el resto de 4xx son errores nuestros)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Parámetro de la API key en las URLs que aparecen en los mensajes de error
+APPID_PARAM = re.compile(r"(appid=)[^&\s'\"]+")
+
+
+class OpenWeatherError(Exception):
+    """Error al consultar OpenWeather."""
+
+
+class CircuitOpenError(OpenWeatherError):
+    """El circuit breaker está abierto: no se llama a la API."""
+
+
+class CircuitBreaker:
+    """Circuit breaker clásico de tres estados: closed, open y half-open.
+
+    Tras ``failure_threshold`` fallos seguidos se abre durante ``reset_timeout``
+    segundos. Pasado ese tiempo deja pasar una única petición de prueba: si va
+    bien se cierra y si falla vuelve a abrirse.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Solo una petición de prueba; el resto sigue fallando rápido
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit breaker de OpenWeather abierto tras {self.failures} fallos")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class OpenWeatherClient:
+    """Cliente de la API OneCall 3.0 de OpenWeather."""
+
+    def __init__(self, api_key, base_url=DEFAULT_BASE_URL, connect_timeout=3.05,
+                 read_timeout=5, retries=2, backoff=0.5, pool_size=10, breaker=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.pool_size = pool_size
+
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """``requests.Session`` compartida, creada en la primera consulta."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def onecall(self, lat, lon, exclude="minutely,hourly", units="metric", lang="es"):
+        """Devuelve el JSON de OneCall para unas coordenadas o lanza ``OpenWeatherError``."""
+        params = {
+            "lat": lat,
+            "lon": lon,
+            "exclude": exclude,
+            "appid": self.api_key,
+            "units": units,
+            "lang": lang,
+        }
+        return self._get_json("/data/3.0/onecall", params)
+
+    def _get_json(self, path, params):
+        if not self.breaker.allow():
+            raise CircuitOpenError("OpenWeather no disponible temporalmente (circuit breaker abierto)")
+        try:
+            data = self._request(f"{self.base_url}{path}", params)
+        except BaseException:
+            # Cualquier error cuenta, también los inesperados (p. ej. un Timeout de gevent):
+            # si no, una petición de prueba fallida dejaría el breaker en half-open para siempre
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return data
+
+    def _request(self, url, params):
+        """Petición con reintentos; devuelve el JSON o lanza el último ``OpenWeatherError``."""
+        from requests import RequestException
+
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # Backoff exponencial con jitter para no sincronizar reintentos
+                time.sleep(self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except RequestException as e:
+                # El texto de requests incluye la URL completa, con la API key en ``appid``
+                last_error = OpenWeatherError(f"Error de conexión con OpenWeather: {self._redact(e)}")
+                continue
+
+            if response.status_code == 200:
+                try:
+                    return response.json()
+                except ValueError as e:
+                    last_error = OpenWeatherError(f"Respuesta no válida de OpenWeather: {e}")
+                    continue
+
+            message = _error_message(response)
+            last_error = OpenWeatherError(f"OpenWeather respondió {response.status_code}: {message}")
+            if response.status_code not in RETRYABLE_STATUS:
+                # Errores de cliente (clave inválida, parámetros...): reintentar no ayuda
+                break
+        raise last_error
+
+    def _redact(self, error):
+        text = APPID_PARAM.sub(r"\1***", str(error))
+        return text.replace(self.api_key, "***") if self.api_key else text
+
+
+def _error_message(response):
+    try:
+        return response.json().get("message", "Error desconocido")
+    except ValueError:
+        return "Error desconocido"
@@ -0,0 +1,65 @@
+"""Widget del tiempo de contacto renderizado una sola vez por instantánea.
+
+El widget (estado actual, previsión de 5 días y datos de viento para la
+brújula) solo cambia cuando se publica una instantánea nueva en la
+``WeatherCache``. Se renderiza entonces y se guarda como HTML; ``/contacto`` lo
+inserta tal cual y ``/api/weather/fragment`` lo sirve para que la página lo
+sustituya entero, sin parchear el DOM campo a campo.
+
+La versión es el instante de la consulta en milisegundos, el mismo id que
+usan los eventos de ``/api/weather/stream``: la página compara ese id con el
+``data-version`` de su widget y solo pide el bloque si ha cambiado. También es
+el ETag de ``/api/weather/fragment``.
+"""
+import threading
+
+from flask import render_template
+from markupsafe import Markup
+
+from metrics import cache_event
+
+TEMPLATE = 'partials/weather_widget.html'
+
+
+def snapshot_version(snapshot):
+    """Versión de una instantánea (``'none'`` si no hay datos)."""
+    if not snapshot or snapshot.get('data') is None:
+        return 'none'
+    return str(int(snapshot['fetched_at'] * 1000))
+
+
+class WeatherFragment:
+    """HTML del widget de la última versión renderizada."""
+
+    def __init__(self, version, html):
+        self.version = version
+        self.html = Markup(html)
+        self.body = html.encode('utf-8')
+
+
+class WeatherFragmentCache:
+    """Renderiza el widget una vez por versión de la instantánea y guarda solo la última."""
+
+    def __init__(self, template=TEMPLATE, enabled=True):
+        self.template = template
+        self.enabled = enabled
+        self._fragment = None
+        self._lock = threading.Lock()
+
+    def render(self, snapshot):
+        version = snapshot_version(snapshot)
+        fragment = self._fragment
+        if self.enabled and fragment is not None and fragment.version == version:
+            cache_event('weather-fragment', 'hit')
+            return fragment
+        cache_event('weather-fragment', 'miss')
+        with self._lock:
+            # Otra petición pudo renderizar esta versión mientras esperábamos
+            fragment = self._fragment
+            if self.enabled and fragment is not None and fragment.version == version:
+                return fragment
+            data = snapshot['data'] if version != 'none' else None
+            fragment = WeatherFragment(version, render_template(self.template, weather_data=data,
+                                                                weather_version=version))
+            self._fragment = fragment
+        return fragment
@@ -0,0 +1,399 @@
+"""Histórico compacto de las condiciones de vuelo, con consultas vectorizadas.
+
+Cada previsión que se descarga de OpenWeather se resume en una fila por zona y
+hora: las condiciones observadas (``current``) y, en la fila de la hora que
+está ``forecast_lead`` horas por delante, lo que la previsión esperaba para
+ella. Así, cuando llega esa hora, la misma fila tiene lo previsto y lo real.
+
+El archivo es un búfer circular de tamaño fijo y organizado por columnas:
+tras una cabecera, cada columna es un bloque ``(zonas, capacidad)`` de un
+tipo fijo (``float32``, ``int8``...). La hora decide la posición
+(``hora % capacidad``), así que escribir no desplaza nada y el archivo nunca
+crece: ocupa lo mismo con un día que con ``retention_days`` de datos, y las
+horas más antiguas se sobrescriben solas.
+
+* Se escribe con ``mmap`` y ``struct`` de la biblioteca estándar: registrar una
+  previsión no importa numpy (ver el arranque en frío en ``template_cache.py``).
+* Se lee con ``numpy.memmap`` sobre el mismo fichero: las consultas son
+  operaciones sobre columnas enteras, milisegundos incluso con años de datos.
+* Lo comparten todos los workers de la máquina. Cada zona la escribe un solo
+  proceso a la vez (el refresco de su ``WeatherCache`` ya es single-flight) y
+  la tabla de zonas de la cabecera se modifica con un ``flock``.
+
+Cambiar la retención cambia el tamaño: el archivo anterior se conserva como
+``.old`` y se empieza uno nuevo.
+"""
+import fcntl
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from serving import lock_exclusive
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'FFPVHIST'
+VERSION = 1
+HEADER = struct.Struct('<8sHIH')
+HEADER_SIZE = 4096
+SLUG_SIZE = 32
+SLUGS_OFFSET = 64
+
+# Estados de vuelo de forecast.classify_flight_conditions; 0 = sin dato
+STATUS_CODES = {'optimal': 1, 'possible': 2, 'caution': 3, 'not-recommended': 4}
+FLYABLE_CODES = (STATUS_CODES['optimal'], STATUS_CODES['possible'])
+
+# (columna, formato struct, dtype numpy). ``hour`` son horas UTC desde 1970; 0 = hueco vacío
+COLUMNS = [
+    ('hour', '<i', '<i4'),
+    ('utc_offset', '<b', 'i1'),
+    ('temp', '<f', '<f4'),
+    ('wind', '<f', '<f4'),
+    ('rain', '<f', '<f4'),
+    ('humidity', '<f', '<f4'),
+    ('uvi', '<f', '<f4'),
+    ('pressure', '<f', '<f4'),
+    ('status', '<b', 'i1'),
+    ('fc_wind', '<f', '<f4'),
+    ('fc_rain', '<f', '<f4'),
+    ('fc_status', '<b', 'i1'),
+    ('fc_lead', '<b', 'i1'),
+]
+COLUMNS_BY_NAME = {name: fmt for name, fmt, _ in COLUMNS}
+OBSERVED = ('temp', 'wind', 'rain', 'humidity', 'uvi', 'pressure')
+
+# Horas de luz (hora local) en las que cuenta si se puede volar
+DAYLIGHT = (8, 20)
+# Tramos de viento del histograma por día de la semana (mismas unidades que forecast.py)
+WIND_BINS = (5, 10, 15, 20, 30)
+WEEKDAYS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+def _layout(capacity, max_areas):
+    """Desplazamiento de cada columna en el fichero y tamaño total."""
+    offsets = {}
+    offset = HEADER_SIZE
+    for name, fmt, _ in COLUMNS:
+        offsets[name] = offset
+        size = struct.calcsize(fmt) * capacity * max_areas
+        offset += -(-size // 64) * 64  # alineado a 64 bytes
+    return offsets, offset
+
+
+class WeatherHistory:
+    """Archivo circular por columnas con una fila por zona y hora."""
+
+    def __init__(self, path, retention_days=730, forecast_lead=24, max_areas=32, enabled=True):
+        if retention_days < 1 or not 0 < forecast_lead < 128:
+            raise ValueError("La retención debe ser de al menos un día y la antelación de 1 a 127 horas")
+        if SLUGS_OFFSET + SLUG_SIZE * max_areas > HEADER_SIZE:
+            raise ValueError(f"Como máximo {(HEADER_SIZE - SLUGS_OFFSET) // SLUG_SIZE} zonas")
+        self.path = path
+        # Las horas futuras que ya tienen previsión no deben desplazar a las más antiguas
+        self.capacity = retention_days * 24 + forecast_lead
+        self.forecast_lead = forecast_lead
+        self.max_areas = max_areas
+        self.enabled = enabled
+        self._offsets, self.size = _layout(self.capacity, max_areas)
+
+        self._pid = None
+        self._fh = None
+        self._mm = None
+        self._areas = {}
+        self._lock = threading.Lock()
+        self._arrays = None
+
+    # Fichero -----------------------------------------------------------------
+
+    def _open(self):
+        """Abre (o crea) el archivo en este proceso; tras un fork se vuelve a abrir por el flock."""
+        if self._pid == os.getpid():
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        fh = self._locked_file()
+        try:
+            if os.fstat(fh.fileno()).st_size and not self._compatible(fh):
+                logger.warning(f"El histórico {self.path} tiene otro formato o retención; se guarda como .old")
+                os.replace(self.path, f"{self.path}.old")
+                fcntl.flock(fh, fcntl.LOCK_UN)
+                fh.close()
+                fh = self._locked_file()
+            if not os.fstat(fh.fileno()).st_size:
+                # ftruncate deja el fichero disperso: solo ocupa disco lo que se escribe
+                fh.truncate(self.size)
+                fh.seek(0)
+                fh.write(HEADER.pack(MAGIC, VERSION, self.capacity, self.max_areas))
+                fh.flush()
+            mm = mmap.mmap(fh.fileno(), self.size)
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+        self._fh, self._mm, self._pid = fh, mm, os.getpid()
+        self._areas = {}
+        self._arrays = None
+
+    def _locked_file(self):
+        while True:
+            fh = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+            lock_exclusive(fh)
+            try:
+                if os.fstat(fh.fileno()).st_ino == os.stat(self.path).st_ino:
+                    return fh
+            except FileNotFoundError:
+                pass
+            # Otro proceso lo sustituyó mientras esperábamos el bloqueo
+            fcntl.flock(fh, fcntl.LOCK_UN)
+            fh.close()
+
+    def _compatible(self, fh):
+        fh.seek(0)
+        header = fh.read(HEADER.size)
+        return (len(header) == HEADER.size
+                and HEADER.unpack(header) == (MAGIC, VERSION, self.capacity, self.max_areas)
+                and os.fstat(fh.fileno()).st_size == self.size)
+
+    def _slugs(self):
+        slugs = []
+        for i in range(self.max_areas):
+            raw = self._mm[SLUGS_OFFSET + i * SLUG_SIZE:SLUGS_OFFSET + (i + 1) * SLUG_SIZE].rstrip(b'\0')
+            if not raw:
+                break
+            slugs.append(raw.decode('utf-8'))
+        return slugs
+
+    def areas(self):
+        """Zonas que tienen fila en el archivo, en orden de alta."""
+        if not os.path.exists(self.path):
+            return []
+        with self._lock:
+            self._open()
+            return self._slugs()
+
+    def _area_index(self, slug, create=False):
+        index = self._areas.get(slug)
+        if index is not None:
+            return index
+        slugs = self._slugs()
+        if slug not in slugs and create:
+            # Otro proceso puede estar dando de alta una zona a la vez
+            lock_exclusive(self._fh)
+            try:
+                slugs = self._slugs()
+                if slug not in slugs:
+                    encoded = slug.encode('utf-8')
+                    if len(slugs) >= self.max_areas or len(encoded) > SLUG_SIZE:
+                        raise ValueError(f"No caben más zonas en el histórico ({slug})")
+                    start = SLUGS_OFFSET + len(slugs) * SLUG_SIZE
+                    self._mm[start:start + len(encoded)] = encoded
+                    slugs.append(slug)
+            finally:
+                fcntl.flock(self._fh, fcntl.LOCK_UN)
+        if slug not in slugs:
+            return None
+        self._areas[slug] = slugs.index(slug)
+        return self._areas[slug]
+
+    # Escritura ---------------------------------------------------------------
+
+    def _position(self, name, area, hour):
+        fmt = COLUMNS_BY_NAME[name]
+        return self._offsets[name] + (area * self.capacity + hour % self.capacity) * struct.calcsize(fmt)
+
+    def _read(self, name, area, hour):
+        return struct.unpack_from(COLUMNS_BY_NAME[name], self._mm, self._position(name, area, hour))[0]
+
+    def _write(self, name, area, hour, value):
+        struct.pack_into(COLUMNS_BY_NAME[name], self._mm, self._position(name, area, hour), value)
+
+    def _claim(self, area, hour):
+        """Prepara la fila de esa hora, vaciándola si aún tiene la de hace ``capacity`` horas."""
+        if self._read('hour', area, hour) == hour:
+            return
+        for name, fmt, _ in COLUMNS:
+            self._write(name, area, hour, math.nan if fmt == '<f' else 0)
+        self._write('hour', area, hour, hour)
+
+    def record(self, slug, data, fetched_at=None):
+        """Guarda lo observado ahora y lo previsto para dentro de ``forecast_lead`` horas."""
+        if not self.enabled or not data:
+            return
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        hour = int(fetched_at // 3600)
+        current = data['current']
+        with self._lock:
+            self._open()
+            area = self._area_index(slug, create=True)
+
+            self._claim(area, hour)
+            self._write('utc_offset', area, hour, data.get('timezone_offset', 7200) // 3600)
+            for name in OBSERVED:
+                value = current.get('rain_amount' if name == 'rain' else name)
+                self._write(name, area, hour, math.nan if value is None else value)
+            self._write('status', area, hour, STATUS_CODES.get(current.get('flight_status'), 0))
+
+            target = hour + self.forecast_lead
+            for point in data.get('hourly') or []:
+                if point['dt'] // 3600 == target:
+                    self._claim(area, target)
+                    self._write('utc_offset', area, target, data.get('timezone_offset', 7200) // 3600)
+                    self._write('fc_wind', area, target, point['wind'])
+                    self._write('fc_rain', area, target, point['rain'])
+                    self._write('fc_status', area, target, STATUS_CODES.get(point['flight_status'], 0))
+                    self._write('fc_lead', area, target, self.forecast_lead)
+                    break
+
+    def recorder(self, slug):
+        """Callback ``on_fetch`` de ``WeatherCache`` que archiva cada previsión de esa zona."""
+        def on_fetch(data, fetched_at):
+            try:
+                self.record(slug, data, fetched_at)
+            except Exception as e:
+                # El histórico nunca debe impedir servir el tiempo
+                logger.error(f"No se pudo archivar el tiempo de {slug}: {e}")
+        return on_fetch
+
+    # Consultas ---------------------------------------------------------------
+
+    def columns(self, slug, since_hour=None):
+        """Columnas de una zona como arrays numpy (copias), solo las horas ocupadas."""
+        import numpy as np
+
+        if not os.path.exists(self.path):
+            return _empty_columns()
+        with self._lock:
+            self._open()
+            area = self._area_index(slug)
+            if area is None:
+                return _empty_columns()
+            if self._arrays is None:
+                buffer = np.memmap(self.path, mode='r', shape=(self.size,))
+                self._arrays = {
+                    name: np.ndarray((self.max_areas, self.capacity), dtype=dtype, buffer=buffer,
+                                     offset=self._offsets[name])
+                    for name, _, dtype in COLUMNS
+                }
+        hours = self._arrays['hour'][area]
+        mask = hours > 0 if since_hour is None else hours >= since_hour
+        return {name: array[area][mask] for name, array in self._arrays.items()}
+
+    def summary(self, slug, days=None, min_hours=4, now=None):
+        """Agregados de una zona: días volables por mes, viento por día de la semana y error de la previsión."""
+        now = time.time() if now is None else now
+        since = int(now // 3600) - days * 24 if days else None
+        columns = self.columns(slug, since)
+        observed = columns['status'] > 0
+        first = last = None
+        if observed.any():
+            hours = columns['hour'][observed]
+            first, last = int(hours.min()) * 3600, int(hours.max()) * 3600
+        return {
+            'area': slug,
+            'hours': int(observed.sum()),
+            'from': first,
+            'to': last,
+            'flyable_by_month': flyable_by_month(columns, min_hours),
+            'wind_by_weekday': wind_by_weekday(columns),
+            'forecast_error': forecast_error(columns),
+        }
+
+
+def _empty_columns():
+    import numpy as np
+
+    return {name: np.empty(0, dtype=dtype) for name, _, dtype in COLUMNS}
+
+
+def _local_hours(columns):
+    return columns['hour'].astype('int64') + columns['utc_offset']
+
+
+def flyable_by_month(columns, min_hours=4):
+    """Por mes: días con datos, días con al menos ``min_hours`` horas de luz volables y su tasa."""
+    import numpy as np
+
+    observed = columns['status'] > 0
+    local = _local_hours(columns)[observed]
+    hour_of_day = local % 24
+    daylight = (hour_of_day >= DAYLIGHT[0]) & (hour_of_day < DAYLIGHT[1])
+    flyable = np.isin(columns['status'][observed], FLYABLE_CODES) & daylight
+    if not local.size:
+        return []
+
+    days, day_index = np.unique(local // 24, return_inverse=True)
+    flyable_days = np.bincount(day_index, weights=flyable, minlength=days.size) >= min_hours
+    daylight_hours = np.bincount(day_index, weights=daylight, minlength=days.size)
+    flyable_hours = np.bincount(day_index, weights=flyable, minlength=days.size)
+
+    months = days.astype('datetime64[D]').astype('datetime64[M]')
+    labels, month_index = np.unique(months, return_inverse=True)
+    day_count = np.bincount(month_index, minlength=labels.size)
+    flyable_count = np.bincount(month_index, weights=flyable_days, minlength=labels.size)
+    month_daylight = np.bincount(month_index, weights=daylight_hours, minlength=labels.size)
+    month_flyable = np.bincount(month_index, weights=flyable_hours, minlength=labels.size)
+    return [
+        {
+            'month': str(label),
+            'days': int(total),
+            'flyable_days': int(flyable),
+            'flyable_rate': round(float(flyable / total), 3),
+            'flyable_hours_rate': round(float(hours_ok / hours), 3) if hours else None,
+        }
+        for label, total, flyable, hours, hours_ok in zip(labels, day_count, flyable_count,
+                                                          month_daylight, month_flyable)
+    ]
+
+
+def wind_by_weekday(columns):
+    """Distribución del viento observado por día de la semana (hora local)."""
+    import numpy as np
+
+    valid = ~np.isnan(columns['wind'])
+    wind = columns['wind'][valid].astype('float64')
+    # El 1 de enero de 1970 fue jueves (3 con lunes = 0)
+    weekday = (_local_hours(columns)[valid] // 24 + 3) % 7
+    bins = np.digitize(wind, WIND_BINS)
+    histogram = np.bincount(weekday * (len(WIND_BINS) + 1) + bins,
+                            minlength=7 * (len(WIND_BINS) + 1)).reshape(7, -1)
+    labels = [f"<{WIND_BINS[0]}"] + [f"{low}-{high}" for low, high in zip(WIND_BINS, WIND_BINS[1:])] \
+        + [f">={WIND_BINS[-1]}"]
+
+    result = []
+    for day in range(7):
+        values = wind[weekday == day]
+        entry = {'weekday': WEEKDAYS[day], 'hours': int(values.size)}
+        if values.size:
+            p10, p50, p90 = np.percentile(values, [10, 50, 90])
+            entry.update(mean=round(float(values.mean()), 1), p10=round(float(p10), 1),
+                         p50=round(float(p50), 1), p90=round(float(p90), 1),
+                         max=round(float(values.max()), 1))
+        entry['histogram'] = [{'wind': label, 'hours': int(count)} for label, count in zip(labels, histogram[day])]
+        result.append(entry)
+    return result
+
+
+def forecast_error(columns):
+    """Previsto frente a observado en las horas que tienen ambos."""
+    import numpy as np
+
+    paired = (columns['status'] > 0) & (columns['fc_status'] > 0)
+    if not paired.any():
+        return {'hours': 0}
+    wind_error = (columns['wind'][paired] - columns['fc_wind'][paired]).astype('float64')
+    rain_error = (columns['rain'][paired] - columns['fc_rain'][paired]).astype('float64')
+    actual_ok = np.isin(columns['status'][paired], FLYABLE_CODES)
+    forecast_ok = np.isin(columns['fc_status'][paired], FLYABLE_CODES)
+    return {
+        'hours': int(paired.sum()),
+        'lead_hours': int(np.median(columns['fc_lead'][paired])),
+        'wind_bias': round(float(np.nanmean(wind_error)), 2),
+        'wind_mae': round(float(np.nanmean(np.abs(wind_error))), 2),
+        'wind_rmse': round(float(np.sqrt(np.nanmean(wind_error ** 2))), 2),
+        'rain_mae': round(float(np.nanmean(np.abs(rain_error))), 2),
+        'status_accuracy': round(float(np.mean(columns['status'][paired] == columns['fc_status'][paired])), 3),
+        # Horas que se daban por volables y no lo fueron, y al revés
+        'false_flyable_rate': round(float(np.mean(forecast_ok & ~actual_ok)), 3),
+        'missed_flyable_rate': round(float(np.mean(actual_ok & ~forecast_ok)), 3),
+    }
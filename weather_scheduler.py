@@ -0,0 +1,116 @@
+"""Programador de refresco del tiempo en segundo plano.
+
+Un hilo por worker intenta hacerse líder mediante un flock no bloqueante; solo
+el líder consulta OpenWeather, con cadencia fija, jitter y backoff exponencial
+ante fallos. El resultado se publica en la ``WeatherCache`` compartida, de modo
+que las rutas se limitan a leer la última instantánea sin esperar a la red. Si
+el worker líder muere, el sistema libera el bloqueo y otro worker toma el relevo.
+"""
+import fcntl
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherScheduler:
+    """Refresca la caché del tiempo cada ``interval`` segundos desde un único proceso."""
+
+    def __init__(self, cache, interval=600, jitter=0.1, retry_base=30,
+                 max_backoff=600, stale_after=1800, enabled=True):
+        self.cache = cache
+        self.interval = interval
+        self.jitter = jitter
+        self.retry_base = retry_base
+        self.max_backoff = max_backoff
+        self.stale_after = stale_after
+        self.enabled = enabled
+        self.leader_path = f"{cache.path}.leader"
+
+        self._pid = None
+        self._thread = None
+        self._leader_file = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    @property
+    def is_leader(self):
+        return self._leader_file is not None
+
+    def ensure_started(self):
+        """Arranca el hilo en este proceso si aún no está corriendo.
+
+        Se comprueba el PID para que cada worker creado con fork arranque su
+        propio hilo (los hilos no sobreviven al fork del master de gunicorn).
+        """
+        if not self.enabled or (self._pid == os.getpid() and self._thread.is_alive()):
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._leader_file = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="weather-scheduler",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _try_become_leader(self):
+        if self._leader_file is not None:
+            return True
+        leader_file = open(self.leader_path, "a")
+        try:
+            fcntl.flock(leader_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            leader_file.close()
+            return False
+        # El descriptor queda abierto mientras viva el proceso: así conserva el liderazgo
+        self._leader_file = leader_file
+        logger.info(f"Worker {os.getpid()} asume el refresco del tiempo")
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._try_become_leader():
+                try:
+                    snapshot = self.cache.refresh(blocking=True, force=True) or {}
+                except Exception as e:
+                    logger.error(f"Error en el refresco programado del tiempo: {e}")
+                    snapshot = self.cache.read_snapshot() or {}
+                delay = self._next_delay(snapshot.get("failures", 0))
+            else:
+                # Los seguidores vigilan con más frecuencia para relevar al líder si cae
+                delay = self._with_jitter(min(self.interval, self.retry_base))
+            self._stop.wait(delay)
+
+    def _next_delay(self, failures):
+        if not failures:
+            return self._with_jitter(self.interval)
+        backoff = min(self.retry_base * 2 ** (failures - 1), self.max_backoff)
+        return self._with_jitter(backoff)
+
+    def _with_jitter(self, delay):
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def health(self):
+        """Estado del refresco para alertas: último éxito, fallos seguidos y edad."""
+        snapshot = self.cache.read_snapshot() or {}
+        now = time.time()
+        last_success = snapshot.get("fetched_at") or None
+        age = round(now - last_success, 1) if last_success else None
+        return {
+            "enabled": self.enabled,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "leader": self.is_leader,
+            "last_success": last_success,
+            "last_failure": snapshot.get("failed_at"),
+            "consecutive_failures": snapshot.get("failures", 0),
+            "age_seconds": age,
+            "stale": age is None or age > self.stale_after,
+        }
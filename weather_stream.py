@@ -0,0 +1,157 @@
+"""Canal Server-Sent Events con las actualizaciones del tiempo.
+
+En vez de que cada página abierta consulte ``/api/weather/refresh``, las páginas
+abren ``/api/weather/stream`` y el servidor les empuja la instantánea cuando
+cambia. En cada worker un único hilo vigila la ``WeatherCache`` compartida cada
+``poll_interval`` segundos (solo mientras haya clientes conectados) y reparte el
+evento a todos los clientes de ese proceso. Los refrescos contra la API siguen
+pasando por la caché, con su TTL y su single-flight entre procesos, así que N
+páginas abiertas cuestan una consulta a OpenWeather por intervalo y no N.
+
+* Solo se emite un evento cuando cambian los datos (se compara un hash), no cada
+  vez que se reescribe la instantánea.
+* El id del evento es el instante de la consulta (``fetched_at`` en ms), el mismo
+  en todos los workers: un cliente que se reconecta envía ``Last-Event-ID`` y solo
+  recibe la instantánea si es distinta de la que ya tiene.
+* Un comentario cada ``heartbeat`` segundos mantiene viva la conexión a través de
+  proxies. Pasados ``max_duration`` segundos se cierra el stream y el navegador se
+  reconecta solo, lo que reparte las conexiones entre workers tras un despliegue.
+
+Cada conexión abierta ocupa un hilo en los workers síncronos, así que por
+defecto solo se activa en el modo asíncrono (``SERVING_MODE=async``) y nunca hay
+más de ``max_clients`` por proceso.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StreamFull(Exception):
+    """Se ha alcanzado el máximo de clientes del proceso."""
+
+
+class WeatherEvent:
+    def __init__(self, event_id, digest, body):
+        self.id = event_id
+        self.digest = digest
+        self.body = body
+
+
+def _event(snapshot):
+    data = snapshot.get('data') if snapshot else None
+    if data is None:
+        return None
+    payload = json.dumps({'fetched_at': snapshot['fetched_at'], 'data': data}, ensure_ascii=False, sort_keys=True)
+    digest = hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+    event_id = str(int(snapshot['fetched_at'] * 1000))
+    body = f"id: {event_id}\nevent: weather\ndata: {payload}\n\n".encode('utf-8')
+    return WeatherEvent(event_id, digest, body)
+
+
+class WeatherBroadcaster:
+    """Reparte la instantánea del tiempo a los clientes SSE del proceso."""
+
+    def __init__(self, cache, refresh=True, poll_interval=5, heartbeat=15, max_duration=600,
+                 max_clients=500, retry=5000, enabled=True):
+        self.cache = cache
+        # Con el programador en marcha basta con leer la caché; si no, get() refresca por TTL
+        self.refresh = refresh
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.max_duration = max_duration
+        self.max_clients = max_clients
+        self.retry = retry
+        self.enabled = enabled
+
+        self.stats = {'events': 0, 'polls': 0}
+        self._latest = None
+        self._clients = 0
+        self._changed = threading.Condition()
+        self._pid = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def clients(self):
+        return self._clients
+
+    def ensure_started(self):
+        """Arranca el hilo vigilante en este proceso (se comprueba el PID por el fork de gunicorn)."""
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._latest = None
+            self._thread = threading.Thread(target=self._run, name="weather-stream", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            # Sin clientes no hay nada que vigilar
+            if self._clients:
+                try:
+                    self.poll()
+                except Exception as e:
+                    logger.error(f"Error al vigilar la caché del tiempo: {e}")
+            time.sleep(self.poll_interval)
+
+    def poll(self):
+        """Lee la instantánea y, si los datos han cambiado, avisa a los clientes."""
+        self.stats['polls'] += 1
+        if self.refresh:
+            self.cache.get()
+        event = _event(self.cache.read_snapshot())
+        if event is None:
+            return
+        with self._changed:
+            if self._latest is not None and self._latest.digest == event.digest:
+                return
+            self._latest = event
+            self.stats['events'] += 1
+            self._changed.notify_all()
+
+    def open(self, last_event_id=None):
+        """Generador del stream para un cliente nuevo (``StreamFull`` si no caben más)."""
+        if self._clients >= self.max_clients:
+            raise StreamFull()
+        self.ensure_started()
+        if self._latest is None:
+            # Primer cliente del proceso: no le hacemos esperar al siguiente ciclo
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error al leer la caché del tiempo: {e}")
+        return self._stream(last_event_id)
+
+    def _stream(self, last_event_id):
+        # El contador se actualiza dentro del generador: si la respuesta se descarta
+        # antes de empezar a enviarse, el finally no llegaría a ejecutarse
+        with self._changed:
+            self._clients += 1
+        try:
+            yield f"retry: {self.retry}\n\n".encode('ascii')
+            sent = last_event_id
+            deadline = time.monotonic() + self.max_duration
+            while True:
+                with self._changed:
+                    event = self._latest
+                    if event is None or event.id == sent:
+                        self._changed.wait(self.heartbeat)
+                        event = self._latest
+                if event is not None and event.id != sent:
+                    sent = event.id
+                    yield event.body
+                elif time.monotonic() >= deadline:
+                    return
+                else:
+                    yield b": ping\n\n"
+        finally:
+            with self._changed:
+                self._clients -= 1